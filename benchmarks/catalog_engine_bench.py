@@ -0,0 +1,121 @@
+"""Product listing latency, SQL path against the NumPy catalog engine.
+
+Builds a throwaway SQLite database with synthetic products and times
+GET /api/products with various filter sets through the app, once with
+CATALOG_ENGINE=sql and once with CATALOG_ENGINE=numpy.
+
+    python benchmarks/catalog_engine_bench.py --products 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    '',
+    '?platform_id=3',
+    '?category_id=17&page=3',
+    '?vendor_id=42',
+    '?min_price=5&max_price=6',
+    '?platform=Telegram&min_quantity=4000',
+    '?category=Category%207&max_quantity=10',
+    '?vendor=Vendor%2013&min_price=1&max_price=2&page=2',
+]
+
+def populate(db, count, seed=11):
+    from src.models.platform import Platform
+    from src.models.vendor import Vendor
+    from src.models.category import Category
+    from src.models.product import Product
+
+    rng = random.Random(seed)
+    platforms = ['Facebook', 'Instagram', 'Gmail', 'Twitter', 'TikTok', 'Reddit', 'Discord', 'Telegram']
+    db.session.execute(Platform.__table__.insert(), [{'platform_name': name} for name in platforms])
+    db.session.execute(Vendor.__table__.insert(), [{'vendor_name': f'Vendor {index}'} for index in range(1, 101)])
+    db.session.execute(Category.__table__.insert(), [
+        {'platform_id': index % len(platforms) + 1, 'category_name': f'Category {index}'} for index in range(1, 41)
+    ])
+    chunk = []
+    for product_id in range(1, count + 1):
+        chunk.append({
+            'product_id': product_id,
+            'category_id': rng.randint(1, 40),
+            'vendor_id': rng.randint(1, 100),
+            'name': f'Product {product_id}',
+            'quantity': rng.randrange(0, 5000),
+            'price_per_pc': round(rng.uniform(0.05, 10), 2)
+        })
+        if len(chunk) == 50000:
+            db.session.execute(Product.__table__.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(Product.__table__.insert(), chunk)
+    db.session.commit()
+
+def time_queries(client, repeat):
+    results = {}
+    for query in QUERIES:
+        client.get('/api/products' + query)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get('/api/products' + query)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        results[query] = (timings[len(timings) // 2], response.get_json()['pagination']['total'])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "bench.db")}'
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['COALESCE_REQUESTS'] = 'false'
+
+    from src.main import app
+    from src.models.user import db
+    from src.services.catalog_engine import catalog_engine
+
+    with app.app_context():
+        # Replace the seed data with the synthetic catalog
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        populate(db, args.products)
+        print(f'inserted {args.products} products in {time.perf_counter() - started:.1f}s')
+
+    client = app.test_client()
+    app.config['CATALOG_ENGINE'] = 'sql'
+    sql = time_queries(client, args.repeat)
+
+    app.config['CATALOG_ENGINE'] = 'numpy'
+    with app.app_context():
+        started = time.perf_counter()
+        catalog_engine.rebuild()
+        print(f'engine build: {time.perf_counter() - started:.1f}s')
+    engine = time_queries(client, args.repeat)
+
+    print(f'{"query":55} {"total":>8} {"sql ms":>9} {"numpy ms":>9}')
+    for query in QUERIES:
+        (sql_time, sql_total), (engine_time, engine_total) = sql[query], engine[query]
+        assert sql_total == engine_total, query
+        print(f'{query or "(no filters)":55} {sql_total:8} {sql_time * 1000:9.1f} {engine_time * 1000:9.1f}')
+
+    with app.app_context():
+        started = time.perf_counter()
+        for product_id in range(1, 1001):
+            catalog_engine.apply(catalog_engine.state, 'product', [product_id], False)
+        print(f'incremental update: {(time.perf_counter() - started) / 1000 * 1e6:.1f}us per product')
+
+if __name__ == '__main__':
+    main()
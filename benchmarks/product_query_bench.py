@@ -0,0 +1,113 @@
+"""Python-side cost of the product listing statements, rebuilt Query chains against the statement factory.
+
+For each filter set, times building the statements the way get_products did
+before (a fresh Query per request) and through product_listing(), up to the
+SQLAlchemy cache key that the compiled SQL is looked up by. It then times
+executing the count and page statements against the seeded database, whose
+handful of rows keeps the round trip negligible. Reports microseconds per request.
+
+    python benchmarks/product_query_bench.py --repeat 2000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILTER_SETS = [
+    {},
+    {'platform_id': 3},
+    {'category_id': 17, 'vendor_id': 4},
+    {'min_price': 5.0, 'max_price': 6.0},
+    {'platform': 'Telegram', 'min_quantity': 4000},
+    {'category': 'Category 7', 'max_quantity': 10, 'keyword': 'premium'},
+    {'vendor': 'Vendor 13', 'min_price': 1.0, 'max_price': 2.0, 'min_quantity': 1, 'max_quantity': 9, 'keyword': 'aged'},
+]
+
+def legacy_query(filters):
+    """The per-request Query chain get_products built before the statement factory"""
+    from src.models.user import db
+    from src.models.product import Product
+    from src.models.category import Category
+    from src.models.vendor import Vendor
+    from src.models.platform import Platform
+
+    query = Product.query.join(Category).join(Vendor).join(Platform, Category.platform_id == Platform.platform_id)
+    if filters.get('category_id'):
+        query = query.filter(Product.category_id == filters['category_id'])
+    if filters.get('platform_id'):
+        query = query.filter(Category.platform_id == filters['platform_id'])
+    if filters.get('vendor_id'):
+        query = query.filter(Product.vendor_id == filters['vendor_id'])
+    if filters.get('min_price') is not None:
+        query = query.filter(Product.price_per_pc >= filters['min_price'])
+    if filters.get('max_price') is not None:
+        query = query.filter(Product.price_per_pc <= filters['max_price'])
+    if filters.get('min_quantity') is not None:
+        query = query.filter(Product.quantity >= filters['min_quantity'])
+    if filters.get('max_quantity') is not None:
+        query = query.filter(Product.quantity <= filters['max_quantity'])
+    if filters.get('vendor'):
+        query = query.filter(Vendor.vendor_name == filters['vendor'])
+    if filters.get('platform'):
+        query = query.filter(Platform.platform_name == filters['platform'])
+    if filters.get('category'):
+        query = query.filter(Category.category_name == filters['category'])
+    if filters.get('keyword'):
+        keyword_filter = f"%{filters['keyword']}%"
+        query = query.filter(db.or_(Product.name.ilike(keyword_filter), Vendor.vendor_name.ilike(keyword_filter)))
+    return query.order_by(Product.product_id.desc())
+
+def per_call_us(fn, repeat):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_bench.db')}"
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['POPULARITY_FLUSH_SECONDS'] = '0'
+
+    from src.main import app
+    from src.models.user import db
+    from src.services.product_query import product_listing
+
+    def build_legacy(filters):
+        query = legacy_query(filters)
+        query.order_by(None).statement._generate_cache_key()
+        query.limit(50).offset(0).statement._generate_cache_key()
+
+    def build_factory(filters):
+        statements, params = product_listing(filters)
+        statements.count._generate_cache_key()
+        statements.page._generate_cache_key()
+
+    def execute_legacy(filters):
+        query = legacy_query(filters)
+        query.order_by(None).count()
+        query.limit(50).offset(0).all()
+
+    def execute_factory(filters):
+        statements, params = product_listing(filters)
+        db.session.execute(statements.count, params).scalar()
+        db.session.execute(statements.page, {**params, 'limit': 50, 'offset': 0}).scalars().all()
+
+    print(f'{"filters":>7} {"build old":>10} {"build new":>10} {"exec old":>10} {"exec new":>10}   (us per request)')
+    with app.app_context():
+        for filters in FILTER_SETS:
+            timings = [per_call_us(lambda: step(filters), args.repeat)
+                       for step in (build_legacy, build_factory, execute_legacy, execute_factory)]
+            print(f'{len(filters):7} ' + ' '.join(f'{value:10.1f}' for value in timings))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""Replay recorded API traffic and report throughput, latency and errors per endpoint.
+
+Record with the app's TrafficRecorder (set TRAFFIC_RECORD_PATH), then replay
+the files against a fresh in-process app on a synthetic SQLite catalog, or
+against a running instance with --url. Requests keep their recorded spacing
+divided by --speed (0 sends them as fast as --concurrency allows). Only GET
+and HEAD are replayed by default; the recorder keeps no bodies, so writes
+cannot be reproduced and are counted as skipped.
+
+    python benchmarks/replay_load.py traffic.jsonl --products 100000 --concurrency 16 --speed 4 \\
+        --output release-1.json --baseline release-0.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Path segments that identify a row rather than an endpoint
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-f]{32})$')
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def endpoint_of(method, path):
+    segments = [':id' if ID_SEGMENT.match(segment) else segment for segment in path.split('/')]
+    return f'{method} {"/".join(segments)}'
+
+def load_records(paths, methods, limit):
+    records = []
+    skipped = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as recording:
+            for line in recording:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record['method'] in methods:
+                    records.append(record)
+                else:
+                    skipped += 1
+    records.sort(key=lambda record: record['t'])
+    if limit:
+        records = records[:limit]
+    return records, skipped
+
+def in_process_sender(products):
+    """A send(method, target) function backed by the app on a synthetic SQLite catalog"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replay.db')}"
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['TRAFFIC_RECORD_PATH'] = ''
+
+    from catalog_engine_bench import populate
+    from src.main import app
+    from src.models.user import db
+
+    with app.app_context():
+        # Replace the seed data with the synthetic catalog
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        populate(db, products)
+        print(f'inserted {products} products in {time.perf_counter() - started:.1f}s')
+
+    clients = threading.local()
+
+    def send(method, target):
+        if not hasattr(clients, 'client'):
+            clients.client = app.test_client()
+        return clients.client.open(target, method=method).status_code
+
+    return send
+
+def http_sender(url):
+    """A send(method, target) function keeping one connection per worker thread to url"""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    prefix = parts.path.rstrip('/')
+    connections = threading.local()
+
+    def send(method, target):
+        for attempt in range(2):
+            if not hasattr(connections, 'connection'):
+                connections.connection = connection_class(parts.netloc, timeout=30)
+            try:
+                connections.connection.request(method, prefix + target)
+                response = connections.connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                connections.connection.close()
+                del connections.connection
+                if attempt:
+                    raise
+
+    return send
+
+def replay(records, send, concurrency, speed):
+    """Send records on concurrency threads, paced by speed; returns per-endpoint samples and wall time"""
+    work = queue.Queue(maxsize=concurrency * 4)
+    samples = {}
+    lock = threading.Lock()
+    lag = []
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            record, due = item
+            target = record['path'] + (f"?{record['query']}" if record['query'] else '')
+            started = time.perf_counter()
+            try:
+                status = send(record['method'], target)
+            except Exception:
+                status = None
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.setdefault(endpoint_of(record['method'], record['path']), []).append((elapsed, status))
+                lag.append(max(started - due, 0.0))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    first = records[0]['t'] if records else 0
+    started = time.perf_counter()
+    for record in records:
+        due = started + ((record['t'] - first) / speed if speed > 0 else 0.0)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((record, due))
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started, lag
+
+def summarize(samples, duration):
+    endpoints = {}
+    for endpoint, rows in samples.items():
+        latencies = [elapsed for elapsed, _ in rows]
+        errors = sum(1 for _, status in rows if status is None or status >= 500)
+        endpoints[endpoint] = {
+            'count': len(rows),
+            'per_second': len(rows) / duration if duration else 0.0,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'client_errors': sum(1 for _, status in rows if status is not None and 400 <= status < 500),
+            'errors': errors,
+            'error_rate': errors / len(rows)
+        }
+    return endpoints
+
+def print_report(summary, baseline=None):
+    header = f'{"endpoint":48} {"count":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"4xx":>6} {"err %":>6}'
+    if baseline:
+        header += f' {"d req/s":>8} {"d p99":>8}'
+    print(header)
+    endpoints = summary['endpoints']
+    for endpoint in sorted(endpoints, key=lambda name: -endpoints[name]['count']):
+        row = endpoints[endpoint]
+        line = (f'{endpoint[:48]:48} {row["count"]:7} {row["per_second"]:8.1f} {row["p50_ms"]:8.1f} '
+                f'{row["p95_ms"]:8.1f} {row["p99_ms"]:8.1f} {row["client_errors"]:6} {row["error_rate"] * 100:6.2f}')
+        previous = baseline['endpoints'].get(endpoint) if baseline else None
+        if previous:
+            line += f' {row["per_second"] - previous["per_second"]:+8.1f} {row["p99_ms"] - previous["p99_ms"]:+8.1f}'
+        print(line)
+    print(f'{summary["requests"]} requests in {summary["duration_s"]:.1f}s ({summary["per_second"]:.1f}/s), '
+          f'{summary["skipped"]} skipped, p99 send lag {summary["p99_lag_ms"]:.1f} ms')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recordings', nargs='+', help='files written by TRAFFIC_RECORD_PATH')
+    parser.add_argument('--url', help='replay against this running instance instead of an in-process app')
+    parser.add_argument('--products', type=int, default=100000, help='synthetic catalog size for the in-process app')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--speed', type=float, default=1.0, help='speed-up factor; 0 replays without pauses')
+    parser.add_argument('--methods', default='GET,HEAD')
+    parser.add_argument('--limit', type=int, help='replay at most this many requests')
+    parser.add_argument('--output', help='write the summary as JSON to compare later releases against')
+    parser.add_argument('--baseline', help='summary JSON of an earlier run to print differences against')
+    args = parser.parse_args()
+
+    records, skipped = load_records(args.recordings, set(args.methods.upper().split(',')), args.limit)
+    if not records:
+        parser.error('no requests to replay')
+    send = http_sender(args.url) if args.url else in_process_sender(args.products)
+
+    samples, duration, lag = replay(records, send, args.concurrency, args.speed)
+    summary = {
+        'requests': len(records),
+        'skipped': skipped,
+        'duration_s': duration,
+        'per_second': len(records) / duration if duration else 0.0,
+        'p99_lag_ms': percentile(lag, 0.99) * 1000,
+        'settings': {'concurrency': args.concurrency, 'speed': args.speed, 'url': args.url, 'products': args.products},
+        'endpoints': summarize(samples, duration)
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as previous:
+            baseline = json.load(previous)
+    print_report(summary, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(summary, output, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
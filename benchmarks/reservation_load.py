@@ -0,0 +1,112 @@
+"""Flash-sale checkout load test for inventory reservations.
+
+Many threads race to reserve and buy one product until it sells out. Reports
+successful checkouts per second and fails if more units were sold than stocked.
+
+    python benchmarks/reservation_load.py --threads 16 --stock 500
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--units', type=int, default=1, help='units bought per checkout')
+    parser.add_argument('--abandon-every', type=int, default=5, help='release every Nth hold instead of buying (0 never)')
+    parser.add_argument('--database-url', help='defaults to a throwaway SQLite file')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'reservation_load.db')}"
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+
+    from src.main import app
+    from src.models.user import db
+    from src.models.product import Product
+
+    with app.app_context():
+        template = Product.query.first()
+        product = Product(
+            category_id=template.category_id,
+            vendor_id=template.vendor_id,
+            name='Flash sale batch',
+            quantity=args.stock,
+            price_per_pc=1
+        )
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.product_id
+
+    counters = {'checkouts': 0, 'sold_out': 0, 'abandoned': 0, 'errors': 0}
+    counters_lock = threading.Lock()
+    sold_out = threading.Event()
+
+    def count(name):
+        with counters_lock:
+            counters[name] += 1
+
+    def buyer(index):
+        client = app.test_client()
+        attempt = 0
+        while not sold_out.is_set():
+            attempt += 1
+            response = client.post('/api/reservations', json={
+                'items': [{'product_id': product_id, 'quantity': args.units}]
+            })
+            if response.status_code == 409:
+                count('sold_out')
+                sold_out.set()
+                break
+            if response.status_code != 201:
+                count('errors')
+                continue
+            token = response.get_json()['data']['token']
+
+            if args.abandon_every and attempt % args.abandon_every == 0:
+                client.delete(f'/api/reservations/{token}')
+                count('abandoned')
+                continue
+
+            response = client.post('/api/orders', json={
+                'customer_email': f'buyer{index}@example.com',
+                'reservation_token': token,
+                'payment_status': 'paid'
+            })
+            count('checkouts' if response.status_code == 201 else 'errors')
+
+    threads = [threading.Thread(target=buyer, args=(index,)) for index in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        remaining = db.session.get(Product, product_id).quantity
+
+    sold = args.stock - remaining
+    print(f"threads={args.threads} stock={args.stock} elapsed={elapsed:.2f}s")
+    print(f"checkouts={counters['checkouts']} abandoned={counters['abandoned']} errors={counters['errors']}")
+    print(f"checkouts/s={counters['checkouts'] / elapsed:.1f}")
+    print(f"units sold={sold} remaining={remaining}")
+
+    expected = counters['checkouts'] * args.units
+    if remaining < 0 or sold != expected:
+        print(f'OVERSELL OR LOST STOCK: sold {sold} units for {expected} confirmed')
+        sys.exit(1)
+    print('OK: no oversell')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Concurrent reads and writes on SQLite, default settings against SQLITE_PROFILE=production.
+
+Reader threads page through GET /api/products while writer threads update
+product quantities with PUT /api/products/<id>, for a fixed time, once per
+profile in a fresh process and database. Reports throughput, latency
+percentiles and failed requests (mostly "database is locked").
+
+    python benchmarks/sqlite_profile_bench.py --readers 8 --writers 4 --seconds 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = ('default', 'production')
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def run_profile(args):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'profile_bench.db')}"
+    os.environ['SQLITE_PROFILE'] = args.profile
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['POPULARITY_FLUSH_SECONDS'] = '0'
+    os.environ['COALESCE_REQUESTS'] = 'false'
+
+    from src.main import app
+    from src.models.user import db
+    from src.models.product import Product
+
+    with app.app_context():
+        template = Product.query.first()
+        db.session.execute(Product.__table__.insert(), [{
+            'category_id': template.category_id,
+            'vendor_id': template.vendor_id,
+            'name': f'Benchmark product {index}',
+            'quantity': 100,
+            'price_per_pc': 1
+        } for index in range(args.products)])
+        db.session.commit()
+        product_ids = [row[0] for row in db.session.query(Product.product_id)]
+
+    stop = threading.Event()
+    results = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+    lock = threading.Lock()
+
+    def worker(kind, seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        latencies = []
+        errors = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            if kind == 'read':
+                response = client.get(f'/api/products?page={rng.randint(1, 20)}&per_page=50')
+            else:
+                response = client.put(f'/api/products/{rng.choice(product_ids)}', json={'quantity': rng.randint(0, 1000)})
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+        with lock:
+            results[kind].extend(latencies)
+            results[f'{kind}_errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=('read', index)) for index in range(args.readers)]
+    threads += [threading.Thread(target=worker, args=('write', 1000 + index)) for index in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    summary = {}
+    for kind in ('read', 'write'):
+        latencies = results[kind]
+        summary[kind] = {
+            'per_second': len(latencies) / args.seconds,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'errors': results[f'{kind}_errors']
+        }
+    print(json.dumps(summary))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    print(f'{"profile":12} {"kind":6} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for profile in PROFILES:
+        # A fresh interpreter per profile, since the profile is read when the app is imported
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile, '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds), '--products', str(args.products)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        summary = json.loads(output.strip().splitlines()[-1])
+        for kind in ('read', 'write'):
+            row = summary[kind]
+            print(f'{profile:12} {kind:6} {row["per_second"]:8.1f} {row["p50_ms"]:8.1f} '
+                  f'{row["p99_ms"]:8.1f} {row["errors"]:7}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Typeahead latency at catalog scale.
+
+Loads synthetic product names into the in-memory prefix index and times
+queries of various shapes, without a database.
+
+    python benchmarks/suggest_bench.py --products 500000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.suggest import PrefixIndex
+
+PLATFORMS = ['Facebook', 'Instagram', 'Gmail', 'Twitter', 'TikTok', 'Reddit', 'Discord', 'Telegram', 'Outlook', 'Yahoo']
+WORDS = ['accounts', 'verified', 'email', 'sms', 'aged', 'softreg', 'cookies', 'included', 'profile', 'male',
+         'female', 'registered', 'usa', 'uk', 'ip', 'twofa', 'useragent', 'token', 'phone', 'recovery',
+         'premium', 'bulk', 'fresh', 'old', 'business', 'ads', 'manager', 'pva', 'random', 'countries']
+
+QUERIES = ['f', 'fa', 'face', 'facebook', 'gm', 'gmail ver', 'insta aged', 'tel', 'x', 'facebook accounts usa ip']
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    for product_id in range(1, count + 1):
+        words = rng.sample(WORDS, 12)
+        # A slice of unique-ish tokens keeps the vocabulary realistic
+        name = f"{rng.choice(PLATFORMS)} {' '.join(words)} batch{rng.randrange(50000)}"
+        yield product_id, name, rng.randrange(0, 5000)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args()
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.load(synthetic_rows(args.products))
+    print(f'loaded {args.products} products, {len(index.vocabulary)} tokens in {time.perf_counter() - started:.1f}s')
+
+    for query in QUERIES:
+        tokens = query.split()
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results = index.search(tokens, args.limit)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f'{query!r:30} hits={len(results):2} p50={timings[len(timings) // 2] * 1e6:8.1f}us '
+              f'p99={timings[int(len(timings) * 0.99) - 1] * 1e6:8.1f}us')
+
+    started = time.perf_counter()
+    for product_id in range(1, 1001):
+        index.add(product_id, index.labels[product_id], index.stock[product_id] + 1)
+    print(f'incremental update: {(time.perf_counter() - started) / 1000 * 1e6:.1f}us per product')
+
+if __name__ == '__main__':
+    main()
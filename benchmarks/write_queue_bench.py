@@ -0,0 +1,119 @@
+"""Concurrent writes on SQLite, per-request commits against WRITE_QUEUE group commits.
+
+Writer threads create orders with POST /api/orders and update product
+quantities with PUT /api/products/<id>, for a fixed time, once per mode in a
+fresh process and database. Reports writes per second, latency percentiles,
+failed requests and, with the queue on, the average number of writes per commit.
+
+    python benchmarks/write_queue_bench.py --writers 16 --seconds 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ('off', 'on')
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def run_mode(args):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'write_bench.db')}"
+    os.environ['WRITE_QUEUE'] = 'true' if args.mode == 'on' else 'false'
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['WARMUP_MODE'] = 'off'
+    os.environ['RESERVATION_SWEEP_SECONDS'] = '0'
+    os.environ['POPULARITY_FLUSH_SECONDS'] = '0'
+
+    from src.main import app
+    from src.models.user import db
+    from src.models.product import Product
+    from src.services.metrics import WRITE_BATCH_SIZE
+
+    with app.app_context():
+        product_ids = [row[0] for row in db.session.query(Product.product_id)]
+
+    stop = threading.Event()
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local = []
+        errors = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            if rng.random() < 0.5:
+                response = client.post('/api/orders', json={
+                    'customer_email': f'bench{seed}@example.com',
+                    'order_items': [{'product_id': rng.choice(product_ids), 'quantity': 1}]
+                })
+            else:
+                response = client.put(f'/api/products/{rng.choice(product_ids)}', json={'quantity': rng.randint(0, 1000)})
+            if response.status_code in (200, 201):
+                local.append(time.perf_counter() - started)
+            else:
+                errors += 1
+        with lock:
+            latencies.extend(local)
+            failures[0] += errors
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    batch_count = batch_sum = 0
+    for metric in WRITE_BATCH_SIZE.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_count'):
+                batch_count = sample.value
+            elif sample.name.endswith('_sum'):
+                batch_sum = sample.value
+    print(json.dumps({
+        'per_second': len(latencies) / args.seconds,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': failures[0],
+        'per_commit': batch_sum / batch_count if batch_count else 1.0
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    print(f'{"queue":6} {"writes/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7} {"per commit":>11}')
+    for mode in MODES:
+        # A fresh interpreter per mode, since WRITE_QUEUE is read when the app is imported
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        row = json.loads(output.strip().splitlines()[-1])
+        print(f'{mode:6} {row["per_second"]:9.1f} {row["p50_ms"]:8.1f} {row["p99_ms"]:8.1f} '
+              f'{row["errors"]:7} {row["per_commit"]:11.1f}')
+
+if __name__ == '__main__':
+    main()
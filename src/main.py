@@ -9,9 +9,20 @@ from src.models.user import db
 from src.models.platform import Platform
 from src.models.vendor import Vendor
 from src.models.category import Category
+from src.models.subcategory import Subcategory
 from src.models.product import Product
 from src.models.order import Order, OrderItem
+from src.models.order_archive import ArchivedOrder, ArchivedOrderItem
 from src.models.settings import SiteSetting, WebsiteLayout
+from src.models.job import Job
+from src.models.cache_version import CacheVersion
+from src.models.rollup import OrderRollupHourly, OrderRollupDaily
+from src.models.reservation import InventoryReservation
+from src.models.idempotency import IdempotencyKey
+from src.models.similarity import ProductSignature, ProductLshBucket, ProductSimilarity
+from src.models.catalog_change import CatalogChange
+from src.models.popularity import ProductPopularity
+from src.models.vendor_stats import VendorStats
 
 from src.routes.user import user_bp
 from src.routes.categories import categories_bp
@@ -20,12 +31,31 @@ from src.routes.orders import orders_bp
 from src.routes.admin import admin_bp
 from src.routes.vendors import vendors_bp
 from src.routes.platforms import platforms_bp
+from src.routes.site import site_bp
+from src.routes.reservations import reservations_bp
+from src.routes.changes import changes_bp
+from src.routes.live import live_bp
+from src.routes.navigation import navigation_bp
+from src.routes.batch import batch_bp
+from src.routes.health import health_bp
+from src.routes.metrics import metrics_bp
+from src.routes.profiling import profiling_bp
+from src.services.jobs import start_workers
+from src.services.reservations import start_sweeper
+from src.services.warmup import start_warmup
+from src.services.metrics import init_metrics
+from src.services.popularity import start_flusher
+from src.services.sqlite_tuning import configure_sqlite
+from src.services.write_queue import start_write_queue
+from src.services.traffic_recorder import install_recorder
+from src.services.profiler import init_profiling
+from src.services.vendor_stats import ensure_vendor_stats
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
 # Enable CORS for all routes and origins
-CORS(app, origins="*", allow_headers=["Content-Type", "Authorization"], methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+CORS(app, origins="*", allow_headers=["Content-Type", "Authorization", "Idempotency-Key"], methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 # Register blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -33,8 +63,17 @@ app.register_blueprint(categories_bp, url_prefix='/api')
 app.register_blueprint(products_bp, url_prefix='/api')
 app.register_blueprint(orders_bp, url_prefix='/api')
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
+app.register_blueprint(profiling_bp, url_prefix='/api/admin')
 app.register_blueprint(vendors_bp, url_prefix='/api')
 app.register_blueprint(platforms_bp, url_prefix='/api')
+app.register_blueprint(site_bp, url_prefix='/api')
+app.register_blueprint(reservations_bp, url_prefix='/api')
+app.register_blueprint(changes_bp, url_prefix='/api')
+app.register_blueprint(live_bp, url_prefix='/api')
+app.register_blueprint(navigation_bp, url_prefix='/api')
+app.register_blueprint(batch_bp, url_prefix='/api')
+app.register_blueprint(health_bp)
+app.register_blueprint(metrics_bp)
 
 # Database configuration
 database_url = os.environ.get("DATABASE_URL")
@@ -44,7 +83,68 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Background job worker threads started with the app; set to 0 when running src/worker.py separately
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+# Settings whose keys start with these prefixes are left out of the public site config
+app.config['PRIVATE_SETTING_PREFIXES'] = tuple(os.environ.get('PRIVATE_SETTING_PREFIXES', 'private.,secret.').split(','))
+# Checkout stock holds: default and maximum lifetime, and how often expired holds are swept (0 disables)
+app.config['RESERVATION_TTL_SECONDS'] = int(os.environ.get('RESERVATION_TTL_SECONDS', 600))
+app.config['RESERVATION_MAX_TTL_SECONDS'] = int(os.environ.get('RESERVATION_MAX_TTL_SECONDS', 1800))
+app.config['RESERVATION_SWEEP_SECONDS'] = float(os.environ.get('RESERVATION_SWEEP_SECONDS', 30))
+# Idempotency-Key handling: how long responses are kept, when an unfinished attempt counts as dead,
+# and how long a concurrent duplicate waits for the first attempt
+app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 86400))
+app.config['IDEMPOTENCY_LOCK_SECONDS'] = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+app.config['IDEMPOTENCY_WAIT_SECONDS'] = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+# Worker warm-up before /healthz/ready reports ready: background, blocking or off
+app.config['WARMUP_MODE'] = os.environ.get('WARMUP_MODE', 'background')
+# Connections opened during warm-up; defaults to the pool size
+app.config['WARMUP_POOL_CONNECTIONS'] = int(os.environ['WARMUP_POOL_CONNECTIONS']) if os.environ.get('WARMUP_POOL_CONNECTIONS') else None
+# Optional bearer token required to scrape /metrics
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Live product update streams: change poll interval, heartbeat interval, open streams per worker
+# and event batches queued per stream before a slow client is told to resync
+app.config['LIVE_POLL_SECONDS'] = float(os.environ.get('LIVE_POLL_SECONDS', 1.0))
+app.config['LIVE_HEARTBEAT_SECONDS'] = float(os.environ.get('LIVE_HEARTBEAT_SECONDS', 15))
+app.config['LIVE_MAX_SUBSCRIBERS'] = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 200))
+app.config['LIVE_QUEUE_SIZE'] = int(os.environ.get('LIVE_QUEUE_SIZE', 64))
+# Identical concurrent GETs of catalog read endpoints share one execution; followers wait at most this long
+app.config['COALESCE_REQUESTS'] = os.environ.get('COALESCE_REQUESTS', 'true').lower() in ('1', 'true', 'yes', 'on')
+app.config['COALESCE_WAIT_SECONDS'] = float(os.environ.get('COALESCE_WAIT_SECONDS', 10))
+# Product listing engine: sql, or numpy to filter and sort in memory (needs numpy installed)
+app.config['CATALOG_ENGINE'] = os.environ.get('CATALOG_ENGINE', 'sql')
+# Product view and purchase counts are buffered per worker and written every POPULARITY_FLUSH_SECONDS,
+# which is also how much a crash can lose (0 disables counting); a buffer of POPULARITY_MAX_PENDING
+# products is written early
+app.config['POPULARITY_FLUSH_SECONDS'] = float(os.environ.get('POPULARITY_FLUSH_SECONDS', 10))
+app.config['POPULARITY_MAX_PENDING'] = int(os.environ.get('POPULARITY_MAX_PENDING', 5000))
+# SQLite connection tuning: production (WAL, synchronous=NORMAL, mmap, larger cache) or default;
+# ignored for other databases
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))
+# Funnel order, product and catalog writes through one writer thread that commits up to
+# WRITE_QUEUE_MAX_BATCH of them together, waiting WRITE_QUEUE_LINGER_MS for more to arrive
+app.config['WRITE_QUEUE'] = os.environ.get('WRITE_QUEUE', 'false').lower() in ('1', 'true', 'yes', 'on')
+app.config['WRITE_QUEUE_MAX_BATCH'] = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 64))
+app.config['WRITE_QUEUE_LINGER_MS'] = float(os.environ.get('WRITE_QUEUE_LINGER_MS', 2))
+app.config['WRITE_QUEUE_TIMEOUT_SECONDS'] = float(os.environ.get('WRITE_QUEUE_TIMEOUT_SECONDS', 30))
+# GET sub-requests accepted by one POST /api/batch, and the threads shared by batches sent with parallel=true
+app.config['BATCH_MAX_REQUESTS'] = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', 4))
+# Append a line per /api/ request (no bodies, only their hash) to this file for benchmarks/replay_load.py;
+# {pid} is replaced per worker. TRAFFIC_RECORD_SAMPLE is the fraction of requests recorded
+app.config['TRAFFIC_RECORD_PATH'] = os.environ.get('TRAFFIC_RECORD_PATH', '')
+app.config['TRAFFIC_RECORD_SAMPLE'] = float(os.environ.get('TRAFFIC_RECORD_SAMPLE', 1.0))
+# Bearer token for /api/admin/profiling and value of the X-Profile header that profiles a single
+# request; without it the profiling views answer 404 and no request hooks are installed
+app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN')
 db.init_app(app)
+configure_sqlite(app)
+init_metrics(app)
+install_recorder(app)
+init_profiling(app)
 
 def seed_initial_data():
     """Seed initial data for testing"""
@@ -76,8 +176,6 @@ def seed_initial_data():
             db.session.flush()
             
             # Create subcategories
-            from src.models.subcategory import Subcategory
-            
             # Facebook subcategories
             fb_softreg = Subcategory(name="Softreg", category_id=fb_category.category_id, icon="📧")
             fb_gmail = Subcategory(name="Gmail", category_id=fb_category.category_id, icon="📬")
@@ -132,6 +230,22 @@ def seed_initial_data():
 with app.app_context():
     db.create_all()
     seed_initial_data()
+    ensure_vendor_stats()
+
+if app.config['JOB_WORKERS'] > 0:
+    start_workers(app, app.config['JOB_WORKERS'])
+
+if app.config['RESERVATION_SWEEP_SECONDS'] > 0:
+    start_sweeper(app, app.config['RESERVATION_SWEEP_SECONDS'])
+
+if app.config['POPULARITY_FLUSH_SECONDS'] > 0:
+    start_flusher(app, app.config['POPULARITY_FLUSH_SECONDS'], app.config['POPULARITY_MAX_PENDING'])
+
+if app.config['WRITE_QUEUE']:
+    start_write_queue(
+        app, app.config['WRITE_QUEUE_MAX_BATCH'], app.config['WRITE_QUEUE_LINGER_MS'] / 1000,
+        app.config['WRITE_QUEUE_TIMEOUT_SECONDS']
+    )
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -149,6 +263,8 @@ def serve(path):
         else:
             return "index.html not found", 404
 
+# Last, once every route and hook is registered: warm-up sends requests through the app
+start_warmup(app, app.config['WARMUP_MODE'])
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
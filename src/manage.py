@@ -0,0 +1,89 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# Maintenance commands never need the in-process job workers or warm-up
+os.environ['JOB_WORKERS'] = '0'
+os.environ['WARMUP_MODE'] = 'off'
+
+from src.main import app
+
+def backfill_rollups(args):
+    from src.services.rollups import rebuild_rollups
+    since = datetime.fromisoformat(args.since) if args.since else None
+    processed = rebuild_rollups(since=since, chunk_size=args.chunk_size)
+    print(f'Rebuilt order rollups from {processed} orders')
+
+def purge_idempotency_keys(args):
+    from src.services.idempotency import purge_expired
+    print(f'Purged {purge_expired()} expired idempotency keys')
+
+def rebuild_similar_products(args):
+    from src.services.similarity import rebuild_all, rebuild_platform
+    if args.platform_id:
+        rebuild_platform(args.platform_id, log=print)
+    else:
+        print(f'Indexed {rebuild_all(log=print)} products')
+
+def prune_catalog_changes(args):
+    from src.services.catalog_changes import prune_changes
+    print(f'Pruned {prune_changes(args.keep_days)} catalog change rows')
+
+def duty_cycle(value):
+    value = float(value)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError('must be greater than 0 and at most 1')
+    return value
+
+def archive_orders(args):
+    from src.services.archival import archive_orders
+    moved = archive_orders(
+        args.older_than_days, batch_size=args.batch_size, duty_cycle=args.duty_cycle,
+        max_batches=args.max_batches, log=print
+    )
+    print(f'Archived {moved} orders')
+
+def rebuild_vendor_stats(args):
+    from src.services.vendor_stats import rebuild_vendor_stats
+    print(f'Rebuilt stats of {rebuild_vendor_stats()} vendors')
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintenance commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('backfill-rollups', help='rebuild hourly and daily order rollups')
+    command.add_argument('--since', help='only rebuild days starting at this ISO date')
+    command.add_argument('--chunk-size', type=int, default=500)
+    command.set_defaults(handler=backfill_rollups)
+
+    command = commands.add_parser('purge-idempotency-keys', help='delete expired idempotency keys')
+    command.set_defaults(handler=purge_idempotency_keys)
+
+    command = commands.add_parser('rebuild-similar-products', help='rebuild the similar products index')
+    command.add_argument('--platform-id', type=int, help='only rebuild this platform')
+    command.set_defaults(handler=rebuild_similar_products)
+
+    command = commands.add_parser('prune-catalog-changes', help='delete old rows of the catalog change log')
+    command.add_argument('--keep-days', type=int, default=30)
+    command.set_defaults(handler=prune_catalog_changes)
+
+    command = commands.add_parser('archive-orders', help='move old completed and cancelled orders to the archive tables')
+    command.add_argument('--older-than-days', type=int, default=90)
+    command.add_argument('--batch-size', type=int, default=500)
+    command.add_argument('--duty-cycle', type=duty_cycle, default=0.25,
+                         help='share of wall-clock time spent archiving; lower is gentler on the live tables')
+    command.add_argument('--max-batches', type=int, help='stop after this many batches')
+    command.set_defaults(handler=archive_orders)
+
+    command = commands.add_parser('rebuild-vendor-stats', help='recompute the per-vendor inventory and sales totals')
+    command.set_defaults(handler=rebuild_vendor_stats)
+
+    args = parser.parse_args()
+    with app.app_context():
+        args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+from src.models.user import db
+from datetime import datetime
+
+class CatalogChange(db.Model):
+    __tablename__ = 'catalog_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)  # the change sequence clients page by
+    entity = db.Column(db.String(20), nullable=False)  # product, category, vendor, platform
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # upsert, delete
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'seq': self.id,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'operation': self.operation,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
@@ -0,0 +1,81 @@
+from src.models.user import db
+from datetime import datetime
+
+# Old completed and cancelled orders moved out of orders/order_items by
+# src/services/archival.py. On PostgreSQL both tables are partitioned by month
+# of the order's created_at, which is why it is part of each primary key; the
+# monthly partitions are created by the archiver before it writes to them.
+# There are no foreign keys, so archived history never blocks catalog deletes.
+
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    created_at = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    customer_email = db.Column(db.String(255))
+    customer_name = db.Column(db.String(255))
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    status = db.Column(db.String(50))
+    payment_status = db.Column(db.String(50))
+    payment_method = db.Column(db.String(50))
+    notes = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    order_items = db.relationship(
+        'ArchivedOrderItem',
+        primaryjoin='ArchivedOrder.id == foreign(ArchivedOrderItem.order_id)',
+        order_by='ArchivedOrderItem.id',
+        viewonly=True
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'customer_email': self.customer_email,
+            'customer_name': self.customer_name,
+            'total_amount': float(self.total_amount) if self.total_amount else 0.0,
+            'status': self.status,
+            'payment_status': self.payment_status,
+            'payment_method': self.payment_method,
+            'notes': self.notes,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'order_items': [item.to_dict() for item in self.order_items] if self.order_items else [],
+            'archived': True,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = 'order_items_archive'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (order_created_at)'}
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_created_at = db.Column(db.DateTime, primary_key=True)  # partition key, copied from the order
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
+    total_price = db.Column(db.Numeric(10, 2), nullable=False)
+    created_at = db.Column(db.DateTime)
+    
+    product = db.relationship(
+        'Product',
+        primaryjoin='foreign(ArchivedOrderItem.product_id) == Product.product_id',
+        viewonly=True
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'order_id': self.order_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'unit_price': float(self.unit_price) if self.unit_price else 0.0,
+            'total_price': float(self.total_price) if self.total_price else 0.0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'product': self.product.to_dict() if self.product else None
+        }
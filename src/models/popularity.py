@@ -0,0 +1,22 @@
+from src.models.user import db
+from datetime import datetime
+
+# Written in batches by src/services/popularity.py; like the similarity tables it
+# carries no foreign key, so buffered counts never block a product delete.
+
+class ProductPopularity(db.Model):
+    __tablename__ = 'product_popularity'
+    
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    views = db.Column(db.BigInteger, nullable=False, default=0)
+    purchases = db.Column(db.BigInteger, nullable=False, default=0)
+    score = db.Column(db.BigInteger, nullable=False, default=0, index=True)  # views + weighted purchases
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'views': self.views,
+            'purchases': self.purchases,
+            'score': self.score
+        }
@@ -27,15 +27,16 @@ class Product(db.Model):
             'vendor': self.vendor.to_dict() if self.vendor else None
         }
     
-    # For backward compatibility with frontend
-    def to_dict_legacy(self):
+    # For backward compatibility with frontend; held is the units of this product in
+    # active checkout holds, which are not for sale
+    def to_dict_legacy(self, held=0):
         return {
             'id': self.product_id,
             'category_id': self.category_id,
             'title': self.name,
             'description': f"Product from {self.vendor.vendor_name if self.vendor else 'Unknown Vendor'}",
             'price': float(self.price_per_pc) if self.price_per_pc else 0.0,
-            'stock_quantity': self.quantity,
+            'stock_quantity': max((self.quantity or 0) - (held or 0), 0),
             'account_type': self.category.category_name if self.category else 'Unknown',
             'is_active': True,
             'is_featured': False,
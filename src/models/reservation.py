@@ -0,0 +1,32 @@
+from src.models.user import db
+from datetime import datetime
+
+class InventoryReservation(db.Model):
+    __tablename__ = 'inventory_reservations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(32), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, confirmed, released, expired
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_inventory_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'token': self.token,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'status': self.status,
+            'order_id': self.order_id,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
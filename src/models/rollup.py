@@ -0,0 +1,44 @@
+from src.models.user import db
+from datetime import datetime
+
+class OrderRollupMixin:
+    """Order volume and revenue for one time bucket and one dimension value.
+
+    dimension is one of all, status, payment_status, vendor or platform; the
+    all dimension uses an empty dimension_value.
+    """
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)
+    dimension_value = db.Column(db.String(100), nullable=False, default='')
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_orders_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    items_sold = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'dimension': self.dimension,
+            'dimension_value': self.dimension_value,
+            'orders_count': self.orders_count,
+            'paid_orders_count': self.paid_orders_count,
+            'gross_amount': float(self.gross_amount) if self.gross_amount else 0.0,
+            'revenue': float(self.revenue) if self.revenue else 0.0,
+            'items_sold': self.items_sold
+        }
+
+class OrderRollupHourly(OrderRollupMixin, db.Model):
+    __tablename__ = 'order_rollups_hourly'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_start', 'dimension', 'dimension_value', name='uq_order_rollups_hourly_bucket'),
+    )
+
+class OrderRollupDaily(OrderRollupMixin, db.Model):
+    __tablename__ = 'order_rollups_daily'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_start', 'dimension', 'dimension_value', name='uq_order_rollups_daily_bucket'),
+    )
@@ -0,0 +1,46 @@
+from src.models.user import db
+from datetime import datetime
+
+# Derived from products by src/services/similarity.py and rebuilt at will, so these
+# tables carry no foreign keys and never block a product delete.
+
+class ProductSignature(db.Model):
+    __tablename__ = 'product_signatures'
+    
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    platform_id = db.Column(db.Integer, nullable=False, index=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # packed MinHash values
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ProductLshBucket(db.Model):
+    __tablename__ = 'product_lsh_buckets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    platform_id = db.Column(db.Integer, nullable=False)
+    band = db.Column(db.SmallInteger, nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
+    product_id = db.Column(db.Integer, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_product_lsh_buckets_lookup', 'platform_id', 'band', 'bucket'),
+    )
+
+class ProductSimilarity(db.Model):
+    __tablename__ = 'product_similarities'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    similar_product_id = db.Column(db.Integer, nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'similar_product_id', name='uq_product_similarities_pair'),
+        db.Index('ix_product_similarities_product_score', 'product_id', 'score'),
+    )
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'similar_product_id': self.similar_product_id,
+            'score': round(self.score, 3)
+        }
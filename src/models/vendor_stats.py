@@ -0,0 +1,36 @@
+from src.models.user import db
+from datetime import datetime
+
+# Maintained by src/services/vendor_stats.py: inventory columns follow product
+# writes, sales columns follow paid orders the same way the order rollups do.
+
+class VendorStats(db.Model):
+    __tablename__ = 'vendor_stats'
+
+    vendor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    total_stock = db.Column(db.BigInteger, nullable=False, default=0)
+    stock_value = db.Column(db.Numeric(16, 4), nullable=False, default=0)  # sum of quantity * price_per_pc
+    paid_orders = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.BigInteger, nullable=False, default=0, index=True)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def sell_through_rate(self):
+        """Share of the units ever stocked that were sold"""
+        stocked = (self.units_sold or 0) + (self.total_stock or 0)
+        return round((self.units_sold or 0) / stocked, 4) if stocked > 0 else None
+
+    def to_dict(self):
+        return {
+            'vendor_id': self.vendor_id,
+            'product_count': self.product_count or 0,
+            'total_stock': self.total_stock or 0,
+            'stock_value': round(float(self.stock_value or 0), 2),
+            'paid_orders': self.paid_orders or 0,
+            'units_sold': self.units_sold or 0,
+            'revenue': float(self.revenue or 0),
+            'sell_through_rate': self.sell_through_rate,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
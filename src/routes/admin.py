@@ -4,9 +4,25 @@ from src.models.settings import SiteSetting, WebsiteLayout
 from src.models.category import Category
 from src.models.product import Product
 from src.models.order import Order
+from src.models.job import Job
+from src.services.jobs import job_handler, enqueue, request_cancel
+from src.services.idempotency import idempotent
+from src.services.catalog_signals import mark_catalog_changed, notify_catalog_changed
+from src.services.vendor_stats import product_snapshot, record_product_changes
+import src.services.similarity  # registers the similar products jobs
+import src.services.archival  # registers the order archival job
+from src.services.cache_versions import bump_version
+from src.services.site_config import SITE_CONFIG_VERSION
+from src.services.settings import SETTINGS_VERSION, upsert_settings
 
 admin_bp = Blueprint('admin', __name__)
 
+# Number of products updated per transaction by the bulk update job
+BULK_UPDATE_CHUNK_SIZE = 200
+
+# Upper bound on keys accepted by a single batch settings upsert
+MAX_SETTINGS_BATCH = 500
+
 # Layout Management Routes
 @admin_bp.route('/layout', methods=['GET'])
 def get_layout():
@@ -32,6 +48,7 @@ def get_layout():
         }), 500
 
 @admin_bp.route('/layout', methods=['POST'])
+@idempotent
 def create_layout_item():
     """Create a new layout item"""
     try:
@@ -52,6 +69,7 @@ def create_layout_item():
         )
         
         db.session.add(layout_item)
+        bump_version(SITE_CONFIG_VERSION)
         db.session.commit()
         
         return jsonify({
@@ -84,6 +102,7 @@ def update_layout_item(layout_id):
         if 'sort_order' in data:
             layout_item.sort_order = data['sort_order']
         
+        bump_version(SITE_CONFIG_VERSION)
         db.session.commit()
         
         return jsonify({
@@ -105,6 +124,7 @@ def delete_layout_item(layout_id):
         layout_item = WebsiteLayout.query.get_or_404(layout_id)
         
         db.session.delete(layout_item)
+        bump_version(SITE_CONFIG_VERSION)
         db.session.commit()
         
         return jsonify({
@@ -141,6 +161,7 @@ def get_settings():
         }), 500
 
 @admin_bp.route('/settings', methods=['POST'])
+@idempotent
 def create_setting():
     """Create or update a site setting"""
     try:
@@ -168,6 +189,8 @@ def create_setting():
             )
             db.session.add(setting)
         
+        bump_version(SETTINGS_VERSION)
+        bump_version(SITE_CONFIG_VERSION)
         db.session.commit()
         
         return jsonify({
@@ -182,6 +205,64 @@ def create_setting():
             'message': f'Error saving setting: {str(e)}'
         }), 500
 
+@admin_bp.route('/settings', methods=['PUT'])
+def batch_upsert_settings():
+    """Create or update many site settings at once"""
+    try:
+        data = request.get_json()
+        settings = data.get('settings')
+        
+        # Accept either {"key": value, ...} or [{"key": ..., "value": ..., "description": ...}, ...]
+        if isinstance(settings, dict):
+            items = [{'key': key, 'value': value} for key, value in settings.items()]
+        elif isinstance(settings, list):
+            items = settings
+        else:
+            return jsonify({
+                'success': False,
+                'message': 'Settings must be an object or a list'
+            }), 400
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'message': 'Settings are required'
+            }), 400
+        
+        if len(items) > MAX_SETTINGS_BATCH:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_SETTINGS_BATCH} settings can be saved at once'
+            }), 400
+        
+        # Later entries win when a key is repeated; ON CONFLICT cannot touch a row twice
+        items_by_key = {}
+        for item in items:
+            if not isinstance(item, dict) or not item.get('key'):
+                return jsonify({
+                    'success': False,
+                    'message': 'Key is required for every setting'
+                }), 400
+            items_by_key[item['key']] = item
+        
+        upsert_settings(list(items_by_key.values()))
+        bump_version(SITE_CONFIG_VERSION)
+        db.session.commit()
+        
+        settings = SiteSetting.query.filter(SiteSetting.key.in_(list(items_by_key))).all()
+        
+        return jsonify({
+            'success': True,
+            'data': {setting.key: setting.to_dict() for setting in settings},
+            'message': f'{len(settings)} settings saved successfully'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error saving settings: {str(e)}'
+        }), 500
+
 # Dashboard Statistics
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
@@ -224,9 +305,38 @@ def get_dashboard_stats():
         }), 500
 
 # Bulk Operations
+@job_handler('bulk_update_products')
+def run_bulk_update_products(job):
+    """Apply a bulk product update in chunks, reporting progress after each one"""
+    product_ids = job.params.get('product_ids', [])
+    updates = job.params.get('updates', {})
+    
+    job.set_total(len(product_ids))
+    updated = 0
+    for start in range(0, len(product_ids), BULK_UPDATE_CHUNK_SIZE):
+        chunk = product_ids[start:start + BULK_UPDATE_CHUNK_SIZE]
+        products = Product.query.filter(Product.product_id.in_(chunk)).all()
+        before = product_snapshot(products)
+        
+        for product in products:
+            for key, value in updates.items():
+                if hasattr(product, key):
+                    setattr(product, key, value)
+        
+        updated += len(products)
+        changed_ids = [product.product_id for product in products]
+        db.session.flush()
+        record_product_changes(before, product_snapshot(products))
+        mark_catalog_changed('product', changed_ids)
+        job.report(start + len(chunk))
+        notify_catalog_changed('product', changed_ids, fields=[key for key in updates if hasattr(Product, key)])
+    
+    return {'updated': updated}
+
 @admin_bp.route('/products/bulk-update', methods=['POST'])
+@idempotent
 def bulk_update_products():
-    """Bulk update products"""
+    """Queue a bulk product update as a background job"""
     try:
         data = request.get_json()
         product_ids = data.get('product_ids', [])
@@ -238,23 +348,145 @@ def bulk_update_products():
                 'message': 'Product IDs are required'
             }), 400
         
-        products = Product.query.filter(Product.id.in_(product_ids)).all()
+        job = enqueue('bulk_update_products', {
+            'product_ids': product_ids,
+            'updates': updates
+        })
         
-        for product in products:
-            for key, value in updates.items():
-                if hasattr(product, key):
-                    setattr(product, key, value)
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': f'Bulk update of {len(product_ids)} products queued'
+        }), 202, {'Location': f'/api/admin/jobs/{job.id}'}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error bulk updating products: {str(e)}'
+        }), 500
+
+@admin_bp.route('/similar-products/rebuild', methods=['POST'])
+def rebuild_similar_products():
+    """Queue a full rebuild of the similar products index"""
+    try:
+        job = enqueue('rebuild_similar_products')
         
-        db.session.commit()
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': 'Similar products rebuild queued'
+        }), 202, {'Location': f'/api/admin/jobs/{job.id}'}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error queueing similar products rebuild: {str(e)}'
+        }), 500
+
+@admin_bp.route('/orders/archive', methods=['POST'])
+def archive_orders():
+    """Queue archival of old completed and cancelled orders"""
+    try:
+        data = request.get_json(silent=True) or {}
+        params = {
+            'older_than_days': data.get('older_than_days', 90),
+            'batch_size': data.get('batch_size', 500),
+            'duty_cycle': data.get('duty_cycle', 0.25)
+        }
+        
+        if not isinstance(params['older_than_days'], int) or params['older_than_days'] < 1:
+            return jsonify({
+                'success': False,
+                'message': 'older_than_days must be a positive integer'
+            }), 400
+        if not isinstance(params['batch_size'], int) or not 1 <= params['batch_size'] <= 5000:
+            return jsonify({
+                'success': False,
+                'message': 'batch_size must be between 1 and 5000'
+            }), 400
+        if not isinstance(params['duty_cycle'], (int, float)) or not 0 < params['duty_cycle'] <= 1:
+            return jsonify({
+                'success': False,
+                'message': 'duty_cycle must be greater than 0 and at most 1'
+            }), 400
+        
+        job = enqueue('archive_orders', params)
         
         return jsonify({
             'success': True,
-            'message': f'Successfully updated {len(products)} products'
-        })
+            'data': job.to_dict(),
+            'message': 'Order archival queued'
+        }), 202, {'Location': f'/api/admin/jobs/{job.id}'}
     except Exception as e:
         db.session.rollback()
         return jsonify({
             'success': False,
-            'message': f'Error bulk updating products: {str(e)}'
+            'message': f'Error queueing order archival: {str(e)}'
         }), 500
 
+# Background Jobs
+@admin_bp.route('/jobs', methods=['GET'])
+def get_jobs():
+    """Get recent background jobs"""
+    try:
+        status = request.args.get('status')
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        
+        query = Job.query
+        if status:
+            query = query.filter_by(status=status)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            'success': True,
+            'data': [job.to_dict() for job in jobs],
+            'message': 'Jobs retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving jobs: {str(e)}'
+        }), 500
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and progress of a background job"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': 'Job retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving job: {str(e)}'
+        }), 500
+
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued job or ask a running job to stop"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        
+        if job.status not in ('queued', 'running'):
+            return jsonify({
+                'success': False,
+                'message': f'Job is already {job.status}'
+            }), 400
+        
+        request_cancel(job)
+        db.session.refresh(job)
+        
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': 'Job cancellation requested'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error cancelling job: {str(e)}'
+        }), 500
@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.services.subrequests import SubrequestError, parse_subrequest, run_subrequests
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('/batch', methods=['POST'])
+def run_batch():
+    """Run several GET requests of the API in one round trip.
+
+    The body is {"requests": [...], "parallel": false}; each request is a path
+    such as "/api/products?page=2" or an object with path, optional query
+    parameters and an id echoed back. Every result has its own status and body.
+    Views that check credentials see the batch request's headers, so a
+    sub-request gets the same answer as the direct call.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'message': 'Body must be a JSON object'
+            }), 400
+
+        items = data.get('requests')
+        max_requests = current_app.config['BATCH_MAX_REQUESTS']
+
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'message': 'requests must be a non-empty list'
+            }), 400
+
+        if len(items) > max_requests:
+            return jsonify({
+                'success': False,
+                'message': f'At most {max_requests} requests per batch'
+            }), 400
+
+        try:
+            parsed = [parse_subrequest(item) for item in items]
+        except SubrequestError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        workers = current_app.config['BATCH_WORKERS'] if data.get('parallel') else 0
+        results = run_subrequests(current_app._get_current_object(), request, parsed, workers)
+
+        return jsonify({
+            'success': True,
+            'data': results,
+            'message': 'Batch completed'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error running batch: {str(e)}'
+        }), 500
@@ -2,10 +2,14 @@ from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.category import Category
 from src.models.platform import Platform
+from src.services.catalog_signals import mark_catalog_changed, notify_catalog_changed
+from src.services.write_queue import run_write
+from src.services.coalescing import coalesce
 
 categories_bp = Blueprint('categories', __name__)
 
 @categories_bp.route('/categories', methods=['GET'])
+@coalesce
 def get_categories():
     """Get all categories"""
     try:
@@ -27,6 +31,7 @@ def get_categories():
         }), 500
 
 @categories_bp.route('/categories/<int:category_id>', methods=['GET'])
+@coalesce
 def get_category(category_id):
     """Get a specific category by ID"""
     try:
@@ -69,7 +74,10 @@ def create_category():
         )
         
         db.session.add(category)
+        db.session.flush()
+        mark_catalog_changed('category', [category.category_id])
         db.session.commit()
+        notify_catalog_changed('category', [category.category_id])
         
         return jsonify({
             'success': True,
@@ -87,7 +95,7 @@ def create_category():
 def update_category(category_id):
     """Update a category"""
     try:
-        category = Category.query.filter_by(category_id=category_id).first_or_404()
+        Category.query.filter_by(category_id=category_id).first_or_404()
         data = request.get_json()
         
         # Validate platform exists if provided
@@ -99,17 +107,25 @@ def update_category(category_id):
                     'message': 'Platform not found'
                 }), 400
         
-        # Update fields
-        if 'platform_id' in data:
-            category.platform_id = data['platform_id']
-        if 'category_name' in data:
-            category.category_name = data['category_name']
+        def write():
+            category = db.session.get(Category, category_id)
+            
+            # Update fields
+            if 'platform_id' in data:
+                category.platform_id = data['platform_id']
+            if 'category_name' in data:
+                category.category_name = data['category_name']
+            
+            mark_catalog_changed('category', [category_id])
+            db.session.flush()
+            return category.to_dict_legacy()
         
-        db.session.commit()
+        category_data = run_write(write)
+        notify_catalog_changed('category', [category_id])
         
         return jsonify({
             'success': True,
-            'data': category.to_dict_legacy(),
+            'data': category_data,
             'message': 'Category updated successfully'
         })
     except Exception as e:
@@ -133,7 +149,9 @@ def delete_category(category_id):
             }), 400
         
         db.session.delete(category)
+        mark_catalog_changed('category', [category_id], deleted=True)
         db.session.commit()
+        notify_catalog_changed('category', [category_id], deleted=True)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from src.services.catalog_changes import ChangesPruned, read_changes
+
+changes_bp = Blueprint('changes', __name__)
+
+# Largest number of change log rows read per request
+MAX_CHANGES = 1000
+
+@changes_bp.route('/changes', methods=['GET'])
+def get_changes():
+    """Get catalog rows changed since a change sequence, with tombstones for deletes"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = min(max(request.args.get('limit', 500, type=int), 1), MAX_CHANGES)
+
+        if since < 0:
+            return jsonify({
+                'success': False,
+                'message': 'since must not be negative'
+            }), 400
+
+        try:
+            result = read_changes(since, limit)
+        except ChangesPruned as e:
+            return jsonify({
+                'success': False,
+                'pruned_seq': e.pruned_seq,
+                'current_seq': e.current_seq,
+                'message': f'{str(e)}; reload the catalog and continue from since={e.current_seq}'
+            }), 410
+
+        return jsonify({
+            'success': True,
+            'data': result['changes'],
+            'next_since': result['next_since'],
+            'has_more': result['has_more']
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving changes: {str(e)}'
+        }), 500
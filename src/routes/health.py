@@ -0,0 +1,28 @@
+from flask import Blueprint, jsonify
+from src.services.warmup import is_ready, warmup_status
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz/live', methods=['GET'])
+def live():
+    """Report that the worker process is up"""
+    return jsonify({
+        'success': True,
+        'message': 'Alive'
+    })
+
+@health_bp.route('/healthz/ready', methods=['GET'])
+def ready():
+    """Report ready only once warm-up has finished, so the load balancer holds traffic until then"""
+    if not is_ready():
+        return jsonify({
+            'success': False,
+            'data': warmup_status(),
+            'message': 'Warming up'
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'data': warmup_status(),
+        'message': 'Ready'
+    })
@@ -0,0 +1,93 @@
+from flask import Blueprint, request, jsonify, Response, current_app
+from src.services.catalog_signals import catalog_head
+from src.services.live_updates import (
+    RESYNC, Subscriber, format_event, load_product_changes, stock_broadcaster
+)
+
+live_bp = Blueprint('live', __name__)
+
+def _parse_id_list(raw_ids, name):
+    try:
+        return [int(part) for part in raw_ids.split(',') if part.strip()] if raw_ids else []
+    except ValueError:
+        raise ValueError(f'{name} must be a comma separated list of integers')
+
+def _stream(subscriber, seq, replay, heartbeat):
+    yield 'retry: 5000\n\n'
+    if replay is None:
+        yield format_event('ready', {'seq': seq}, seq)
+    elif replay is RESYNC:
+        yield format_event('resync', {'seq': seq}, seq)
+    else:
+        events, replay_seq = replay
+        events = [event for event in events if subscriber.wants(event)]
+        for event in events:
+            yield format_event('product', event, event['seq'])
+        seq = max(seq, replay_seq)
+        yield format_event('ready', {'seq': seq}, seq)
+
+    while True:
+        batch = subscriber.take(heartbeat)
+        if batch is None:
+            # Keeps proxies from closing the connection and notices clients that went away
+            yield ': heartbeat\n\n'
+        elif batch is RESYNC:
+            yield format_event('resync', {'seq': stock_broadcaster.last_seq})
+        else:
+            for event in batch:
+                yield format_event('product', event, event['seq'])
+
+@live_bp.route('/products/stream', methods=['GET'])
+def stream_product_updates():
+    """Server-Sent Events stream of committed product quantity and price changes.
+
+    Optional platform_id and category_id query parameters (comma separated) limit
+    the products sent. Reconnecting clients resume from their Last-Event-ID.
+    """
+    try:
+        try:
+            platform_ids = _parse_id_list(request.args.get('platform_id'), 'platform_id')
+            category_ids = _parse_id_list(request.args.get('category_id'), 'category_id')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        since = request.headers.get('Last-Event-ID', request.args.get('since'))
+        try:
+            since = int(since) if since not in (None, '') else None
+        except ValueError:
+            since = None
+
+        config = current_app.config
+        if len(stock_broadcaster.subscribers) >= config['LIVE_MAX_SUBSCRIBERS']:
+            return jsonify({
+                'success': False,
+                'message': 'Too many open streams, poll /api/products instead'
+            }), 503, {'Retry-After': '30'}
+
+        subscriber = Subscriber(platform_ids, category_ids, queue_size=config['LIVE_QUEUE_SIZE'])
+        seq = catalog_head()
+        stock_broadcaster.subscribe(current_app._get_current_object(), subscriber, seq)
+
+        replay = None
+        if since is not None and since < seq:
+            replay = load_product_changes(since) or RESYNC
+
+        response = Response(
+            _stream(subscriber, seq, replay, config['LIVE_HEARTBEAT_SECONDS']),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        # Runs when the server finishes with the response, including after a client disconnects
+        response.call_on_close(lambda: stock_broadcaster.unsubscribe(subscriber))
+        return response
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error opening product stream: {str(e)}'
+        }), 500
@@ -0,0 +1,17 @@
+from flask import Blueprint, Response, request, current_app, jsonify
+from src.services.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request, database and cache metrics in Prometheus text format"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type.split(';')[0], headers={'Content-Type': content_type})
@@ -0,0 +1,25 @@
+from flask import Blueprint, request, jsonify, Response
+from src.services.navigation import navigation_cache
+
+navigation_bp = Blueprint('navigation', __name__)
+
+@navigation_bp.route('/navigation', methods=['GET'])
+def get_navigation():
+    """Get the platform, category and subcategory tree with product counts and stock"""
+    try:
+        bundle = navigation_cache.get()
+        headers = {
+            'ETag': f'"{bundle.etag}"',
+            'Cache-Control': 'no-cache',
+            'X-Catalog-Version': str(navigation_cache.version)
+        }
+
+        if request.if_none_match.contains(bundle.etag):
+            return Response(status=304, headers=headers)
+
+        return Response(bundle.body, status=200, headers=headers, mimetype='application/json')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving navigation: {str(e)}'
+        }), 500
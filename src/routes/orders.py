@@ -1,10 +1,56 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, request, jsonify, abort
 from src.models.user import db
 from src.models.order import Order, OrderItem
+from src.models.order_archive import ArchivedOrder
 from src.models.product import Product
+from src.services.rollups import (
+    ROLLUP_MODELS, DIMENSIONS, METRICS,
+    record_order_created, record_order_changed, record_order_deleted
+)
+from src.services.idempotency import idempotent
+from src.services.popularity import record_purchase
+from src.services.pagination import normalize_paging, pagination_info
+from src.services.write_queue import run_write
+from src.services.catalog_signals import STOCK_FIELDS, notify_catalog_changed
+from src.services.reservations import (
+    ReservationError, active_items as active_reservation_items, confirm as confirm_reservation
+)
 
 orders_bp = Blueprint('orders', __name__)
 
+def _orders_with_archive(status, payment_status, user_id, page, per_page):
+    """One page of live and archived orders together, newest first, and the total"""
+    selects = []
+    for model, archived in ((Order, False), (ArchivedOrder, True)):
+        select = db.select(model.id, model.created_at, db.literal(archived).label('archived'))
+        if status:
+            select = select.where(model.status == status)
+        if payment_status:
+            select = select.where(model.payment_status == payment_status)
+        if user_id:
+            select = select.where(model.user_id == user_id)
+        selects.append(select)
+    combined = db.union_all(*selects).subquery()
+    
+    total = db.session.execute(db.select(db.func.count()).select_from(combined)).scalar()
+    rows = db.session.execute(
+        db.select(combined).order_by(combined.c.created_at.desc(), combined.c.id.desc()).offset(
+            (page - 1) * per_page
+        ).limit(per_page)
+    ).all()
+    
+    live_ids = [row.id for row in rows if not row.archived]
+    archived_ids = [row.id for row in rows if row.archived]
+    live = {order.id: order for order in Order.query.filter(Order.id.in_(live_ids))} if live_ids else {}
+    archived = {order.id: order for order in ArchivedOrder.query.filter(
+        ArchivedOrder.id.in_(archived_ids)
+    )} if archived_ids else {}
+    # Archived rows carry archived: true already; live rows get the key too, so every order has it
+    return [
+        dict((archived if row.archived else live)[row.id].to_dict(), archived=bool(row.archived)) for row in rows
+    ], total
+
 @orders_bp.route('/orders', methods=['GET'])
 def get_orders():
     """Get all orders with optional filtering"""
@@ -16,37 +62,45 @@ def get_orders():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        # Build query
-        query = Order.query
-        
-        if status:
-            query = query.filter_by(status=status)
-        if payment_status:
-            query = query.filter_by(payment_status=payment_status)
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        
-        # Order by created_at desc
-        query = query.order_by(Order.created_at.desc())
+        include_archived = request.args.get('include_archived', type=int) == 1
         
-        # Paginate
-        orders = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        orders_data = []
-        for order in orders.items:
-            orders_data.append(order.to_dict())
-        
-        return jsonify({
-            'success': True,
-            'data': orders_data,
-            'pagination': {
+        if include_archived:
+            page, per_page = normalize_paging(page, per_page)
+            orders_data, total = _orders_with_archive(status, payment_status, user_id, page, per_page)
+            pagination = pagination_info(page, per_page, total)
+        else:
+            # Build query
+            query = Order.query
+            
+            if status:
+                query = query.filter_by(status=status)
+            if payment_status:
+                query = query.filter_by(payment_status=payment_status)
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+            
+            # Order by created_at desc
+            query = query.order_by(Order.created_at.desc())
+            
+            # Paginate
+            orders = query.paginate(page=page, per_page=per_page, error_out=False)
+            
+            orders_data = []
+            for order in orders.items:
+                orders_data.append(order.to_dict())
+            pagination = {
                 'page': orders.page,
                 'pages': orders.pages,
                 'per_page': orders.per_page,
                 'total': orders.total,
                 'has_next': orders.has_next,
                 'has_prev': orders.has_prev
-            },
+            }
+        
+        return jsonify({
+            'success': True,
+            'data': orders_data,
+            'pagination': pagination,
             'message': 'Orders retrieved successfully'
         })
     except Exception as e:
@@ -59,7 +113,11 @@ def get_orders():
 def get_order(order_id):
     """Get a specific order by ID"""
     try:
-        order = Order.query.get_or_404(order_id)
+        order = db.session.get(Order, order_id)
+        if order is None and request.args.get('include_archived', type=int) == 1:
+            order = ArchivedOrder.query.filter_by(id=order_id).first()
+        if order is None:
+            abort(404)
         return jsonify({
             'success': True,
             'data': order.to_dict(),
@@ -72,21 +130,34 @@ def get_order(order_id):
         }), 500
 
 @orders_bp.route('/orders', methods=['POST'])
+@idempotent
 def create_order():
     """Create a new order"""
     try:
         data = request.get_json()
         
+        reservation_token = data.get('reservation_token')
+        
         # Validate required fields
-        if not data.get('customer_email') or not data.get('order_items'):
+        if not data.get('customer_email') or not (data.get('order_items') or reservation_token):
             return jsonify({
                 'success': False,
                 'message': 'Customer email and order items are required'
             }), 400
         
+        # A reservation supplies the items it holds
+        if reservation_token:
+            order_items_data = active_reservation_items(reservation_token)
+            if not order_items_data:
+                return jsonify({
+                    'success': False,
+                    'message': 'Reservation not found or expired'
+                }), 409
+        else:
+            order_items_data = data['order_items']
+        
         # Calculate total amount
         total_amount = 0
-        order_items_data = data['order_items']
         
         # Validate products and calculate total
         for item_data in order_items_data:
@@ -98,48 +169,66 @@ def create_order():
                 }), 400
             
             quantity = item_data.get('quantity', 1)
-            unit_price = float(product.price)
+            unit_price = float(product.price_per_pc)
             item_total = unit_price * quantity
             total_amount += item_total
         
-        # Create order
-        order = Order(
-            user_id=data.get('user_id'),
-            customer_email=data['customer_email'],
-            customer_name=data.get('customer_name'),
-            total_amount=total_amount,
-            status=data.get('status', 'pending'),
-            payment_status=data.get('payment_status', 'pending'),
-            payment_method=data.get('payment_method'),
-            notes=data.get('notes')
-        )
-        
-        db.session.add(order)
-        db.session.flush()  # Get order ID
-        
-        # Create order items
-        for item_data in order_items_data:
-            product = Product.query.get(item_data['product_id'])
-            quantity = item_data.get('quantity', 1)
-            unit_price = float(product.price)
-            item_total = unit_price * quantity
-            
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=product.id,
-                quantity=quantity,
-                unit_price=unit_price,
-                total_price=item_total
+        def write():
+            # Create order
+            order = Order(
+                user_id=data.get('user_id'),
+                customer_email=data['customer_email'],
+                customer_name=data.get('customer_name'),
+                total_amount=total_amount,
+                status=data.get('status', 'pending'),
+                payment_status=data.get('payment_status', 'pending'),
+                payment_method=data.get('payment_method'),
+                notes=data.get('notes')
             )
-            db.session.add(order_item)
+            
+            db.session.add(order)
+            db.session.flush()  # Get order ID
+            
+            # Create order items
+            for item_data in order_items_data:
+                product = db.session.get(Product, item_data['product_id'])
+                quantity = item_data.get('quantity', 1)
+                unit_price = float(product.price_per_pc)
+                item_total = unit_price * quantity
+                
+                order_item = OrderItem(
+                    order_id=order.id,
+                    product_id=product.product_id,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    total_price=item_total
+                )
+                db.session.add(order_item)
+            
+            db.session.flush()
+            if reservation_token:
+                confirm_reservation(reservation_token, order.id)
+            record_order_created(order)
+            return order.to_dict()
         
-        db.session.commit()
+        order_data = run_write(write)
+        if reservation_token:
+            notify_catalog_changed('product', sorted({item['product_id'] for item in order_items_data}), fields=STOCK_FIELDS)
+        
+        for order_item in order_data['order_items']:
+            record_purchase(order_item['product_id'], order_item['quantity'])
         
         return jsonify({
             'success': True,
-            'data': order.to_dict(),
+            'data': order_data,
             'message': 'Order created successfully'
         }), 201
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -151,28 +240,37 @@ def create_order():
 def update_order(order_id):
     """Update an order"""
     try:
-        order = Order.query.get_or_404(order_id)
+        Order.query.get_or_404(order_id)
         data = request.get_json()
         
-        # Update fields
-        if 'customer_email' in data:
-            order.customer_email = data['customer_email']
-        if 'customer_name' in data:
-            order.customer_name = data['customer_name']
-        if 'status' in data:
-            order.status = data['status']
-        if 'payment_status' in data:
-            order.payment_status = data['payment_status']
-        if 'payment_method' in data:
-            order.payment_method = data['payment_method']
-        if 'notes' in data:
-            order.notes = data['notes']
+        def write():
+            order = db.session.get(Order, order_id)
+            old_status = order.status
+            old_payment_status = order.payment_status
+            
+            # Update fields
+            if 'customer_email' in data:
+                order.customer_email = data['customer_email']
+            if 'customer_name' in data:
+                order.customer_name = data['customer_name']
+            if 'status' in data:
+                order.status = data['status']
+            if 'payment_status' in data:
+                order.payment_status = data['payment_status']
+            if 'payment_method' in data:
+                order.payment_method = data['payment_method']
+            if 'notes' in data:
+                order.notes = data['notes']
+            
+            record_order_changed(order, old_status, old_payment_status)
+            db.session.flush()
+            return order.to_dict()
         
-        db.session.commit()
+        order_data = run_write(write)
         
         return jsonify({
             'success': True,
-            'data': order.to_dict(),
+            'data': order_data,
             'message': 'Order updated successfully'
         })
     except Exception as e:
@@ -188,6 +286,7 @@ def delete_order(order_id):
     try:
         order = Order.query.get_or_404(order_id)
         
+        record_order_deleted(order)
         db.session.delete(order)
         db.session.commit()
         
@@ -211,6 +310,14 @@ def get_order_stats():
         completed_orders = Order.query.filter_by(status='completed').count()
         total_revenue = db.session.query(db.func.sum(Order.total_amount)).filter_by(payment_status='paid').scalar() or 0
         
+        if request.args.get('include_archived', type=int) == 1:
+            # Only completed and cancelled orders are archived, so none of them are pending
+            total_orders += ArchivedOrder.query.count()
+            completed_orders += ArchivedOrder.query.filter_by(status='completed').count()
+            total_revenue += db.session.query(db.func.sum(ArchivedOrder.total_amount)).filter_by(
+                payment_status='paid'
+            ).scalar() or 0
+        
         return jsonify({
             'success': True,
             'data': {
@@ -227,3 +334,66 @@ def get_order_stats():
             'message': f'Error retrieving order statistics: {str(e)}'
         }), 500
 
+@orders_bp.route('/orders/rollups', methods=['GET'])
+def get_order_rollups():
+    """Get order volume and revenue per hour or day from the rollup tables"""
+    try:
+        granularity = request.args.get('granularity', 'day')
+        dimension = request.args.get('dimension', 'all')
+        dimension_value = request.args.get('value')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        
+        if granularity not in ROLLUP_MODELS:
+            return jsonify({
+                'success': False,
+                'message': 'Granularity must be hour or day'
+            }), 400
+        
+        if dimension not in DIMENSIONS:
+            return jsonify({
+                'success': False,
+                'message': f'Dimension must be one of: {", ".join(DIMENSIONS)}'
+            }), 400
+        
+        try:
+            start = datetime.fromisoformat(start) if start else None
+            end = datetime.fromisoformat(end) if end else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Start and end must be ISO 8601 dates'
+            }), 400
+        
+        model = ROLLUP_MODELS[granularity]
+        query = model.query.filter_by(dimension=dimension)
+        if dimension_value is not None:
+            query = query.filter_by(dimension_value=dimension_value)
+        if start:
+            query = query.filter(model.bucket_start >= start)
+        if end:
+            query = query.filter(model.bucket_start < end)
+        
+        rows = query.order_by(model.bucket_start, model.dimension_value).all()
+        
+        totals = dict.fromkeys(METRICS, 0)
+        for row in rows:
+            row_data = row.to_dict()
+            for metric in METRICS:
+                totals[metric] += row_data[metric]
+        totals['gross_amount'] = round(totals['gross_amount'], 2)
+        totals['revenue'] = round(totals['revenue'], 2)
+        
+        return jsonify({
+            'success': True,
+            'data': [row.to_dict() for row in rows],
+            'totals': totals,
+            'granularity': granularity,
+            'dimension': dimension,
+            'message': 'Order rollups retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving order rollups: {str(e)}'
+        }), 500
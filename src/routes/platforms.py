@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.platform import Platform
+from src.services.catalog_signals import mark_catalog_changed, notify_catalog_changed
+from src.services.write_queue import run_write
+from src.services.coalescing import coalesce
 
 platforms_bp = Blueprint('platforms', __name__)
 
 @platforms_bp.route('/platforms', methods=['GET'])
+@coalesce
 def get_platforms():
     """Get all platforms"""
     try:
@@ -26,6 +30,7 @@ def get_platforms():
         }), 500
 
 @platforms_bp.route('/platforms/<int:platform_id>', methods=['GET'])
+@coalesce
 def get_platform(platform_id):
     """Get a specific platform by ID"""
     try:
@@ -59,7 +64,10 @@ def create_platform():
         )
         
         db.session.add(platform)
+        db.session.flush()
+        mark_catalog_changed('platform', [platform.platform_id])
         db.session.commit()
+        notify_catalog_changed('platform', [platform.platform_id])
         
         return jsonify({
             'success': True,
@@ -77,18 +85,26 @@ def create_platform():
 def update_platform(platform_id):
     """Update a platform"""
     try:
-        platform = Platform.query.filter_by(platform_id=platform_id).first_or_404()
+        Platform.query.filter_by(platform_id=platform_id).first_or_404()
         data = request.get_json()
         
-        # Update fields
-        if 'platform_name' in data:
-            platform.platform_name = data['platform_name']
+        def write():
+            platform = db.session.get(Platform, platform_id)
+            
+            # Update fields
+            if 'platform_name' in data:
+                platform.platform_name = data['platform_name']
+            
+            mark_catalog_changed('platform', [platform_id])
+            db.session.flush()
+            return platform.to_dict()
         
-        db.session.commit()
+        platform_data = run_write(write)
+        notify_catalog_changed('platform', [platform_id])
         
         return jsonify({
             'success': True,
-            'data': platform.to_dict(),
+            'data': platform_data,
             'message': 'Platform updated successfully'
         })
     except Exception as e:
@@ -112,7 +128,9 @@ def delete_platform(platform_id):
             }), 400
         
         db.session.delete(platform)
+        mark_catalog_changed('platform', [platform_id], deleted=True)
         db.session.commit()
+        notify_catalog_changed('platform', [platform_id], deleted=True)
         
         return jsonify({
             'success': True,
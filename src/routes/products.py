@@ -1,12 +1,79 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload
 from src.models.user import db
 from src.models.product import Product
 from src.models.category import Category
 from src.models.vendor import Vendor
+from src.services.idempotency import idempotent
+from src.services.suggest import suggest_index, SUGGEST_KINDS
+from src.models.similarity import ProductSimilarity
+from src.services.similarity import TOP_K as MAX_SIMILAR
+from src.services.catalog_signals import mark_catalog_changed, notify_catalog_changed
+from src.services.coalescing import coalesce
+from src.services.popularity import counts_product_view
+from src.models.popularity import ProductPopularity
+from src.services.catalog_engine import catalog_engine, engine_enabled
+from src.services.pagination import normalize_paging, pagination_info
+from src.services.product_query import product_listing
+from src.services.write_queue import run_write
+from src.services.vendor_stats import product_snapshot, record_product_changes
+from src.services.reservations import held_units, available_quantity
 
 products_bp = Blueprint('products', __name__)
 
+# Upper bound on ids accepted by a single batch lookup
+MAX_BATCH_IDS = 500
+
+# Upper bound on suggestions returned per kind
+MAX_SUGGESTIONS = 20
+
+PRODUCT_SORTS = ('newest', 'popular')
+
+# Columns a product update may change
+PRODUCT_FIELDS = ('category_id', 'vendor_id', 'name', 'quantity', 'price_per_pc')
+
+def _parse_batch_ids(raw_ids):
+    """Normalize ids from a comma separated string or a list, dropping duplicates"""
+    if isinstance(raw_ids, str):
+        raw_ids = [part for part in raw_ids.split(',') if part.strip()]
+    if not isinstance(raw_ids, list):
+        raise ValueError('ids must be a list or a comma separated string')
+
+    ids = []
+    seen = set()
+    for raw_id in raw_ids:
+        try:
+            product_id = int(str(raw_id).strip())
+        except ValueError:
+            raise ValueError(f'Invalid product ID: {raw_id}')
+        if product_id not in seen:
+            seen.add(product_id)
+            ids.append(product_id)
+    return ids
+
+def _popular_page(statements, params, page, per_page):
+    """One page of a filtered product listing ranked by popularity score.
+
+    Products with counters are read in score index order; products never
+    viewed or bought have no counter row and follow, newest first.
+    """
+    offset = (page - 1) * per_page
+    ranked_total = db.session.execute(statements.ranked_count, params).scalar()
+    total = db.session.execute(statements.count, params).scalar()
+
+    items = []
+    if offset < ranked_total:
+        items = db.session.execute(
+            statements.ranked_page, {**params, 'limit': per_page, 'offset': offset}
+        ).scalars().all()
+    if len(items) < per_page and total > ranked_total:
+        items += db.session.execute(statements.unranked_page, {
+            **params, 'limit': per_page - len(items), 'offset': max(offset - ranked_total, 0)
+        }).scalars().all()
+    return items, total
+
 @products_bp.route('/products', methods=['GET'])
+@coalesce
 def get_products():
     """Get all products with optional filtering"""
     try:
@@ -24,87 +91,65 @@ def get_products():
         category_name = request.args.get('category', type=str)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
+        sort = request.args.get('sort', 'newest', type=str)
         
-        # Build query with joins for filtering
-        from src.models.platform import Platform
-        query = Product.query.join(Category).join(Vendor).join(Platform, Category.platform_id == Platform.platform_id)
-        
-        # Apply filters
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-        
-        if platform_id:
-            query = query.filter(Category.platform_id == platform_id)
-        
-        if vendor_id:
-            query = query.filter(Product.vendor_id == vendor_id)
-        
-        if min_price is not None:
-            query = query.filter(Product.price_per_pc >= min_price)
-        
-        if max_price is not None:
-            query = query.filter(Product.price_per_pc <= max_price)
-        
-
-        if min_quantity is not None:
-            query = query.filter(Product.quantity >= min_quantity)
-        
-        if max_quantity is not None:
-            query = query.filter(Product.quantity <= max_quantity)
-        
-        if vendor_name:
-            query = query.filter(Vendor.vendor_name == vendor_name)
-        if platform_name:
-            query = query.filter(Platform.platform_name == platform_name)
-        
-        # Handle category name filtering
-        if category_name:
-            query = query.filter(Category.category_name == category_name)
-        
-        if keyword:
-            # Search in product name and vendor name
-            keyword_filter = f"%{keyword}%"
-            query = query.filter(
-                db.or_(
-                    Product.name.ilike(keyword_filter),
-                    Vendor.vendor_name.ilike(keyword_filter)
-                )
-            )
+        if sort not in PRODUCT_SORTS:
+            return jsonify({
+                'success': False,
+                'message': f'sort must be one of: {", ".join(PRODUCT_SORTS)}'
+            }), 400
         
-        # Order by product_id for consistency
-        query = query.order_by(Product.product_id.desc())
+        filters = {
+            'category_id': category_id,
+            'platform_id': platform_id,
+            'vendor_id': vendor_id,
+            'vendor': vendor_name,
+            'platform': platform_name,
+            'category': category_name,
+            'min_price': min_price,
+            'max_price': max_price,
+            'min_quantity': min_quantity,
+            'max_quantity': max_quantity,
+            'keyword': keyword
+        }
         
-        # Paginate
-        products = query.paginate(page=page, per_page=per_page, error_out=False)
+        result = None
+        if engine_enabled() and sort == 'newest':
+            page, per_page = normalize_paging(page, per_page)
+            result = catalog_engine.query(filters, page, per_page)
         
-        products_data = []
-        for product in products.items:
-            products_data.append(product.to_dict_legacy())
+        if result is not None:
+            # Columnar engine: only the page's rows are loaded
+            page_ids, total = result
+            rows = Product.query.options(
+                joinedload(Product.category).joinedload(Category.platform),
+                joinedload(Product.vendor)
+            ).filter(Product.product_id.in_(page_ids)).all() if page_ids else []
+            by_id = {product.product_id: product for product in rows}
+            held = held_units(by_id)
+            products_data = [
+                by_id[product_id].to_dict_legacy(held.get(product_id)) for product_id in page_ids if product_id in by_id
+            ]
+            pagination = pagination_info(page, per_page, total)
+        else:
+            statements, params = product_listing(filters)
+            page, per_page = normalize_paging(page, per_page)
+            if sort == 'popular':
+                items, total = _popular_page(statements, params, page, per_page)
+            else:
+                total = db.session.execute(statements.count, params).scalar()
+                items = db.session.execute(
+                    statements.page, {**params, 'limit': per_page, 'offset': (page - 1) * per_page}
+                ).scalars().all()
+            held = held_units(product.product_id for product in items)
+            products_data = [product.to_dict_legacy(held.get(product.product_id)) for product in items]
+            pagination = pagination_info(page, per_page, total)
         
         return jsonify({
             'success': True,
             'data': products_data,
-            'pagination': {
-                'page': products.page,
-                'pages': products.pages,
-                'per_page': products.per_page,
-                'total': products.total,
-                'has_next': products.has_next,
-                'has_prev': products.has_prev
-            },
-            'filters_applied': {
-                'category_id': category_id,
-                'platform_id': platform_id,
-                'vendor_id': vendor_id,
-                'vendor': vendor_name,
-                'platform': platform_name,
-                'category': category_name,
-                'min_price': min_price,
-                'max_price': max_price,
-                'min_quantity': min_quantity,
-                'max_quantity': max_quantity,
-                'keyword': keyword
-            },
+            'pagination': pagination,
+            'filters_applied': filters,
             'message': 'Products retrieved successfully'
         })
     except Exception as e:
@@ -114,13 +159,15 @@ def get_products():
         }), 500
 
 @products_bp.route('/products/<int:product_id>', methods=['GET'])
+@counts_product_view
+@coalesce
 def get_product(product_id):
     """Get a specific product by ID"""
     try:
         product = Product.query.filter_by(product_id=product_id).first_or_404()
         return jsonify({
             'success': True,
-            'data': product.to_dict_legacy(),
+            'data': product.to_dict_legacy(held_units([product_id]).get(product_id)),
             'message': 'Product retrieved successfully'
         })
     except Exception as e:
@@ -129,7 +176,155 @@ def get_product(product_id):
             'message': f'Error retrieving product: {str(e)}'
         }), 500
 
+@products_bp.route('/products/batch', methods=['GET', 'POST'])
+@coalesce
+def get_products_batch():
+    """Get several products by ID in one query, keeping the requested order"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True)
+            if data is None:
+                data = {}
+            if not isinstance(data, dict):
+                return jsonify({
+                    'success': False,
+                    'message': 'Body must be a JSON object'
+                }), 400
+            raw_ids = data.get('ids', [])
+        else:
+            raw_ids = request.args.get('ids', '', type=str)
+
+        try:
+            product_ids = _parse_batch_ids(raw_ids)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        if not product_ids:
+            return jsonify({
+                'success': False,
+                'message': 'Product IDs are required'
+            }), 400
+
+        if len(product_ids) > MAX_BATCH_IDS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BATCH_IDS} product IDs can be requested at once'
+            }), 400
+
+        # One IN query with the relationships used by to_dict_legacy() loaded eagerly
+        products = Product.query.options(
+            joinedload(Product.category).joinedload(Category.platform),
+            joinedload(Product.vendor)
+        ).filter(Product.product_id.in_(product_ids)).all()
+
+        products_by_id = {product.product_id: product for product in products}
+        held = held_units(products_by_id)
+        products_data = []
+        missing_ids = []
+        for product_id in product_ids:
+            product = products_by_id.get(product_id)
+            if product:
+                products_data.append(product.to_dict_legacy(held.get(product_id)))
+            else:
+                missing_ids.append(product_id)
+
+        return jsonify({
+            'success': True,
+            'data': products_data,
+            'missing_ids': missing_ids,
+            'message': 'Products retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving products: {str(e)}'
+        }), 500
+
+@products_bp.route('/products/suggest', methods=['GET'])
+@coalesce
+def suggest_products():
+    """Typeahead suggestions from the in-memory name index"""
+    try:
+        query = request.args.get('q', '', type=str)
+        limit = min(max(request.args.get('limit', 8, type=int), 1), MAX_SUGGESTIONS)
+        kinds = request.args.get('types', ','.join(SUGGEST_KINDS), type=str).split(',')
+        
+        unknown_kinds = [kind for kind in kinds if kind not in SUGGEST_KINDS]
+        if unknown_kinds:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown suggestion types: {", ".join(unknown_kinds)}'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': suggest_index.suggest(query, limit, kinds),
+            'query': query,
+            'message': 'Suggestions retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving suggestions: {str(e)}'
+        }), 500
+
+@products_bp.route('/products/<int:product_id>/similar', methods=['GET'])
+@coalesce
+def get_similar_products(product_id):
+    """Get similar offers on the same platform from the precomputed neighbour table"""
+    try:
+        limit = min(max(request.args.get('limit', MAX_SIMILAR, type=int), 1), MAX_SIMILAR)
+        cheaper = request.args.get('cheaper', 0, type=int)
+        better_stocked = request.args.get('better_stocked', 0, type=int)
+        
+        neighbours = ProductSimilarity.query.filter_by(product_id=product_id).order_by(
+            ProductSimilarity.score.desc(), ProductSimilarity.similar_product_id
+        ).all()
+        
+        products_data = []
+        if neighbours:
+            product = db.session.get(Product, product_id)
+            products = Product.query.options(
+                joinedload(Product.category).joinedload(Category.platform),
+                joinedload(Product.vendor)
+            ).filter(Product.product_id.in_([row.similar_product_id for row in neighbours])).all()
+            products_by_id = {item.product_id: item for item in products}
+            held = held_units(list(products_by_id) + [product_id])
+            stock = {
+                item.product_id: available_quantity(item.quantity, held.get(item.product_id))
+                for item in products + ([product] if product else [])
+            }
+            
+            for row in neighbours:
+                similar = products_by_id.get(row.similar_product_id)
+                if not similar:
+                    continue
+                if cheaper and product and similar.price_per_pc >= product.price_per_pc:
+                    continue
+                if better_stocked and product and stock[similar.product_id] <= stock[product_id]:
+                    continue
+                similar_data = similar.to_dict_legacy(held.get(similar.product_id))
+                similar_data['similarity'] = round(row.score, 3)
+                products_data.append(similar_data)
+                if len(products_data) >= limit:
+                    break
+        
+        return jsonify({
+            'success': True,
+            'data': products_data,
+            'message': 'Similar products retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving similar products: {str(e)}'
+        }), 500
+
 @products_bp.route('/products', methods=['POST'])
+@idempotent
 def create_product():
     """Create a new product"""
     try:
@@ -170,20 +365,27 @@ def create_product():
                 'message': 'Vendor not found'
             }), 400
         
-        product = Product(
-            category_id=data['category_id'],
-            vendor_id=data['vendor_id'],
-            name=data['name'],
-            quantity=data.get('quantity', 0),
-            price_per_pc=data['price_per_pc']
-        )
+        def write():
+            product = Product(
+                category_id=data['category_id'],
+                vendor_id=data['vendor_id'],
+                name=data['name'],
+                quantity=data.get('quantity', 0),
+                price_per_pc=data['price_per_pc']
+            )
+            
+            db.session.add(product)
+            db.session.flush()
+            record_product_changes({}, product_snapshot([product]))
+            mark_catalog_changed('product', [product.product_id])
+            return product.to_dict_legacy()
         
-        db.session.add(product)
-        db.session.commit()
+        product_data = run_write(write)
+        notify_catalog_changed('product', [product_data['id']])
         
         return jsonify({
             'success': True,
-            'data': product.to_dict_legacy(),
+            'data': product_data,
             'message': 'Product created successfully'
         }), 201
     except Exception as e:
@@ -197,7 +399,7 @@ def create_product():
 def update_product(product_id):
     """Update a product"""
     try:
-        product = Product.query.filter_by(product_id=product_id).first_or_404()
+        Product.query.filter_by(product_id=product_id).first_or_404()
         data = request.get_json()
         
         # Validate category exists if provided
@@ -218,23 +420,33 @@ def update_product(product_id):
                     'message': 'Vendor not found'
                 }), 400
         
-        # Update fields
-        if 'category_id' in data:
-            product.category_id = data['category_id']
-        if 'vendor_id' in data:
-            product.vendor_id = data['vendor_id']
-        if 'name' in data:
-            product.name = data['name']
-        if 'quantity' in data:
-            product.quantity = data['quantity']
-        if 'price_per_pc' in data:
-            product.price_per_pc = data['price_per_pc']
+        def write():
+            product = db.session.get(Product, product_id)
+            before = product_snapshot([product])
+            
+            # Update fields
+            if 'category_id' in data:
+                product.category_id = data['category_id']
+            if 'vendor_id' in data:
+                product.vendor_id = data['vendor_id']
+            if 'name' in data:
+                product.name = data['name']
+            if 'quantity' in data:
+                product.quantity = data['quantity']
+            if 'price_per_pc' in data:
+                product.price_per_pc = data['price_per_pc']
+            
+            db.session.flush()
+            record_product_changes(before, product_snapshot([product]))
+            mark_catalog_changed('product', [product_id])
+            return product.to_dict_legacy(held_units([product_id]).get(product_id))
         
-        db.session.commit()
+        product_data = run_write(write)
+        notify_catalog_changed('product', [product_id], fields=[field for field in PRODUCT_FIELDS if field in data])
         
         return jsonify({
             'success': True,
-            'data': product.to_dict_legacy(),
+            'data': product_data,
             'message': 'Product updated successfully'
         })
     except Exception as e:
@@ -250,8 +462,12 @@ def delete_product(product_id):
     try:
         product = Product.query.filter_by(product_id=product_id).first_or_404()
         
+        record_product_changes(product_snapshot([product]), {})
         db.session.delete(product)
+        ProductPopularity.query.filter_by(product_id=product_id).delete(synchronize_session=False)
+        mark_catalog_changed('product', [product_id], deleted=True)
         db.session.commit()
+        notify_catalog_changed('product', [product_id], deleted=True)
         
         return jsonify({
             'success': True,
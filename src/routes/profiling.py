@@ -0,0 +1,228 @@
+import os
+import time
+from functools import wraps
+from flask import Blueprint, Response, request, jsonify, current_app
+from src.services.profiler import (
+    ProfilerBusy, sample_stacks, collapsed_text, function_totals, start_memory_tracing, stop_memory_tracing,
+    memory_top, save_memory_baseline, memory_diff, get_request_profile, list_request_profiles,
+    request_profile_text, request_profile_functions
+)
+
+profiling_bp = Blueprint('profiling', __name__)
+
+# Upper bounds on a CPU profile's length and on rows returned by the JSON views
+MAX_PROFILE_SECONDS = 60
+MAX_ROWS = 200
+
+MEMORY_GROUPINGS = ('lineno', 'filename', 'traceback')
+PROFILE_SORTS = ('cumulative', 'tottime', 'calls')
+
+def require_profiling_token(view):
+    """Require Authorization: Bearer PROFILING_TOKEN; without the setting the view does not exist.
+
+    A decorator rather than a blueprint hook, so the check also holds where
+    hooks are skipped, such as for POST /api/batch sub-requests.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('PROFILING_TOKEN')
+        if not token:
+            return jsonify({
+                'success': False,
+                'message': 'Not found'
+            }), 404
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify({
+                'success': False,
+                'message': 'Unauthorized'
+            }), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def _limit():
+    return min(max(request.args.get('limit', 30, type=int), 1), MAX_ROWS)
+
+@profiling_bp.route('/profiling/cpu', methods=['GET'])
+@require_profiling_token
+def profile_cpu():
+    """Sample every thread of this worker for ?seconds and return the stacks.
+
+    The default format=collapsed is a file for flamegraph.pl or speedscope;
+    format=json returns the top stacks and functions. Threads waiting on
+    locks, queues or sockets are left out unless idle=true.
+    """
+    try:
+        seconds = min(max(request.args.get('seconds', 10, type=float), 0.1), MAX_PROFILE_SECONDS)
+        interval = min(max(request.args.get('interval_ms', 10, type=float), 1), 1000) / 1000
+        output_format = request.args.get('format', 'collapsed', type=str)
+        include_idle = request.args.get('idle', 'false', type=str).lower() in ('1', 'true', 'yes')
+
+        if output_format not in ('collapsed', 'json'):
+            return jsonify({
+                'success': False,
+                'message': 'format must be collapsed or json'
+            }), 400
+
+        try:
+            stacks, passes = sample_stacks(seconds, interval, include_idle)
+        except ProfilerBusy as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 409
+
+        if output_format == 'collapsed':
+            filename = f'cpu-{os.getpid()}-{int(time.time())}.collapsed'
+            return Response(collapsed_text(stacks), mimetype='text/plain', headers={
+                'Content-Disposition': f'attachment; filename={filename}'
+            })
+
+        limit = _limit()
+        return jsonify({
+            'success': True,
+            'data': {
+                'pid': os.getpid(),
+                'seconds': seconds,
+                'interval_ms': interval * 1000,
+                'passes': passes,
+                'samples': sum(stacks.values()),
+                'functions': function_totals(stacks, limit),
+                'stacks': [{'stack': stack, 'samples': count} for stack, count in stacks.most_common(limit)]
+            },
+            'message': 'CPU profile completed'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error profiling CPU: {str(e)}'
+        }), 500
+
+@profiling_bp.route('/profiling/memory', methods=['POST'])
+@require_profiling_token
+def start_memory_profile():
+    """Start tracing allocations with ?frames frames per traceback"""
+    frames = min(max(request.args.get('frames', 10, type=int), 1), 100)
+    started = start_memory_tracing(frames)
+    return jsonify({
+        'success': True,
+        'data': {'pid': os.getpid(), 'started': started},
+        'message': 'Memory tracing started' if started else 'Memory tracing was already running'
+    })
+
+@profiling_bp.route('/profiling/memory', methods=['DELETE'])
+@require_profiling_token
+def stop_memory_profile():
+    """Stop tracing allocations and drop the saved snapshot"""
+    stop_memory_tracing()
+    return jsonify({
+        'success': True,
+        'message': 'Memory tracing stopped'
+    })
+
+def _memory_grouping():
+    group_by = request.args.get('group_by', 'lineno', type=str)
+    return group_by if group_by in MEMORY_GROUPINGS else None
+
+@profiling_bp.route('/profiling/memory/top', methods=['GET'])
+@require_profiling_token
+def get_memory_top():
+    """Get the allocation sites holding the most memory"""
+    group_by = _memory_grouping()
+    if group_by is None:
+        return jsonify({
+            'success': False,
+            'message': f'group_by must be one of: {", ".join(MEMORY_GROUPINGS)}'
+        }), 400
+
+    top = memory_top(group_by, _limit())
+    if top is None:
+        return jsonify({
+            'success': False,
+            'message': 'Memory tracing is not running; POST /api/admin/profiling/memory first'
+        }), 409
+    return jsonify({
+        'success': True,
+        'data': dict(top, pid=os.getpid()),
+        'message': 'Memory allocation sites retrieved successfully'
+    })
+
+@profiling_bp.route('/profiling/memory/snapshot', methods=['POST'])
+@require_profiling_token
+def save_memory_snapshot():
+    """Save the snapshot later diffs compare against"""
+    traced = save_memory_baseline()
+    if traced is None:
+        return jsonify({
+            'success': False,
+            'message': 'Memory tracing is not running; POST /api/admin/profiling/memory first'
+        }), 409
+    return jsonify({
+        'success': True,
+        'data': {'pid': os.getpid(), 'traced_bytes': traced},
+        'message': 'Memory snapshot saved'
+    })
+
+@profiling_bp.route('/profiling/memory/diff', methods=['GET'])
+@require_profiling_token
+def get_memory_diff():
+    """Get the allocation sites that changed most since the saved snapshot"""
+    group_by = _memory_grouping()
+    if group_by is None:
+        return jsonify({
+            'success': False,
+            'message': f'group_by must be one of: {", ".join(MEMORY_GROUPINGS)}'
+        }), 400
+
+    diff = memory_diff(group_by, _limit())
+    if diff is None:
+        return jsonify({
+            'success': False,
+            'message': 'No memory snapshot saved; POST /api/admin/profiling/memory/snapshot first'
+        }), 409
+    return jsonify({
+        'success': True,
+        'data': dict(diff, pid=os.getpid()),
+        'message': 'Memory diff retrieved successfully'
+    })
+
+@profiling_bp.route('/profiling/requests', methods=['GET'])
+@require_profiling_token
+def get_request_profiles():
+    """List the single-request profiles this worker kept"""
+    return jsonify({
+        'success': True,
+        'data': list_request_profiles(),
+        'message': 'Request profiles retrieved successfully'
+    })
+
+@profiling_bp.route('/profiling/requests/<profile_id>', methods=['GET'])
+@require_profiling_token
+def get_request_profile_view(profile_id):
+    """Get a request profile from an X-Profile-Id header as pstats text or, with format=json, top functions"""
+    profile = get_request_profile(profile_id)
+    if profile is None:
+        return jsonify({
+            'success': False,
+            'message': 'Profile not found in this worker'
+        }), 404
+
+    sort = request.args.get('sort', 'cumulative', type=str)
+    if sort not in PROFILE_SORTS:
+        return jsonify({
+            'success': False,
+            'message': f'sort must be one of: {", ".join(PROFILE_SORTS)}'
+        }), 400
+
+    if request.args.get('format', 'text', type=str) == 'json':
+        return jsonify({
+            'success': True,
+            'data': {
+                'id': profile['id'],
+                'method': profile['method'],
+                'path': profile['path'],
+                'status': profile['status'],
+                'functions': request_profile_functions(profile, sort, _limit())
+            },
+            'message': 'Request profile retrieved successfully'
+        })
+    return Response(request_profile_text(profile, sort, _limit()), mimetype='text/plain')
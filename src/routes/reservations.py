@@ -0,0 +1,139 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.models.user import db
+from src.services.catalog_signals import STOCK_FIELDS, notify_catalog_changed
+from src.services.reservations import (
+    ReservationError, InsufficientStock, reserve, get_reservations, confirm, release
+)
+
+reservations_bp = Blueprint('reservations', __name__)
+
+@reservations_bp.route('/reservations', methods=['POST'])
+def create_reservation():
+    """Hold stock for a checkout for a limited time"""
+    try:
+        data = request.get_json()
+        items = data.get('items')
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'message': 'Items are required'
+            }), 400
+        
+        ttl_seconds = data.get('ttl_seconds', current_app.config['RESERVATION_TTL_SECONDS'])
+        if not isinstance(ttl_seconds, int) or isinstance(ttl_seconds, bool) or ttl_seconds <= 0:
+            return jsonify({
+                'success': False,
+                'message': 'ttl_seconds must be a positive integer'
+            }), 400
+        ttl_seconds = min(ttl_seconds, current_app.config['RESERVATION_MAX_TTL_SECONDS'])
+        
+        try:
+            token = reserve(items, ttl_seconds)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid reservation items: {str(e)}'
+            }), 400
+        except InsufficientStock as e:
+            return jsonify({
+                'success': False,
+                'product_id': e.product_id,
+                'message': str(e)
+            }), 409
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'token': token,
+                'items': [row.to_dict() for row in get_reservations(token)]
+            },
+            'message': 'Reservation created successfully'
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error creating reservation: {str(e)}'
+        }), 500
+
+@reservations_bp.route('/reservations/<token>', methods=['GET'])
+def get_reservation(token):
+    """Get the items and status of a reservation"""
+    try:
+        rows = get_reservations(token)
+        if not rows:
+            return jsonify({
+                'success': False,
+                'message': 'Reservation not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'token': token,
+                'items': [row.to_dict() for row in rows]
+            },
+            'message': 'Reservation retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving reservation: {str(e)}'
+        }), 500
+
+@reservations_bp.route('/reservations/<token>/confirm', methods=['POST'])
+def confirm_reservation(token):
+    """Confirm a reservation once payment succeeded"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        product_ids = confirm(token, data.get('order_id'))
+        db.session.commit()
+        notify_catalog_changed('product', product_ids, fields=STOCK_FIELDS)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'token': token,
+                'items': [row.to_dict() for row in get_reservations(token)]
+            },
+            'message': 'Reservation confirmed successfully'
+        })
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error confirming reservation: {str(e)}'
+        }), 500
+
+@reservations_bp.route('/reservations/<token>', methods=['DELETE'])
+def release_reservation(token):
+    """Release a reservation and return its stock"""
+    try:
+        product_ids = release(token)
+        db.session.commit()
+        notify_catalog_changed('product', product_ids, fields=STOCK_FIELDS)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Reservation released successfully'
+        })
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error releasing reservation: {str(e)}'
+        }), 500
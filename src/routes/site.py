@@ -0,0 +1,25 @@
+from flask import Blueprint, request, jsonify, Response
+from src.services.site_config import site_config_cache
+
+site_bp = Blueprint('site', __name__)
+
+@site_bp.route('/site-config', methods=['GET'])
+def get_site_config():
+    """Get the compiled layout and public settings document"""
+    try:
+        bundle = site_config_cache.get()
+        headers = {
+            'ETag': f'"{bundle.etag}"',
+            'Cache-Control': 'no-cache',
+            'X-Config-Version': str(site_config_cache.version)
+        }
+        
+        if request.if_none_match.contains(bundle.etag):
+            return Response(status=304, headers=headers)
+        
+        return Response(bundle.body, status=200, headers=headers, mimetype='application/json')
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving site config: {str(e)}'
+        }), 500
@@ -1,10 +1,19 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.vendor import Vendor
+from src.services.catalog_signals import mark_catalog_changed, notify_catalog_changed
+from src.services.write_queue import run_write
+from src.services.coalescing import coalesce
+from src.models.vendor_stats import VendorStats
+from src.services.vendor_stats import LEADERBOARD_METRICS, get_vendor_stats
 
 vendors_bp = Blueprint('vendors', __name__)
 
+# Upper bound on vendors returned by the leaderboard
+MAX_LEADERBOARD = 100
+
 @vendors_bp.route('/vendors', methods=['GET'])
+@coalesce
 def get_vendors():
     """Get all vendors"""
     try:
@@ -26,6 +35,7 @@ def get_vendors():
         }), 500
 
 @vendors_bp.route('/vendors/<int:vendor_id>', methods=['GET'])
+@coalesce
 def get_vendor(vendor_id):
     """Get a specific vendor by ID"""
     try:
@@ -41,6 +51,70 @@ def get_vendor(vendor_id):
             'message': f'Error retrieving vendor: {str(e)}'
         }), 500
 
+@vendors_bp.route('/vendors/<int:vendor_id>/stats', methods=['GET'])
+@coalesce
+def get_vendor_stats_view(vendor_id):
+    """Get a vendor's product count, stock, stock value, units sold, revenue and sell-through rate"""
+    try:
+        vendor = Vendor.query.filter_by(vendor_id=vendor_id).first_or_404()
+        stats = get_vendor_stats(vendor_id)
+        stats['vendor_name'] = vendor.vendor_name
+        
+        return jsonify({
+            'success': True,
+            'data': stats,
+            'message': 'Vendor stats retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving vendor stats: {str(e)}'
+        }), 500
+
+@vendors_bp.route('/vendors/leaderboard', methods=['GET'])
+@coalesce
+def get_vendor_leaderboard():
+    """Get the top vendors by one of the vendor stats"""
+    try:
+        metric = request.args.get('metric', 'revenue', type=str)
+        limit = request.args.get('limit', 10, type=int)
+        metrics = LEADERBOARD_METRICS + ('sell_through_rate',)
+        
+        if metric not in metrics:
+            return jsonify({
+                'success': False,
+                'message': f'metric must be one of: {", ".join(metrics)}'
+            }), 400
+        limit = min(max(limit, 1), MAX_LEADERBOARD)
+        
+        if metric == 'sell_through_rate':
+            stocked = VendorStats.units_sold + VendorStats.total_stock
+            ranking = (db.cast(VendorStats.units_sold, db.Float) / db.func.nullif(stocked, 0)).desc().nulls_last()
+        else:
+            ranking = getattr(VendorStats, metric).desc()
+        
+        rows = db.session.query(VendorStats, Vendor.vendor_name).join(
+            Vendor, Vendor.vendor_id == VendorStats.vendor_id
+        ).order_by(ranking, VendorStats.vendor_id).limit(limit).all()
+        
+        leaderboard = []
+        for rank, (stats, vendor_name) in enumerate(rows, start=1):
+            entry = stats.to_dict()
+            entry.update(rank=rank, vendor_name=vendor_name)
+            leaderboard.append(entry)
+        
+        return jsonify({
+            'success': True,
+            'data': leaderboard,
+            'metric': metric,
+            'message': 'Vendor leaderboard retrieved successfully'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error retrieving vendor leaderboard: {str(e)}'
+        }), 500
+
 @vendors_bp.route('/vendors', methods=['POST'])
 def create_vendor():
     """Create a new vendor"""
@@ -60,7 +134,10 @@ def create_vendor():
         )
         
         db.session.add(vendor)
+        db.session.flush()
+        mark_catalog_changed('vendor', [vendor.vendor_id])
         db.session.commit()
+        notify_catalog_changed('vendor', [vendor.vendor_id])
         
         return jsonify({
             'success': True,
@@ -78,20 +155,28 @@ def create_vendor():
 def update_vendor(vendor_id):
     """Update a vendor"""
     try:
-        vendor = Vendor.query.filter_by(vendor_id=vendor_id).first_or_404()
+        Vendor.query.filter_by(vendor_id=vendor_id).first_or_404()
         data = request.get_json()
         
-        # Update fields
-        if 'vendor_name' in data:
-            vendor.vendor_name = data['vendor_name']
-        if 'contact_info' in data:
-            vendor.contact_info = data['contact_info']
+        def write():
+            vendor = db.session.get(Vendor, vendor_id)
+            
+            # Update fields
+            if 'vendor_name' in data:
+                vendor.vendor_name = data['vendor_name']
+            if 'contact_info' in data:
+                vendor.contact_info = data['contact_info']
+            
+            mark_catalog_changed('vendor', [vendor_id])
+            db.session.flush()
+            return vendor.to_dict()
         
-        db.session.commit()
+        vendor_data = run_write(write)
+        notify_catalog_changed('vendor', [vendor_id])
         
         return jsonify({
             'success': True,
-            'data': vendor.to_dict(),
+            'data': vendor_data,
             'message': 'Vendor updated successfully'
         })
     except Exception as e:
@@ -115,7 +200,10 @@ def delete_vendor(vendor_id):
             }), 400
         
         db.session.delete(vendor)
+        VendorStats.query.filter_by(vendor_id=vendor_id).delete(synchronize_session=False)
+        mark_catalog_changed('vendor', [vendor_id], deleted=True)
         db.session.commit()
+        notify_catalog_changed('vendor', [vendor_id], deleted=True)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,124 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from src.models.user import db
+from src.models.order import Order, OrderItem
+from src.models.order_archive import ArchivedOrder, ArchivedOrderItem
+from src.models.reservation import InventoryReservation
+from src.services.jobs import job_handler
+
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+
+_ORDER_COLUMNS = (
+    'id', 'created_at', 'user_id', 'customer_email', 'customer_name', 'total_amount', 'status',
+    'payment_status', 'payment_method', 'notes', 'updated_at'
+)
+_ITEM_COLUMNS = ('id', 'order_id', 'product_id', 'quantity', 'unit_price', 'total_price', 'created_at')
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def ensure_partitions(first, last):
+    """Create the monthly archive partitions covering first..last on PostgreSQL"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    month = _month_start(first)
+    while month <= last:
+        following = _next_month(month)
+        for table in (ArchivedOrder.__tablename__, ArchivedOrderItem.__tablename__):
+            db.session.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {table}_{month:%Y_%m} PARTITION OF {table} '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            ))
+        month = following
+    db.session.commit()
+
+def archive_batch(order_ids):
+    """Move orders and their items to the archive tables in one transaction"""
+    order_table = Order.__table__
+    item_table = OrderItem.__table__
+
+    db.session.execute(ArchivedOrder.__table__.insert().from_select(
+        list(_ORDER_COLUMNS) + ['archived_at'],
+        db.select(*[order_table.c[name] for name in _ORDER_COLUMNS], db.literal(datetime.utcnow())).where(
+            order_table.c.id.in_(order_ids)
+        )
+    ))
+    db.session.execute(ArchivedOrderItem.__table__.insert().from_select(
+        list(_ITEM_COLUMNS) + ['order_created_at'],
+        db.select(*[item_table.c[name] for name in _ITEM_COLUMNS], order_table.c.created_at).join(
+            order_table, item_table.c.order_id == order_table.c.id
+        ).where(item_table.c.order_id.in_(order_ids))
+    ))
+    # Confirmed holds only point at their order; they go with it
+    InventoryReservation.query.filter(InventoryReservation.order_id.in_(order_ids)).delete(synchronize_session=False)
+    OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+    Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+def archive_orders(older_than_days, batch_size=500, duty_cycle=0.25, max_batches=None, job=None, log=None):
+    """Archive completed and cancelled orders created more than older_than_days ago.
+
+    Works through the orders in id order, one short transaction per batch, and
+    sleeps between batches so that it spends at most duty_cycle of the wall
+    clock holding locks on the live tables. Returns the number of orders moved.
+    """
+    if not 0 < duty_cycle <= 1:
+        raise ValueError('duty_cycle must be greater than 0 and at most 1')
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    candidates = Order.query.filter(Order.status.in_(ARCHIVABLE_STATUSES), Order.created_at < cutoff)
+
+    # SQLite hands out max(id) + 1 for new rows, so the newest order always stays
+    # behind to keep archived ids from being reused
+    newest_id = db.session.query(db.func.max(Order.id)).scalar()
+    if newest_id is None:
+        return 0
+    candidates = candidates.filter(Order.id < newest_id)
+
+    oldest = db.session.query(db.func.min(Order.created_at)).filter(
+        Order.status.in_(ARCHIVABLE_STATUSES), Order.created_at < cutoff
+    ).scalar()
+    if oldest is None:
+        return 0
+    ensure_partitions(oldest, cutoff)
+
+    if job:
+        job.set_total(candidates.count())
+
+    moved = 0
+    batches = 0
+    last_id = 0
+    while max_batches is None or batches < max_batches:
+        order_ids = [row[0] for row in candidates.with_entities(Order.id).filter(Order.id > last_id).order_by(
+            Order.id
+        ).limit(batch_size)]
+        if not order_ids:
+            break
+
+        started = time.monotonic()
+        archive_batch(order_ids)
+        elapsed = time.monotonic() - started
+
+        last_id = order_ids[-1]
+        moved += len(order_ids)
+        batches += 1
+        if log:
+            log(f'Archived {moved} orders')
+        if job:
+            job.report(moved)
+        time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    return moved
+
+@job_handler('archive_orders')
+def run_archive_orders(job):
+    params = job.params
+    moved = archive_orders(
+        params.get('older_than_days', 90),
+        batch_size=params.get('batch_size', 500),
+        duty_cycle=params.get('duty_cycle', 0.25),
+        job=job
+    )
+    return {'archived': moved}
@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.cache_version import CacheVersion
+from src.services.metrics import record_cache_access
+
+# Bumps made by this process, so local caches refresh without waiting for a version check
+_local_bumps = {}
+_local_lock = threading.Lock()
+
+def bump_version(name):
+    """Increment a named cache version as part of the caller's transaction and return it.
+
+    Call this before committing the write that invalidates the cache, so the
+    new version becomes visible to other workers together with the data. The
+    UPDATE locks the version row until commit, so concurrent bumps of the same
+    name commit in version order.
+    """
+    updated = CacheVersion.query.filter_by(name=name).update({
+        'version': CacheVersion.version + 1,
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    note_local_bump(name)
+    if not updated:
+        db.session.add(CacheVersion(name=name, version=1))
+        db.session.flush()
+        return 1
+    return get_version(name)
+
+def note_local_bump(name):
+    """Have this process's caches of name refresh once the caller's transaction commits"""
+    db.session.info.setdefault('cache_version_bumps', set()).add(name)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_local_bumps(session):
+    names = session.info.pop('cache_version_bumps', None)
+    if names:
+        with _local_lock:
+            for name in names:
+                _local_bumps[name] = _local_bumps.get(name, 0) + 1
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_local_bumps(session):
+    session.info.pop('cache_version_bumps', None)
+
+def get_local_bumps(name):
+    """Number of committed bumps of name made by this process"""
+    return _local_bumps.get(name, 0)
+
+def get_version(name):
+    return db.session.query(CacheVersion.version).filter_by(name=name).scalar() or 0
+
+class VersionedCache:
+    """Process-wide value rebuilt only when its named version changes.
+
+    Other workers' bumps are noticed by reading the version row, or calling
+    read_version when given, at most once per check_interval seconds; bumps
+    made in this process are seen at once.
+    """
+
+    def __init__(self, name, builder, check_interval=5.0, read_version=None):
+        self.name = name
+        self.builder = builder
+        self.read_version = read_version or (lambda: get_version(name))
+        self.check_interval = check_interval
+        self.version = None
+        self.value = None
+        self.hits = 0
+        self.misses = 0
+        self._local_bumps_seen = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def get(self):
+        """Return the cached value, rebuilding it if the version moved; needs an app context"""
+        now = time.monotonic()
+        local_bumps = _local_bumps.get(self.name, 0)
+        if (self.version is not None and local_bumps == self._local_bumps_seen
+                and now - self._checked_at < self.check_interval):
+            self.hits += 1
+            record_cache_access(self.name, True)
+            return self.value
+
+        with self._lock:
+            version = self.read_version()
+            self._checked_at = now
+            if version != self.version or local_bumps != self._local_bumps_seen:
+                self.value = self.builder()
+                self.version = version
+                self._local_bumps_seen = local_bumps
+                self.misses += 1
+                record_cache_access(self.name, False)
+            else:
+                self.hits += 1
+                record_cache_access(self.name, True)
+            return self.value
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.cache_version import CacheVersion
+from src.models.catalog_change import CatalogChange
+from src.models.product import Product
+from src.models.category import Category
+from src.models.vendor import Vendor
+from src.models.platform import Platform
+from src.services.cache_versions import get_version
+from src.services.catalog_signals import catalog_head, read_change_rows
+
+# Highest change id deleted from catalog_changes; clients behind it must resync
+PRUNED_VERSION = 'catalog_changes_pruned'
+
+class ChangesPruned(Exception):
+    """The requested sequence is older than the retained change log"""
+
+    def __init__(self, pruned_seq, current_seq):
+        super().__init__(f'Changes up to sequence {pruned_seq} are no longer available')
+        self.pruned_seq = pruned_seq
+        self.current_seq = current_seq
+
+def _product_rows(ids):
+    return {row.product_id: {
+        'product_id': row.product_id,
+        'category_id': row.category_id,
+        'vendor_id': row.vendor_id,
+        'name': row.name,
+        'quantity': row.quantity,
+        'price_per_pc': float(row.price_per_pc) if row.price_per_pc else 0.0
+    } for row in db.session.query(
+        Product.product_id, Product.category_id, Product.vendor_id, Product.name,
+        Product.quantity, Product.price_per_pc
+    ).filter(Product.product_id.in_(ids))}
+
+def _category_rows(ids):
+    return {row.category_id: {
+        'category_id': row.category_id,
+        'platform_id': row.platform_id,
+        'category_name': row.category_name
+    } for row in db.session.query(
+        Category.category_id, Category.platform_id, Category.category_name
+    ).filter(Category.category_id.in_(ids))}
+
+def _vendor_rows(ids):
+    return {vendor.vendor_id: vendor.to_dict() for vendor in Vendor.query.filter(Vendor.vendor_id.in_(ids))}
+
+def _platform_rows(ids):
+    return {platform.platform_id: platform.to_dict()
+            for platform in Platform.query.filter(Platform.platform_id.in_(ids))}
+
+# Loads the current state of changed rows, one IN query per entity
+_LOADERS = {
+    'product': _product_rows,
+    'category': _category_rows,
+    'vendor': _vendor_rows,
+    'platform': _platform_rows
+}
+
+def read_changes(since, limit):
+    """Catalog rows changed after change id since, from at most limit change rows.
+
+    Several writes to the same row collapse into its current state, or a
+    tombstone when the row no longer exists. next_since can always be passed
+    back as since.
+    """
+    pruned_seq = get_version(PRUNED_VERSION)
+    if since < pruned_seq:
+        raise ChangesPruned(pruned_seq, catalog_head())
+
+    rows, has_more = read_change_rows(since, limit)
+    next_since = rows[-1].id if rows else since
+
+    latest = {}
+    for row in rows:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row.id
+
+    ids_by_entity = {}
+    for entity, entity_id in latest:
+        ids_by_entity.setdefault(entity, []).append(entity_id)
+    current_rows = {entity: _LOADERS[entity](ids) for entity, ids in ids_by_entity.items() if entity in _LOADERS}
+
+    changes = []
+    for (entity, entity_id), seq in latest.items():
+        data = current_rows.get(entity, {}).get(entity_id)
+        changes.append({
+            'seq': seq,
+            'entity': entity,
+            'id': entity_id,
+            'deleted': data is None,
+            'data': data
+        })
+
+    return {
+        'changes': changes,
+        'next_since': next_since,
+        'has_more': has_more
+    }
+
+def prune_changes(keep_days):
+    """Delete change log rows older than keep_days days, returning how many went.
+
+    The newest row always stays, so SQLite never hands out its id again.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    newest = db.session.query(db.func.max(CatalogChange.id)).scalar()
+    pruned_seq = db.session.query(db.func.max(CatalogChange.id)).filter(
+        CatalogChange.changed_at < cutoff, CatalogChange.id < newest
+    ).scalar() if newest is not None else None
+    if pruned_seq is None:
+        return 0
+
+    deleted = CatalogChange.query.filter(CatalogChange.id <= pruned_seq).delete(synchronize_session=False)
+    updated = CacheVersion.query.filter_by(name=PRUNED_VERSION).update({
+        'version': pruned_seq,
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if not updated:
+        db.session.add(CacheVersion(name=PRUNED_VERSION, version=pruned_seq))
+    db.session.commit()
+    return deleted
@@ -0,0 +1,191 @@
+import threading
+from flask import current_app
+from src.models.user import db
+from src.models.product import Product
+from src.models.category import Category
+from src.models.vendor import Vendor
+from src.models.platform import Platform
+from src.services.catalog_mirror import CatalogMirror
+from src.services.warmup import register_warmup
+
+try:
+    import numpy as np
+except ImportError:  # optional; listings fall back to SQL without it
+    np = None
+
+# Filters the engine evaluates; requests using any other filter go to SQL
+ENGINE_FILTERS = (
+    'category_id', 'platform_id', 'vendor_id', 'min_price', 'max_price',
+    'min_quantity', 'max_quantity', 'vendor', 'platform', 'category'
+)
+
+class CatalogColumns:
+    """Product columns as NumPy arrays ordered by product_id, plus name lookups"""
+
+    def __init__(self, product_ids, category_ids, vendor_ids, prices, quantities):
+        self.product_ids = product_ids
+        self.category_ids = category_ids
+        self.vendor_ids = vendor_ids
+        self.prices = prices
+        self.quantities = quantities
+        self.platform_ids = None
+        self.alive = np.ones(len(product_ids), dtype=bool)
+        self.category_platforms = {}  # category_id -> platform_id
+        self.platforms_by_name = {}   # name -> [platform_id, ...]
+        self.vendors_by_name = {}
+        self.categories_by_name = {}
+        self.lock = threading.Lock()
+
+    def load_names(self):
+        """Reload the small dimension tables; cheap enough to do on every change to them"""
+        self.category_platforms = dict(db.session.query(Category.category_id, Category.platform_id))
+        for attribute, rows in (
+            ('platforms_by_name', db.session.query(Platform.platform_name, Platform.platform_id)),
+            ('vendors_by_name', db.session.query(Vendor.vendor_name, Vendor.vendor_id)),
+            ('categories_by_name', db.session.query(Category.category_name, Category.category_id))
+        ):
+            by_name = {}
+            for name, doc_id in rows:
+                by_name.setdefault(name, []).append(doc_id)
+            setattr(self, attribute, by_name)
+
+    def refresh_platforms(self):
+        size = max(max(self.category_platforms, default=0), int(self.category_ids.max(initial=0))) + 1
+        lookup = np.zeros(size, dtype=np.int32)
+        for category_id, platform_id in self.category_platforms.items():
+            lookup[category_id] = platform_id or 0
+        self.platform_ids = lookup[self.category_ids] if len(self.category_ids) else np.zeros(0, dtype=np.int32)
+
+    def upsert(self, rows):
+        """Update existing products in place and append or insert new ones"""
+        new_rows = []
+        for product_id, category_id, vendor_id, price, quantity in rows:
+            position = np.searchsorted(self.product_ids, product_id)
+            if position < len(self.product_ids) and self.product_ids[position] == product_id:
+                self.category_ids[position] = category_id
+                self.vendor_ids[position] = vendor_id
+                self.prices[position] = price
+                self.quantities[position] = quantity
+                self.platform_ids[position] = self.category_platforms.get(category_id) or 0
+                self.alive[position] = True
+            else:
+                new_rows.append((product_id, category_id, vendor_id, price, quantity))
+        if not new_rows:
+            return
+
+        new_rows.sort()
+        positions = np.searchsorted(self.product_ids, [row[0] for row in new_rows])
+        for attribute, index in (('product_ids', 0), ('category_ids', 1), ('vendor_ids', 2),
+                                 ('prices', 3), ('quantities', 4)):
+            column = getattr(self, attribute)
+            setattr(self, attribute, np.insert(column, positions, [row[index] for row in new_rows]))
+        self.platform_ids = np.insert(self.platform_ids, positions, [
+            self.category_platforms.get(row[1]) or 0 for row in new_rows
+        ])
+        self.alive = np.insert(self.alive, positions, True)
+
+    def remove(self, product_ids):
+        positions = np.searchsorted(self.product_ids, product_ids)
+        positions = positions[positions < len(self.product_ids)]
+        positions = positions[np.isin(self.product_ids[positions], product_ids)]
+        self.alive[positions] = False
+
+    def select(self, filters):
+        """Positions of matching products, highest product_id first"""
+        mask = self.alive.copy()
+        if filters.get('category_id'):
+            mask &= self.category_ids == filters['category_id']
+        if filters.get('platform_id'):
+            mask &= self.platform_ids == filters['platform_id']
+        if filters.get('vendor_id'):
+            mask &= self.vendor_ids == filters['vendor_id']
+        if filters.get('min_price') is not None:
+            mask &= self.prices >= filters['min_price']
+        if filters.get('max_price') is not None:
+            mask &= self.prices <= filters['max_price']
+        if filters.get('min_quantity') is not None:
+            mask &= self.quantities >= filters['min_quantity']
+        if filters.get('max_quantity') is not None:
+            mask &= self.quantities <= filters['max_quantity']
+        for name_filter, column, by_name in (
+            ('vendor', self.vendor_ids, self.vendors_by_name),
+            ('platform', self.platform_ids, self.platforms_by_name),
+            ('category', self.category_ids, self.categories_by_name)
+        ):
+            if filters.get(name_filter):
+                mask &= np.isin(column, by_name.get(filters[name_filter], []))
+        return np.flatnonzero(mask)[::-1]
+
+class CatalogEngine(CatalogMirror):
+    """In-memory columnar evaluation of the product listing filters"""
+
+    def build(self):
+        rows = db.session.query(
+            Product.product_id, Product.category_id, Product.vendor_id, Product.price_per_pc, Product.quantity
+        ).order_by(Product.product_id)
+
+        product_ids, category_ids, vendor_ids, prices, quantities = [], [], [], [], []
+        for product_id, category_id, vendor_id, price, quantity in rows.yield_per(10000):
+            product_ids.append(product_id)
+            category_ids.append(category_id)
+            vendor_ids.append(vendor_id)
+            prices.append(float(price) if price is not None else 0.0)
+            quantities.append(quantity or 0)
+
+        state = CatalogColumns(
+            np.array(product_ids, dtype=np.int64),
+            np.array(category_ids, dtype=np.int32),
+            np.array(vendor_ids, dtype=np.int32),
+            np.array(prices, dtype=np.float64),
+            np.array(quantities, dtype=np.int64)
+        )
+        state.load_names()
+        state.refresh_platforms()
+        return state
+
+    def apply(self, state, kind, ids, deleted):
+        with state.lock:
+            if kind == 'product':
+                if deleted:
+                    state.remove(np.array(ids, dtype=np.int64))
+                    return True
+                rows = db.session.query(
+                    Product.product_id, Product.category_id, Product.vendor_id, Product.price_per_pc, Product.quantity
+                ).filter(Product.product_id.in_(ids)).all()
+                found = {row[0] for row in rows}
+                state.upsert([
+                    (product_id, category_id, vendor_id, float(price) if price is not None else 0.0, quantity or 0)
+                    for product_id, category_id, vendor_id, price, quantity in rows
+                ])
+                missing = [product_id for product_id in ids if product_id not in found]
+                if missing:
+                    state.remove(np.array(missing, dtype=np.int64))
+                return True
+
+            state.load_names()
+            if kind == 'category':
+                # A category may have moved to another platform
+                state.refresh_platforms()
+            return True
+
+    def query(self, filters, page, per_page):
+        """Product ids for one page of a listing and the total match count, or None for SQL"""
+        if any(value is not None and name not in ENGINE_FILTERS for name, value in filters.items()):
+            return None
+        state = self.get()
+        with state.lock:
+            positions = state.select(filters)
+            total = len(positions)
+            start = (page - 1) * per_page
+            page_ids = state.product_ids[positions[start:start + per_page]].tolist()
+        return page_ids, total
+
+catalog_engine = CatalogEngine('catalog-engine')
+
+def engine_enabled():
+    return np is not None and current_app.config['CATALOG_ENGINE'] == 'numpy'
+
+@register_warmup
+def _prime_catalog_engine():
+    if engine_enabled():
+        catalog_engine.get()
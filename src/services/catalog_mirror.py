@@ -0,0 +1,145 @@
+import threading
+import time
+import traceback
+from flask import current_app
+from src.models.user import db
+from src.services.catalog_signals import catalog_changed, catalog_head, read_change_rows
+
+# Mirrors further behind than this many change rows rebuild instead of catching up
+MAX_CATCH_UP_CHANGES = 1000
+
+class CatalogMirror:
+    """Base class for in-memory structures derived from the catalog tables.
+
+    Writes made by this worker arrive through the catalog_changed signal and are
+    applied incrementally with apply(). Writes made by other workers are read
+    from the catalog_changes log, at most once per check_interval seconds, and
+    applied the same way; a mirror that fell too far behind is rebuilt in a
+    background thread while the previous state keeps serving reads.
+
+    Subclasses implement build(), returning a fresh state object, and apply(state,
+    kind, ids, deleted), returning False when a full rebuild is needed instead.
+    """
+
+    def __init__(self, name, check_interval=5.0, max_age=None):
+        self.name = name
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.state = None
+        self.built_at = 0.0
+        self.build_count = 0
+        self.applied_seq = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._pending = []
+        catalog_changed.connect(self._on_catalog_changed)
+
+    def build(self):
+        raise NotImplementedError
+
+    def apply(self, state, kind, ids, deleted):
+        raise NotImplementedError
+
+    def _apply(self, kind, ids, deleted):
+        """Apply a change to the live state, or queue it while a build is running"""
+        with self._lock:
+            if self._building:
+                self._pending.append((kind, ids, deleted))
+                return True
+            if self.state is None:
+                return True
+            try:
+                return self.apply(self.state, kind, ids, deleted)
+            except Exception:
+                traceback.print_exc()
+                return False
+
+    def _on_catalog_changed(self, kind, ids=(), deleted=False, fields=None):
+        if not self._apply(kind, ids, deleted):
+            self.invalidate()
+
+    def invalidate(self):
+        """Force a rebuild on the next read"""
+        self.applied_seq = None
+        self._checked_at = 0.0
+
+    def rebuild(self, wait=True):
+        """Build a new state and swap it in; needs an app context.
+
+        With wait=False the call returns at once when another build is running.
+        """
+        if not self._build_lock.acquire(blocking=wait):
+            return self.state
+        try:
+            with self._lock:
+                self._building = True
+            seq = catalog_head()
+            state = self.build()
+            with self._lock:
+                pending, self._pending = self._pending, []
+                for kind, ids, deleted in pending:
+                    if not self.apply(state, kind, ids, deleted):
+                        seq = None
+                self.state = state
+                self.applied_seq = seq
+                self.built_at = time.monotonic()
+                self.build_count += 1
+            return state
+        finally:
+            with self._lock:
+                self._building = False
+            self._build_lock.release()
+
+    def _catch_up(self):
+        """Apply changes other workers logged since the last check; False means rebuild"""
+        if self.applied_seq is None:
+            return False
+        if self.max_age and time.monotonic() - self.built_at > self.max_age:
+            return False
+
+        changes, has_more = read_change_rows(self.applied_seq, MAX_CATCH_UP_CHANGES)
+        if has_more:
+            return False
+        if not changes:
+            return True
+
+        # Only the last operation on each row matters
+        latest = {}
+        for change in changes:
+            latest.pop((change.entity, change.entity_id), None)
+            latest[(change.entity, change.entity_id)] = change.operation == 'delete'
+        batches = {}
+        for (entity, entity_id), deleted in latest.items():
+            batches.setdefault((entity, deleted), []).append(entity_id)
+        for (entity, deleted), ids in batches.items():
+            if not self._apply(entity, ids, deleted):
+                return False
+
+        self.applied_seq = changes[-1].id
+        return True
+
+    def _rebuild_in_background(self, app):
+        def run():
+            try:
+                with app.app_context():
+                    self.rebuild(wait=False)
+                    db.session.remove()
+            except Exception:
+                traceback.print_exc()
+        threading.Thread(target=run, name=f'{self.name}-rebuild', daemon=True).start()
+
+    def get(self):
+        """Return the current state, building it on first use; needs an app context"""
+        if self.state is None:
+            state = self.rebuild()
+            if state is not None:
+                return state
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and not self._building:
+            self._checked_at = now
+            if not self._catch_up():
+                self._rebuild_in_background(current_app._get_current_object())
+        return self.state
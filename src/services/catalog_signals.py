@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from blinker import Namespace
+from src.models.user import db
+from src.models.catalog_change import CatalogChange
+from src.services.cache_versions import note_local_bump
+
+# Catalog caches of this process and coalesced requests are keyed on this name;
+# across workers the catalog version is the change log head from catalog_head().
+CATALOG_VERSION = 'catalog'
+
+# fields of writes that only move stock: holds, releases and expiries
+STOCK_FIELDS = ('quantity',)
+
+# Change rows are numbered by their autoincrement id, which concurrent transactions
+# can commit out of order. Readers stop before a missing id while the rows after it
+# are younger than this; an older gap is a write that rolled back.
+COMMIT_GRACE_SECONDS = 5.0
+
+# Newest change rows inspected when looking for the head of the log
+HEAD_SCAN_ROWS = 1000
+
+_signals = Namespace()
+
+# Sent after a catalog write commits. The sender is the kind of row that changed
+# (product, category, vendor or platform); keyword arguments are ids, the list of
+# changed primary keys, deleted, True when those rows no longer exist, and fields,
+# the names of the changed columns or None when unknown or the rows are new.
+catalog_changed = _signals.signal('catalog-changed')
+
+def mark_catalog_changed(kind, ids, deleted=False):
+    """Record a catalog write in the change log; call after flushing and before committing it.
+
+    Only inserts, so concurrent writers never wait on each other here.
+    """
+    note_local_bump(CATALOG_VERSION)
+    now = datetime.utcnow()
+    operation = 'delete' if deleted else 'upsert'
+    rows = [{
+        'entity': kind,
+        'entity_id': entity_id,
+        'operation': operation,
+        'changed_at': now
+    } for entity_id in ids]
+    if rows:
+        db.session.execute(CatalogChange.__table__.insert(), rows)
+
+def notify_catalog_changed(kind, ids, deleted=False, fields=None):
+    """Tell in-process subscribers about a committed catalog write"""
+    catalog_changed.send(kind, ids=list(ids), deleted=deleted, fields=None if fields is None else frozenset(fields))
+
+def _committed(rows, since):
+    """The leading rows, in id order, that no uncommitted id can still precede"""
+    cutoff = datetime.utcnow() - timedelta(seconds=COMMIT_GRACE_SECONDS)
+    previous = since
+    for index, row in enumerate(rows):
+        if row.id != previous + 1 and row.changed_at >= cutoff:
+            return rows[:index]
+        previous = row.id
+    return rows
+
+def read_change_rows(since, limit):
+    """Change rows after id since, up to limit of them and the first id that may still commit.
+
+    Returns (rows, has_more); rows have id, entity, entity_id and operation,
+    and has_more is True when over limit rows were ready.
+    """
+    rows = db.session.query(
+        CatalogChange.id, CatalogChange.entity, CatalogChange.entity_id,
+        CatalogChange.operation, CatalogChange.changed_at
+    ).filter(CatalogChange.id > since).order_by(CatalogChange.id).limit(limit + 1).all()
+    committed = _committed(rows, since)
+    if len(committed) > limit:
+        return committed[:limit], True
+    return committed, False
+
+def catalog_head():
+    """Change id a reader starting now is current with; it sees later changes by reading after it"""
+    rows = db.session.query(CatalogChange.id, CatalogChange.changed_at).order_by(
+        CatalogChange.id.desc()
+    ).limit(HEAD_SCAN_ROWS).all()
+    if not rows:
+        return 0
+    rows.reverse()
+    cutoff = datetime.utcnow() - timedelta(seconds=COMMIT_GRACE_SECONDS)
+    # Gaps before the newest settled row are rolled back writes
+    settled = 0
+    for index, row in enumerate(rows):
+        if row.changed_at < cutoff:
+            settled = index
+    recent = _committed(rows[settled + 1:], rows[settled].id)
+    return recent[-1].id if recent else rows[settled].id
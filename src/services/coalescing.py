@@ -0,0 +1,72 @@
+import threading
+from functools import wraps
+from flask import request, current_app, make_response
+from src.services.cache_versions import get_local_bumps
+from src.services.catalog_signals import CATALOG_VERSION
+from src.services.metrics import COALESCED_REQUESTS
+
+class _Flight:
+    """One executing request and the response it will share with identical followers"""
+
+    def __init__(self, catalog_bumps):
+        self.catalog_bumps = catalog_bumps
+        self.done = threading.Event()
+        self.result = None
+
+# In-flight requests of this process keyed by normalized method, path and query
+_flights = {}
+_flights_lock = threading.Lock()
+
+def _request_key():
+    query = tuple(sorted(request.args.items(multi=True)))
+    return (request.method, request.path, query)
+
+def _shared_response(result):
+    body, status, headers = result
+    response = make_response(body, status)
+    response.headers.clear()
+    response.headers.extend(headers)
+    response.headers['X-Coalesced'] = 'true'
+    return response
+
+def coalesce(view):
+    """Let identical concurrent GET requests of this worker share one execution.
+
+    The first request runs the view; requests with the same method, path and
+    query arriving while it runs wait for it and get a copy of its response.
+    Only for views whose response depends on nothing but the URL and the catalog;
+    a flight started before a catalog write committed here is not joined.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or not current_app.config['COALESCE_REQUESTS']:
+            return view(*args, **kwargs)
+
+        key = _request_key()
+        catalog_bumps = get_local_bumps(CATALOG_VERSION)
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None or flight.catalog_bumps != catalog_bumps
+            if leader:
+                flight = _flights[key] = _Flight(catalog_bumps)
+
+        if not leader:
+            if flight.done.wait(current_app.config['COALESCE_WAIT_SECONDS']) and flight.result is not None:
+                COALESCED_REQUESTS.labels(request.endpoint, 'shared').inc()
+                return _shared_response(flight.result)
+            # The leader failed or is too slow; run our own
+            COALESCED_REQUESTS.labels(request.endpoint, 'fallback').inc()
+            return view(*args, **kwargs)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code < 500 and not response.is_streamed:
+                flight.result = (response.get_data(), response.status_code, list(response.headers.items()))
+            COALESCED_REQUESTS.labels(request.endpoint, 'executed').inc()
+            return response
+        finally:
+            with _flights_lock:
+                if _flights.get(key) is flight:
+                    del _flights[key]
+            flight.done.set()
+    return wrapper
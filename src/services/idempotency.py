@@ -0,0 +1,163 @@
+import hashlib
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, current_app, make_response
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Events for requests executing in this process, so local duplicates wake up as soon as they finish
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _request_hash():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('utf-8'))
+    digest.update(request.path.encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()[:32]
+
+def _replay(record):
+    response = make_response(zlib.decompress(record.response_body) if record.response_body else b'', record.response_status)
+    if record.content_type:
+        response.headers['Content-Type'] = record.content_type
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _claim(scope, key, request_hash):
+    """Insert the in-progress marker, returning True if this request should execute"""
+    config = current_app.config
+    now = datetime.utcnow()
+    try:
+        db.session.add(IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            status='in_progress',
+            created_at=now,
+            expires_at=now + timedelta(seconds=config['IDEMPOTENCY_TTL_SECONDS'])
+        ))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+
+    # Drop a marker that expired or whose owner died mid-request, then try once more
+    stale_before = now - timedelta(seconds=config['IDEMPOTENCY_LOCK_SECONDS'])
+    removed = IdempotencyKey.query.filter(
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        db.or_(
+            IdempotencyKey.expires_at <= now,
+            db.and_(IdempotencyKey.status == 'in_progress', IdempotencyKey.created_at <= stale_before)
+        )
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if removed:
+        return _claim(scope, key, request_hash)
+    return False
+
+def _wait_for_result(scope, key):
+    """Wait until the executing duplicate stores its response, or give up after the configured time"""
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_SECONDS']
+    while True:
+        record = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        if record is None or record.status == 'completed':
+            return record
+        db.session.rollback()
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return record
+        with _inflight_lock:
+            event = _inflight.get((scope, key))
+        if event:
+            event.wait(min(remaining, 0.5))
+        else:
+            time.sleep(min(remaining, 0.05))
+
+def idempotent(view):
+    """Execute a write endpoint at most once per Idempotency-Key header value.
+
+    The first request stores its status and body; retries with the same key and
+    body get that stored response back, and concurrent duplicates wait for it.
+    Server errors are not stored, so the client can retry them.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+
+        if len(key) > 255:
+            return jsonify({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'
+            }), 400
+
+        scope = request.endpoint
+        request_hash = _request_hash()
+
+        while not _claim(scope, key, request_hash):
+            record = _wait_for_result(scope, key)
+            if record is None:
+                # The other attempt failed and released the key, so this one may run
+                continue
+            if record.request_hash != request_hash:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} was already used with a different request'
+                }), 422
+            if record.status == 'completed':
+                return _replay(record)
+            return jsonify({
+                'success': False,
+                'message': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'
+            }), 409
+
+        event = threading.Event()
+        with _inflight_lock:
+            _inflight[(scope, key)] = event
+        try:
+            response = make_response(view(*args, **kwargs))
+            db.session.rollback()
+            if response.status_code >= 500:
+                IdempotencyKey.query.filter_by(scope=scope, key=key).delete(synchronize_session=False)
+            else:
+                IdempotencyKey.query.filter_by(scope=scope, key=key).update({
+                    'status': 'completed',
+                    'response_status': response.status_code,
+                    'response_body': zlib.compress(response.get_data()),
+                    'content_type': response.headers.get('Content-Type')
+                }, synchronize_session=False)
+            db.session.commit()
+            return response
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(scope=scope, key=key).delete(synchronize_session=False)
+            db.session.commit()
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop((scope, key), None)
+            event.set()
+
+    return wrapper
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in batches, returning how many were removed"""
+    purged = 0
+    while True:
+        ids = [row[0] for row in db.session.query(IdempotencyKey.id).filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).limit(batch_size).all()]
+        if not ids:
+            return purged
+        IdempotencyKey.query.filter(IdempotencyKey.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(ids)
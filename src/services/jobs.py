@@ -0,0 +1,220 @@
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app
+from src.models.user import db
+from src.models.job import Job
+
+# Registered job handlers keyed by job type
+_handlers = {}
+
+# Set whenever a job is enqueued so idle in-process workers wake up immediately
+_wakeup = threading.Event()
+
+_workers = []
+_stop = threading.Event()
+
+# Running jobs touch updated_at this often; one untouched for STALE_AFTER_SECONDS
+# lost its worker process and is marked failed
+HEARTBEAT_SECONDS = 30
+STALE_AFTER_SECONDS = 120
+
+_stale_checked_at = 0.0
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation of its job has been requested"""
+
+class JobContext:
+    """Handed to job handlers for progress reporting and cancellation checks"""
+
+    def __init__(self, job_id, params):
+        self.job_id = job_id
+        self.params = params or {}
+
+    def set_total(self, total):
+        Job.query.filter_by(id=self.job_id).update({'total': total})
+        db.session.commit()
+
+    def report(self, progress):
+        """Store progress and stop the handler if the job was cancelled.
+
+        This commits the current session, so handlers should call it at the
+        end of a unit of work (for example after each chunk).
+        """
+        Job.query.filter_by(id=self.job_id).update({'progress': progress})
+        db.session.commit()
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        cancel_requested = db.session.query(Job.cancel_requested).filter_by(id=self.job_id).scalar()
+        if cancel_requested:
+            raise JobCancelled()
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type"""
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+def enqueue(job_type, params=None):
+    """Create a queued job and return it; the caller's session is committed"""
+    if job_type not in _handlers:
+        raise ValueError(f'Unknown job type: {job_type}')
+
+    job = Job(job_type=job_type, params=params or {}, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    _wakeup.set()
+    return job
+
+def request_cancel(job):
+    """Cancel a queued job right away or flag a running job for cancellation"""
+    if job.status == 'queued':
+        claimed = Job.query.filter_by(id=job.id, status='queued').update({
+            'status': 'cancelled',
+            'cancel_requested': True,
+            'finished_at': datetime.utcnow()
+        })
+        if claimed:
+            db.session.commit()
+            return
+    if job.status in ('queued', 'running'):
+        Job.query.filter_by(id=job.id).update({'cancel_requested': True})
+        db.session.commit()
+
+def _claim_next_job():
+    """Atomically move the oldest queued job to running, returning its id"""
+    candidate_ids = [row[0] for row in db.session.query(Job.id)
+                     .filter_by(status='queued').order_by(Job.id).limit(5).all()]
+    for job_id in candidate_ids:
+        claimed = Job.query.filter_by(id=job_id, status='queued').update({
+            'status': 'running',
+            'started_at': datetime.utcnow()
+        })
+        db.session.commit()
+        if claimed:
+            return job_id
+    return None
+
+def fail_stale_jobs():
+    """Mark running jobs whose heartbeat stopped as failed, returning how many"""
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_AFTER_SECONDS)
+    stale = (Job.status == 'running', db.or_(Job.updated_at < cutoff, Job.updated_at.is_(None)))
+    if db.session.query(Job.id).filter(*stale).first() is None:
+        return 0
+    failed = Job.query.filter(*stale).update({
+        'status': 'failed',
+        'error': 'The worker running this job stopped',
+        'finished_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    return failed
+
+def _check_stale_jobs():
+    """fail_stale_jobs at most once per heartbeat interval in this process"""
+    global _stale_checked_at
+    now = time.monotonic()
+    if now - _stale_checked_at < HEARTBEAT_SECONDS:
+        return
+    _stale_checked_at = now
+    fail_stale_jobs()
+
+def _heartbeat(app, job_id, done):
+    while not done.wait(HEARTBEAT_SECONDS):
+        try:
+            with app.app_context():
+                Job.query.filter_by(id=job_id, status='running').update({'updated_at': datetime.utcnow()})
+                db.session.commit()
+                db.session.remove()
+        except Exception:
+            traceback.print_exc()
+
+def _finish(job_id, **fields):
+    """Record the outcome of a running job; returns False when it was no longer running"""
+    fields['finished_at'] = datetime.utcnow()
+    # A job failed as stale meanwhile keeps that outcome
+    finished = Job.query.filter_by(id=job_id, status='running').update(fields)
+    db.session.commit()
+    return bool(finished)
+
+def run_job(job_id):
+    """Run one claimed job to completion; must be called inside an app context"""
+    job = db.session.get(Job, job_id)
+    handler = _handlers.get(job.job_type)
+    context = JobContext(job.id, job.params)
+    done = threading.Event()
+    threading.Thread(
+        target=_heartbeat, args=(current_app._get_current_object(), job_id, done),
+        name=f'job-heartbeat-{job_id}', daemon=True
+    ).start()
+
+    try:
+        if handler is None:
+            raise ValueError(f'No handler registered for job type {job.job_type}')
+        result = handler(context)
+        outcome = 'completed'
+        finished = _finish(job_id, status=outcome, result=result)
+    except JobCancelled:
+        db.session.rollback()
+        outcome = 'cancelled'
+        finished = _finish(job_id, status=outcome)
+    except Exception as e:
+        db.session.rollback()
+        traceback.print_exc()
+        outcome = 'failed'
+        finished = _finish(job_id, status=outcome, error=str(e))
+    finally:
+        done.set()
+        db.session.remove()
+    if not finished:
+        print(f'Job {job_id} {outcome} after it was no longer running; its recorded status was kept')
+
+def run_pending(app):
+    """Run queued jobs until the queue is empty, returning how many ran"""
+    ran = 0
+    while True:
+        with app.app_context():
+            _check_stale_jobs()
+            job_id = _claim_next_job()
+            if job_id is None:
+                db.session.remove()
+                return ran
+            run_job(job_id)
+            ran += 1
+
+def _worker_loop(app, poll_interval):
+    while not _stop.is_set():
+        try:
+            run_pending(app)
+        except Exception:
+            traceback.print_exc()
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+
+def start_workers(app, count, poll_interval=2.0):
+    """Start a pool of daemon worker threads processing jobs for this app"""
+    _stop.clear()
+    with app.app_context():
+        failed = fail_stale_jobs()
+        db.session.remove()
+    if failed:
+        print(f'Marked {failed} jobs failed whose worker stopped')
+    for index in range(count):
+        worker = threading.Thread(
+            target=_worker_loop,
+            args=(app, poll_interval),
+            name=f'job-worker-{index}',
+            daemon=True
+        )
+        worker.start()
+        _workers.append(worker)
+    return _workers
+
+def stop_workers(timeout=5.0):
+    _stop.set()
+    _wakeup.set()
+    for worker in _workers:
+        worker.join(timeout)
+    _workers.clear()
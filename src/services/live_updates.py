@@ -0,0 +1,227 @@
+import json
+import queue
+import threading
+import traceback
+from src.models.user import db
+from src.models.product import Product
+from src.models.category import Category
+from src.services.catalog_signals import catalog_changed, catalog_head, read_change_rows
+from src.services.metrics import LIVE_SUBSCRIBERS, LIVE_RESYNCS
+from src.services.reservations import held_units, available_quantity
+
+# Product changes read per poll or replay; a subscriber further behind is told to resync
+MAX_CHANGES_PER_POLL = 5000
+
+# Queued in place of the pending batches of a subscriber that fell behind
+RESYNC = object()
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+def load_product_changes(since, limit=MAX_CHANGES_PER_POLL):
+    """Current quantity, available quantity and price of products changed after change id since.
+
+    Returns (events, seq) where seq is the last change id covered, or None when
+    more than limit change rows are pending. Deleted products come back with
+    deleted set and no stock fields.
+    """
+    rows, has_more = read_change_rows(since, limit)
+    if has_more:
+        return None
+
+    latest = {}
+    for row in rows:
+        if row.entity == 'product':
+            latest.pop(row.entity_id, None)
+            latest[row.entity_id] = row.id
+    if not latest:
+        return [], rows[-1].id if rows else since
+
+    current = {row.product_id: row for row in db.session.query(
+        Product.product_id, Product.quantity, Product.price_per_pc, Product.category_id, Category.platform_id
+    ).outerjoin(Category, Product.category_id == Category.category_id).filter(
+        Product.product_id.in_(list(latest))
+    )}
+
+    held = held_units(current)
+    events = []
+    for product_id, seq in latest.items():
+        row = current.get(product_id)
+        if row is None:
+            events.append({'seq': seq, 'product_id': product_id, 'deleted': True})
+            continue
+        events.append({
+            'seq': seq,
+            'product_id': product_id,
+            'quantity': row.quantity,
+            'available_quantity': available_quantity(row.quantity, held.get(product_id)),
+            'price_per_pc': float(row.price_per_pc) if row.price_per_pc else 0.0,
+            'category_id': row.category_id,
+            'platform_id': row.platform_id
+        })
+    return events, rows[-1].id
+
+class Subscriber:
+    """One open stream: its filters and a bounded queue of event batches"""
+
+    def __init__(self, platform_ids=None, category_ids=None, queue_size=64):
+        self.platform_ids = set(platform_ids) if platform_ids else None
+        self.category_ids = set(category_ids) if category_ids else None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lagging = False
+        self._lock = threading.Lock()
+
+    def wants(self, event):
+        if self.platform_ids is None and self.category_ids is None:
+            return True
+        # Deleted products whose scope is unknown go to everyone
+        if 'category_id' not in event:
+            return True
+        if self.platform_ids is not None and event['platform_id'] in self.platform_ids:
+            return True
+        return self.category_ids is not None and event['category_id'] in self.category_ids
+
+    def offer(self, events):
+        """Queue the matching events without ever blocking the broadcaster"""
+        events = [event for event in events if self.wants(event)]
+        if not events:
+            return
+        with self._lock:
+            if self.lagging:
+                return
+            try:
+                self.queue.put_nowait(events)
+            except queue.Full:
+                self._resync()
+
+    def resync(self):
+        """Replace whatever is pending with a resync marker"""
+        with self._lock:
+            if not self.lagging:
+                self._resync()
+
+    def _resync(self):
+        # A slow client gets one resync marker instead of an unbounded backlog
+        self.lagging = True
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(RESYNC)
+        LIVE_RESYNCS.inc()
+
+    def take(self, timeout):
+        """Next batch, RESYNC, or None when nothing arrived within timeout"""
+        try:
+            item = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is RESYNC:
+            with self._lock:
+                self.lagging = False
+        return item
+
+class StockBroadcaster:
+    """Per-worker fan-out of committed product quantity and price changes.
+
+    A single daemon thread reads new product rows from the catalog change log,
+    so writes from every worker are seen; writes committed by this worker wake
+    it immediately. Each poll is one query for the changes and one for the
+    current rows, however many streams are open.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_seq = None
+        self._sent = {}  # product_id -> last broadcast (quantity, available_quantity, price_per_pc, category_id, platform_id)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._app = None
+        self.poll_interval = 1.0
+        catalog_changed.connect(self._on_catalog_changed)
+
+    def _on_catalog_changed(self, kind, ids=(), deleted=False, fields=None):
+        if kind == 'product' and self.subscribers:
+            self._wakeup.set()
+
+    def subscribe(self, app, subscriber, seq):
+        """Start delivering to subscriber; seq is the change id it is current with"""
+        with self._lock:
+            if self.last_seq is None:
+                self.last_seq = seq
+            self.subscribers.add(subscriber)
+            LIVE_SUBSCRIBERS.inc()
+            if self._thread is None:
+                self._app = app
+                self.poll_interval = app.config['LIVE_POLL_SECONDS']
+                self._thread = threading.Thread(target=self._run, name='stock-broadcaster', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+                LIVE_SUBSCRIBERS.dec()
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self.subscribers)
+
+    def _changed(self, event):
+        """Drop events that repeat what was last broadcast, like a product rename"""
+        if event.get('deleted'):
+            previous = self._sent.pop(event['product_id'], None)
+            if previous:
+                event['category_id'], event['platform_id'] = previous[3], previous[4]
+            return True
+        state = (
+            event['quantity'], event['available_quantity'], event['price_per_pc'],
+            event['category_id'], event['platform_id']
+        )
+        if self._sent.get(event['product_id']) == state:
+            return False
+        self._sent[event['product_id']] = state
+        return True
+
+    def poll(self):
+        """Broadcast changes committed since the last poll; needs an app context"""
+        loaded = load_product_changes(self.last_seq)
+        if loaded is None:
+            self.last_seq = catalog_head()
+            self._sent.clear()
+            for subscriber in self._snapshot():
+                subscriber.resync()
+            return
+
+        events, seq = loaded
+        self.last_seq = seq
+        events = [event for event in events if self._changed(event)]
+        if events:
+            for subscriber in self._snapshot():
+                subscriber.offer(events)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with self._lock:
+                if not self.subscribers:
+                    # Start from the next subscriber's sequence once someone listens again
+                    self.last_seq = None
+                    continue
+            try:
+                with self._app.app_context():
+                    self.poll()
+                    db.session.remove()
+            except Exception:
+                traceback.print_exc()
+
+stock_broadcaster = StockBroadcaster()
@@ -0,0 +1,131 @@
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest,
+    disable_created_metrics
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.models.user import db
+from src.services.warmup import WARMUP_ENVIRON_KEY
+
+# With PROMETHEUS_MULTIPROC_DIR set before start-up, every worker writes its samples
+# to its own files in that directory and a scrape of any worker aggregates them all.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# The *_created series double the exposition size without being useful here
+disable_created_metrics()
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method', 'status'], buckets=REQUEST_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled',
+    multiprocess_mode='livesum'
+)
+DB_QUERIES = Counter(
+    'db_queries_total', 'SQL statements executed',
+    ['operation']
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQL statement execution time',
+    ['operation'], buckets=QUERY_BUCKETS
+)
+DB_POOL_SIZE = Gauge('db_pool_size', 'Configured connection pool size', multiprocess_mode='livesum')
+DB_POOL_CHECKED_OUT = Gauge('db_pool_checked_out', 'Connections currently checked out', multiprocess_mode='livesum')
+DB_POOL_OVERFLOW = Gauge('db_pool_overflow', 'Connections open beyond the pool size', multiprocess_mode='livesum')
+CACHE_REQUESTS = Counter(
+    'app_cache_requests_total', 'In-memory cache lookups; hit ratio is hit / (hit + miss)',
+    ['cache', 'result']
+)
+COALESCED_REQUESTS = Counter(
+    'http_coalesced_requests_total', 'Requests of coalescing views: executed, shared (served from an identical request) or fallback',
+    ['endpoint', 'result']
+)
+LIVE_SUBSCRIBERS = Gauge('live_stream_subscribers', 'Open product update streams', multiprocess_mode='livesum')
+LIVE_RESYNCS = Counter('live_stream_resyncs_total', 'Streams told to resync because they fell behind')
+WRITE_BATCH_SIZE = Histogram(
+    'db_write_batch_size', 'Writes committed together by the write queue',
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+_OPERATIONS = ('select', 'insert', 'update', 'delete')
+
+def record_cache_access(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def _operation(statement):
+    operation = statement.lstrip()[:6].lower()
+    return operation if operation in _OPERATIONS else 'other'
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = _operation(statement)
+    DB_QUERIES.labels(operation).inc()
+    DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+def _update_pool_gauges(engine):
+    pool = engine.pool
+    if hasattr(pool, 'size'):
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+def init_metrics(app):
+    """Record request latency, counts and in-flight requests for every request of app but warm-up ones"""
+
+    @app.before_request
+    def _start_request_timer():
+        if request.environ.get(WARMUP_ENVIRON_KEY):
+            return
+        g.metrics_started = time.perf_counter()
+        g.metrics_in_flight = True
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            labels = (
+                request.blueprint or '',
+                request.endpoint or 'unmatched',
+                request.method,
+                str(response.status_code)
+            )
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        if g.pop('metrics_in_flight', False):
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _update_pool_gauges(db.engine)
+
+def render_metrics():
+    """Return the Prometheus text exposition and its content type"""
+    _update_pool_gauges(db.engine)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from src.models.user import db
+from src.models.platform import Platform
+from src.models.category import Category
+from src.models.subcategory import Subcategory
+from src.models.product import Product
+from src.services.cache_versions import VersionedCache
+from src.services.catalog_signals import CATALOG_VERSION, catalog_head
+
+class NavigationBundle:
+    """Serialized navigation tree with its content-hash ETag"""
+
+    def __init__(self, document):
+        self.document = document
+        self.body = json.dumps({
+            'success': True,
+            'data': document,
+            'message': 'Navigation retrieved successfully'
+        }, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+def build_navigation():
+    """Platforms, their categories and the categories' subcategories with product counts and stock.
+
+    Three queries: platforms outer joined to categories, product counts and
+    stock grouped by category, and all subcategories. Products belong to a
+    category only, so subcategories carry their stored product_count and no stock.
+    """
+    stock = {
+        category_id: (count, int(total or 0))
+        for category_id, count, total in db.session.query(
+            Product.category_id, db.func.count(Product.product_id), db.func.sum(Product.quantity)
+        ).group_by(Product.category_id)
+    }
+
+    subcategories = {}
+    for subcategory in db.session.query(
+        Subcategory.id, Subcategory.category_id, Subcategory.name, Subcategory.icon, Subcategory.product_count
+    ).order_by(Subcategory.category_id, Subcategory.id):
+        subcategories.setdefault(subcategory.category_id, []).append({
+            'id': subcategory.id,
+            'name': subcategory.name,
+            'icon': subcategory.icon,
+            'product_count': subcategory.product_count or 0
+        })
+
+    platforms = []
+    by_platform = {}
+    for platform_id, platform_name, category_id, category_name in db.session.query(
+        Platform.platform_id, Platform.platform_name, Category.category_id, Category.category_name
+    ).outerjoin(Category, Category.platform_id == Platform.platform_id).order_by(
+        Platform.platform_id, Category.category_id
+    ):
+        platform = by_platform.get(platform_id)
+        if platform is None:
+            platform = by_platform[platform_id] = {
+                'platform_id': platform_id,
+                'platform_name': platform_name,
+                'product_count': 0,
+                'total_stock': 0,
+                'categories': []
+            }
+            platforms.append(platform)
+        if category_id is None:
+            continue
+
+        product_count, total_stock = stock.get(category_id, (0, 0))
+        platform['product_count'] += product_count
+        platform['total_stock'] += total_stock
+        platform['categories'].append({
+            'category_id': category_id,
+            'category_name': category_name,
+            'slug': category_name.lower().replace(' ', '-'),
+            'product_count': product_count,
+            'total_stock': total_stock,
+            'subcategories': subcategories.get(category_id, [])
+        })
+
+    return NavigationBundle({
+        'platforms': platforms,
+        'product_count': sum(platform['product_count'] for platform in platforms),
+        'total_stock': sum(platform['total_stock'] for platform in platforms)
+    })
+
+# Every platform, category and product write moves the change log head, which
+# covers names, the category tree and the per-category counts and stock.
+# Subcategories are only written when the database is seeded.
+navigation_cache = VersionedCache(CATALOG_VERSION, build_navigation, read_version=catalog_head)
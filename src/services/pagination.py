@@ -0,0 +1,17 @@
+from math import ceil
+
+def normalize_paging(page, per_page):
+    """Normalize paging arguments the same way Query.paginate(error_out=False) does"""
+    return max(page or 1, 1), per_page if per_page and per_page >= 1 else 20
+
+def pagination_info(page, per_page, total):
+    """Pagination block of a list response for results paged outside Query.paginate"""
+    pages = ceil(total / per_page) if total else 0
+    return {
+        'page': page,
+        'pages': pages,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
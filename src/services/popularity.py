@@ -0,0 +1,135 @@
+import atexit
+import threading
+import traceback
+from datetime import datetime
+from functools import wraps
+from flask import make_response
+from src.models.user import db
+from src.models.popularity import ProductPopularity
+from src.services.upsert import dialect_insert
+
+# A purchase counts as this many views in the popularity score
+PURCHASE_WEIGHT = 20
+
+# Products per upsert statement when flushing
+FLUSH_CHUNK_SIZE = 500
+
+# Counts recorded in this worker and not yet written: product_id -> [views, purchases]
+_pending = {}
+_pending_lock = threading.Lock()
+
+_flusher = None
+_stop = threading.Event()
+_wakeup = threading.Event()
+_max_pending = 5000
+
+def record_view(product_id, count=1):
+    _add(product_id, count, 0)
+
+def record_purchase(product_id, quantity=1):
+    _add(product_id, 0, quantity)
+
+def _add(product_id, views, purchases):
+    if _flusher is None:
+        # Nothing would ever write the counts (POPULARITY_FLUSH_SECONDS=0)
+        return
+    with _pending_lock:
+        counts = _pending.get(product_id)
+        if counts is None:
+            counts = _pending[product_id] = [0, 0]
+        counts[0] += views
+        counts[1] += purchases
+        full = len(_pending) >= _max_pending
+    if full:
+        _wakeup.set()
+
+def counts_product_view(view):
+    """Count a view of the product_id URL argument whenever the view answers 200.
+
+    Goes above @coalesce so requests served from a shared response count too.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            record_view(kwargs['product_id'])
+        return response
+    return wrapper
+
+def flush():
+    """Write buffered counts with one upsert per chunk; needs an app context.
+
+    Counts that fail to write are put back and retried on the next flush.
+    """
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+
+    table = ProductPopularity.__table__
+    now = datetime.utcnow()
+    rows = [{
+        'product_id': product_id,
+        'views': views,
+        'purchases': purchases,
+        'score': views + purchases * PURCHASE_WEIGHT,
+        'updated_at': now
+    } for product_id, (views, purchases) in sorted(pending.items())]
+
+    try:
+        for start in range(0, len(rows), FLUSH_CHUNK_SIZE):
+            statement = dialect_insert(table).values(rows[start:start + FLUSH_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.product_id],
+                set_={
+                    'views': table.c.views + statement.excluded.views,
+                    'purchases': table.c.purchases + statement.excluded.purchases,
+                    'score': table.c.score + statement.excluded.score,
+                    'updated_at': statement.excluded.updated_at
+                }
+            )
+            db.session.execute(statement)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for product_id, (views, purchases) in pending.items():
+            _add(product_id, views, purchases)
+        raise
+    return len(rows)
+
+def _flush_in_context(app):
+    with app.app_context():
+        try:
+            flush()
+        finally:
+            db.session.remove()
+
+def _flusher_loop(app, interval):
+    while not _stop.is_set():
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            _flush_in_context(app)
+        except Exception:
+            traceback.print_exc()
+
+def start_flusher(app, interval, max_pending=5000):
+    """Flush buffered counts every interval seconds and on interpreter exit.
+
+    interval bounds what a crash can lose; max_pending products in the buffer
+    trigger an early flush.
+    """
+    global _flusher, _max_pending
+    _max_pending = max_pending
+    _stop.clear()
+    _flusher = threading.Thread(target=_flusher_loop, args=(app, interval), name='popularity-flusher', daemon=True)
+    _flusher.start()
+    atexit.register(_flush_in_context, app)
+    return _flusher
+
+def stop_flusher(timeout=5.0):
+    _stop.set()
+    _wakeup.set()
+    if _flusher:
+        _flusher.join(timeout)
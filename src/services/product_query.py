@@ -0,0 +1,90 @@
+from collections import namedtuple
+from functools import lru_cache
+from sqlalchemy import bindparam, func, or_, select
+from src.models.product import Product
+from src.models.category import Category
+from src.models.vendor import Vendor
+from src.models.platform import Platform
+from src.models.popularity import ProductPopularity
+
+# Optional filters of the product listing, in the order their conditions are applied
+PRODUCT_FILTERS = (
+    'category_id', 'platform_id', 'vendor_id', 'min_price', 'max_price', 'min_quantity', 'max_quantity',
+    'vendor', 'platform', 'category', 'keyword'
+)
+
+# Filters that count as absent when falsy rather than only when None, as the route always treated them
+_FALSY_ABSENT = ('category_id', 'platform_id', 'vendor_id', 'vendor', 'platform', 'category', 'keyword')
+
+# Distinct filter sets whose statements are kept; there are 2 ** 11 possible sets but few in use
+STATEMENT_CACHE_SIZE = 256
+
+ProductStatements = namedtuple('ProductStatements', 'count page ranked_count ranked_page unranked_page')
+
+def _condition(name):
+    param = bindparam(name)
+    if name == 'category_id':
+        return Product.category_id == param
+    if name == 'platform_id':
+        return Category.platform_id == param
+    if name == 'vendor_id':
+        return Product.vendor_id == param
+    if name == 'min_price':
+        return Product.price_per_pc >= param
+    if name == 'max_price':
+        return Product.price_per_pc <= param
+    if name == 'min_quantity':
+        return Product.quantity >= param
+    if name == 'max_quantity':
+        return Product.quantity <= param
+    if name == 'vendor':
+        return Vendor.vendor_name == param
+    if name == 'platform':
+        return Platform.platform_name == param
+    if name == 'category':
+        return Category.category_name == param
+    # Search in product name and vendor name
+    return or_(Product.name.ilike(param), Vendor.vendor_name.ilike(param))
+
+def _joined(statement):
+    return statement.join(Category, Product.category_id == Category.category_id).join(
+        Vendor, Product.vendor_id == Vendor.vendor_id
+    ).join(Platform, Category.platform_id == Platform.platform_id)
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def product_statements(present):
+    """Listing statements for the tuple of filter names present, values left as bound parameters.
+
+    The statements are built once per filter set and reused, so requests skip
+    building a query and SQLAlchemy finds the compiled SQL by the memoized
+    cache key of the same statement object. Page statements take limit and
+    offset parameters.
+    """
+    conditions = [_condition(name) for name in present]
+    products = _joined(select(Product)).where(*conditions)
+    count = _joined(select(func.count()).select_from(Product)).where(*conditions)
+    limit = bindparam('limit')
+    offset = bindparam('offset')
+
+    ranked = products.join(ProductPopularity, ProductPopularity.product_id == Product.product_id)
+    return ProductStatements(
+        count=count,
+        page=products.order_by(Product.product_id.desc()).limit(limit).offset(offset),
+        ranked_count=count.join(ProductPopularity, ProductPopularity.product_id == Product.product_id),
+        ranked_page=ranked.order_by(ProductPopularity.score.desc(), Product.product_id.desc()).limit(limit).offset(offset),
+        unranked_page=products.outerjoin(ProductPopularity, ProductPopularity.product_id == Product.product_id).where(
+            ProductPopularity.product_id.is_(None)
+        ).order_by(Product.product_id.desc()).limit(limit).offset(offset)
+    )
+
+def product_listing(filters):
+    """Statements and bound parameter values for a dict of listing filters; absent filters are skipped"""
+    present = []
+    params = {}
+    for name in PRODUCT_FILTERS:
+        value = filters.get(name)
+        if value is None or (name in _FALSY_ABSENT and not value):
+            continue
+        present.append(name)
+        params[name] = f'%{value}%' if name == 'keyword' else value
+    return product_statements(tuple(present)), params
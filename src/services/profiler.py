@@ -0,0 +1,260 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from flask import g, request
+
+# Profiles of single requests kept per worker for /api/admin/profiling/requests
+PROFILED_REQUESTS_KEPT = 20
+
+# Stacks whose innermost Python frame is in one of these files are threads waiting
+# on a lock, queue, socket or sleep rather than doing work
+_IDLE_FILES = ('threading.py', 'selectors.py', 'socketserver.py', 'queue.py', 'socket.py')
+
+_THREAD_NUMBER = re.compile(r'\d+')
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_STDLIB = os.path.dirname(os.__file__)
+
+_sampling = threading.Lock()
+_request_profiling = threading.Lock()
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+_memory_lock = threading.Lock()
+_memory_baseline = None
+
+class ProfilerBusy(Exception):
+    pass
+
+def _short_path(filename):
+    if filename.startswith(_APP_ROOT + os.sep):
+        return os.path.relpath(filename, _APP_ROOT)
+    index = filename.rfind('site-packages' + os.sep)
+    if index >= 0:
+        return filename[index + len('site-packages' + os.sep):]
+    if filename.startswith(_STDLIB + os.sep):
+        return os.path.relpath(filename, _STDLIB)
+    return filename
+
+def _frame_label(code, labels):
+    label = labels.get(code)
+    if label is None:
+        # Semicolons separate frames in the collapsed format
+        label = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+        labels[code] = label
+    return label
+
+def sample_stacks(seconds, interval, include_idle=False):
+    """Sample the Python stacks of every other thread for seconds, every interval seconds.
+
+    Returns ({collapsed stack: samples}, number of sampling passes). Stacks
+    are rooted at the thread name with its numbers dropped, so the threads of
+    one pool merge, and name functions by file and first line. Only one
+    sampling runs per worker at a time; ProfilerBusy is raised otherwise.
+    """
+    if not _sampling.acquire(blocking=False):
+        raise ProfilerBusy('A CPU profile is already running in this worker')
+    try:
+        stacks = Counter()
+        labels = {}
+        own = threading.get_ident()
+        passes = 0
+        deadline = time.perf_counter() + seconds
+        while True:
+            started = time.perf_counter()
+            if started >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_label(frame.f_code, labels))
+                    frame = frame.f_back
+                frames.append(_THREAD_NUMBER.sub('', names.get(ident, 'thread')).replace(';', ','))
+                stacks[';'.join(reversed(frames))] += 1
+            passes += 1
+            time.sleep(max(interval - (time.perf_counter() - started), 0))
+        return stacks, passes
+    finally:
+        _sampling.release()
+
+def collapsed_text(stacks):
+    """The collapsed stack format read by flamegraph.pl, speedscope and inferno"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+def function_totals(stacks, limit):
+    """Top functions by samples spent in them (self) and under them (total)"""
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if frames:
+            own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [{
+        'function': function,
+        'total_samples': count,
+        'self_samples': own[function]
+    } for function, count in total.most_common(limit)]
+
+def start_memory_tracing(frames):
+    """Start tracemalloc with frames per traceback; returns False when it was already tracing"""
+    with _memory_lock:
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        return True
+
+def stop_memory_tracing():
+    global _memory_baseline
+    with _memory_lock:
+        _memory_baseline = None
+        tracemalloc.stop()
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>')
+    ))
+
+def _traceback(statistic):
+    return [f'{_short_path(frame.filename)}:{frame.lineno}' for frame in statistic.traceback]
+
+def memory_top(group_by, limit):
+    """Largest live allocation sites since tracing started"""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = _take_snapshot().statistics(group_by)
+    return {
+        'traced_bytes': current,
+        'peak_bytes': peak,
+        'sites': [{
+            'traceback': _traceback(statistic),
+            'size_bytes': statistic.size,
+            'count': statistic.count
+        } for statistic in statistics[:limit]]
+    }
+
+def save_memory_baseline():
+    """Keep a snapshot for memory_diff to compare against; returns the bytes traced"""
+    global _memory_baseline
+    if not tracemalloc.is_tracing():
+        return None
+    with _memory_lock:
+        _memory_baseline = _take_snapshot()
+    return tracemalloc.get_traced_memory()[0]
+
+def memory_diff(group_by, limit):
+    """Allocation sites that grew or shrank most since save_memory_baseline"""
+    baseline = _memory_baseline
+    if baseline is None or not tracemalloc.is_tracing():
+        return None
+    statistics = _take_snapshot().compare_to(baseline, group_by)
+    return {
+        'size_diff_bytes': sum(statistic.size_diff for statistic in statistics),
+        'sites': [{
+            'traceback': _traceback(statistic),
+            'size_bytes': statistic.size,
+            'size_diff_bytes': statistic.size_diff,
+            'count': statistic.count,
+            'count_diff': statistic.count_diff
+        } for statistic in statistics[:limit]]
+    }
+
+def get_request_profile(profile_id):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+def list_request_profiles():
+    with _profiles_lock:
+        return [{key: value for key, value in profile.items() if key != 'stats'} for profile in _profiles.values()]
+
+def request_profile_text(profile, sort, limit):
+    output = io.StringIO()
+    pstats.Stats(profile['stats'], stream=output).sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+def request_profile_functions(profile, sort, limit):
+    stats = pstats.Stats(profile['stats'])
+    stats.sort_stats(sort)
+    functions = []
+    for filename, line, name in stats.fcn_list[:limit]:
+        primitive_calls, calls, own_time, total_time, _ = stats.stats[(filename, line, name)]
+        functions.append({
+            'function': f'{name} ({_short_path(filename)}:{line})',
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'self_ms': round(own_time * 1000, 3),
+            'total_ms': round(total_time * 1000, 3)
+        })
+    return functions
+
+def init_profiling(app):
+    """Profile single requests sent with an X-Profile header equal to PROFILING_TOKEN.
+
+    Nothing is installed without the token, so an unconfigured app pays no
+    cost; with it, requests without the header pay one header lookup. The
+    profile covers the view, including serializing its response, and its id
+    is returned in the X-Profile-Id response header.
+    """
+    token = app.config.get('PROFILING_TOKEN')
+    if not token:
+        return
+
+    @app.before_request
+    def _start_request_profile():
+        if request.headers.get('X-Profile') != token:
+            return
+        # cProfile hooks one thread, but keep to one profiled request per worker
+        # so concurrent profiles do not distort each other
+        if not _request_profiling.acquire(blocking=False):
+            g.profile_busy = True
+            return
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.after_request
+    def _finish_request_profile(response):
+        if g.pop('profile_busy', False):
+            response.headers['X-Profile-Id'] = 'busy'
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _request_profiling.release()
+            profile_id = uuid.uuid4().hex
+            with _profiles_lock:
+                _profiles[profile_id] = {
+                    'id': profile_id,
+                    'method': request.method,
+                    'path': request.full_path.rstrip('?'),
+                    'status': response.status_code,
+                    'created_at': time.time(),
+                    'stats': profiler
+                }
+                while len(_profiles) > PROFILED_REQUESTS_KEPT:
+                    _profiles.popitem(last=False)
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abandon_request_profile(exc):
+        # after_request does not run when the view raised an unhandled exception
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _request_profiling.release()
@@ -0,0 +1,216 @@
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.product import Product
+from src.models.reservation import InventoryReservation
+from src.services.catalog_signals import STOCK_FIELDS, mark_catalog_changed, notify_catalog_changed
+from src.services.vendor_stats import record_stock_changes
+
+# Product.quantity is stock on hand and only a confirmed hold, a sale, takes units
+# out of it. Units available to buy are quantity minus the active, unexpired holds,
+# so absolute stock writes made while holds are open are never undone by a release.
+
+_sweeper = None
+_stop = threading.Event()
+
+class ReservationError(Exception):
+    """Base class for reservation failures reported back to the client"""
+
+class InsufficientStock(ReservationError):
+    def __init__(self, product_id):
+        super().__init__(f'Not enough stock for product {product_id}')
+        self.product_id = product_id
+
+class ReservationNotActive(ReservationError):
+    def __init__(self, token):
+        super().__init__(f'Reservation {token} is not active or has expired')
+        self.token = token
+
+def held_units(product_ids):
+    """{product_id: units in active, unexpired holds} for the given products, in one query"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    return dict(db.session.query(
+        InventoryReservation.product_id, db.func.sum(InventoryReservation.quantity)
+    ).filter(
+        InventoryReservation.product_id.in_(product_ids),
+        InventoryReservation.status == 'active',
+        InventoryReservation.expires_at > datetime.utcnow()
+    ).group_by(InventoryReservation.product_id).all())
+
+def available_quantity(quantity, held):
+    """Units on sale: stock on hand less held units, never below zero"""
+    return max((quantity or 0) - (held or 0), 0)
+
+def reserve(items, ttl_seconds):
+    """Hold stock for every item or for none of them, returning the hold token.
+
+    items is a list of dicts with product_id and quantity. Each product row is
+    touched with a no-op UPDATE first, which serializes concurrent holds on it
+    (a row lock on PostgreSQL, the write lock on SQLite) for this short
+    transaction only, so the availability check that follows cannot oversell.
+    The caller's session is committed.
+    """
+    quantities = {}
+    for item in items:
+        product_id = int(item['product_id'])
+        quantity = int(item.get('quantity', 1))
+        if quantity <= 0:
+            raise ValueError('Quantity must be positive')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    token = uuid.uuid4().hex
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+    try:
+        # A fixed locking order keeps concurrent multi-item holds from deadlocking
+        for product_id in sorted(quantities):
+            locked = Product.query.filter(Product.product_id == product_id).update(
+                {'quantity': Product.quantity}, synchronize_session=False
+            )
+            if not locked:
+                raise InsufficientStock(product_id)
+
+        on_hand = dict(db.session.query(Product.product_id, Product.quantity).filter(
+            Product.product_id.in_(list(quantities))
+        ).all())
+        held = held_units(quantities)
+        for product_id in sorted(quantities):
+            if available_quantity(on_hand[product_id], held.get(product_id)) < quantities[product_id]:
+                raise InsufficientStock(product_id)
+            db.session.add(InventoryReservation(
+                token=token,
+                product_id=product_id,
+                quantity=quantities[product_id],
+                status='active',
+                expires_at=expires_at
+            ))
+        mark_catalog_changed('product', sorted(quantities))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    notify_catalog_changed('product', sorted(quantities), fields=STOCK_FIELDS)
+    return token
+
+def get_reservations(token):
+    return InventoryReservation.query.filter_by(token=token).order_by(InventoryReservation.id).all()
+
+def active_items(token):
+    """Items held by an unexpired reservation, or an empty list"""
+    rows = InventoryReservation.query.filter(
+        InventoryReservation.token == token,
+        InventoryReservation.status == 'active',
+        InventoryReservation.expires_at > datetime.utcnow()
+    ).all()
+    return [{'product_id': row.product_id, 'quantity': row.quantity} for row in rows]
+
+def confirm(token, order_id=None):
+    """Turn an unexpired hold into a sale, taking its units out of stock on hand.
+
+    Runs in the caller's transaction; returns the ids of products whose stock
+    changed for the caller to notify once it commits.
+    """
+    rows = db.session.query(
+        InventoryReservation.id, InventoryReservation.product_id, InventoryReservation.quantity
+    ).filter(
+        InventoryReservation.token == token,
+        InventoryReservation.status == 'active',
+        InventoryReservation.expires_at > datetime.utcnow()
+    ).all()
+    sold = {}
+    for row_id, product_id, quantity in rows:
+        claimed = InventoryReservation.query.filter_by(id=row_id, status='active').update({
+            'status': 'confirmed',
+            'order_id': order_id,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if claimed:
+            sold[product_id] = sold.get(product_id, 0) + quantity
+    if not sold:
+        raise ReservationNotActive(token)
+    on_hand = dict(db.session.query(Product.product_id, Product.quantity).filter(
+        Product.product_id.in_(list(sold))
+    ).all())
+    taken = {}
+    for product_id, quantity in sold.items():
+        # Stock lowered below the open holds by an admin write stops at zero
+        units = min(quantity, max(on_hand.get(product_id) or 0, 0))
+        if units:
+            Product.query.filter_by(product_id=product_id).update(
+                {'quantity': Product.quantity - units}, synchronize_session=False
+            )
+            taken[product_id] = -units
+    if taken:
+        record_stock_changes(taken)
+    mark_catalog_changed('product', sorted(sold))
+    return sorted(sold)
+
+def _return_units(rows, status):
+    """Put held units back on sale for rows this call manages to move out of active.
+
+    Stock on hand is untouched; returns the ids of products whose held units changed.
+    """
+    returned = set()
+    for row_id, product_id, quantity in rows:
+        claimed = InventoryReservation.query.filter_by(id=row_id, status='active').update({
+            'status': status,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if claimed:
+            returned.add(product_id)
+    if returned:
+        mark_catalog_changed('product', sorted(returned))
+    return sorted(returned)
+
+def release(token):
+    """Give up a hold before it expires, returning the affected product ids; the caller commits"""
+    rows = db.session.query(
+        InventoryReservation.id, InventoryReservation.product_id, InventoryReservation.quantity
+    ).filter_by(token=token, status='active').all()
+    if not rows:
+        raise ReservationNotActive(token)
+    return _return_units(rows, 'released')
+
+def sweep_expired(batch_size=500):
+    """Return stock from expired holds in batches, committing each one"""
+    swept = 0
+    while True:
+        rows = db.session.query(
+            InventoryReservation.id, InventoryReservation.product_id, InventoryReservation.quantity
+        ).filter(
+            InventoryReservation.status == 'active',
+            InventoryReservation.expires_at <= datetime.utcnow()
+        ).order_by(InventoryReservation.id).limit(batch_size).all()
+        if not rows:
+            return swept
+        product_ids = _return_units(rows, 'expired')
+        db.session.commit()
+        notify_catalog_changed('product', product_ids, fields=STOCK_FIELDS)
+        swept += len(rows)
+        if len(rows) < batch_size:
+            return swept
+
+def _sweeper_loop(app, interval):
+    while not _stop.wait(interval):
+        try:
+            with app.app_context():
+                sweep_expired()
+                db.session.remove()
+        except Exception:
+            traceback.print_exc()
+
+def start_sweeper(app, interval):
+    """Start the daemon thread that releases expired holds every interval seconds"""
+    global _sweeper
+    _stop.clear()
+    _sweeper = threading.Thread(target=_sweeper_loop, args=(app, interval), name='reservation-sweeper', daemon=True)
+    _sweeper.start()
+    return _sweeper
+
+def stop_sweeper(timeout=5.0):
+    _stop.set()
+    if _sweeper:
+        _sweeper.join(timeout)
@@ -0,0 +1,197 @@
+from datetime import datetime
+from src.models.user import db
+from src.models.order import Order, OrderItem
+from src.models.order_archive import ArchivedOrder, ArchivedOrderItem
+from src.models.product import Product
+from src.models.category import Category
+from src.models.rollup import OrderRollupHourly, OrderRollupDaily
+from src.services.upsert import dialect_insert
+from src.services.vendor_stats import record_vendor_sales
+
+ROLLUP_MODELS = {
+    'hour': OrderRollupHourly,
+    'day': OrderRollupDaily
+}
+
+DIMENSIONS = ('all', 'status', 'payment_status', 'vendor', 'platform')
+
+METRICS = ('orders_count', 'paid_orders_count', 'gross_amount', 'revenue', 'items_sold')
+
+# Archived orders still count towards the rollups
+ORDER_SOURCES = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+def bucket_start(value, granularity):
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def load_order_lines(order_ids, item_model=OrderItem):
+    """Return {order_id: [(vendor_id, platform_id, quantity, total_price), ...]} in one query"""
+    rows = db.session.query(
+        item_model.order_id,
+        Product.vendor_id,
+        Category.platform_id,
+        item_model.quantity,
+        item_model.total_price
+    ).join(Product, item_model.product_id == Product.product_id).join(
+        Category, Product.category_id == Category.category_id
+    ).filter(item_model.order_id.in_(order_ids)).all()
+
+    lines = {}
+    for order_id, vendor_id, platform_id, quantity, total_price in rows:
+        lines.setdefault(order_id, []).append((vendor_id, platform_id, quantity or 0, float(total_price or 0)))
+    return lines
+
+def order_contributions(total_amount, status, payment_status, lines):
+    """Metric deltas an order with this state adds to each (dimension, value) pair"""
+    paid = payment_status == 'paid'
+    contributions = {}
+
+    def add(dimension, value, gross, items):
+        key = (dimension, '' if value is None else str(value))
+        metrics = contributions.setdefault(key, [0, 0, 0.0, 0.0, 0])
+        metrics[0] += 1
+        metrics[2] += gross
+        if paid:
+            metrics[1] += 1
+            metrics[3] += gross
+            metrics[4] += items
+
+    amount = float(total_amount or 0)
+    total_items = sum(line[2] for line in lines)
+    add('all', None, amount, total_items)
+    add('status', status, amount, total_items)
+    add('payment_status', payment_status, amount, total_items)
+
+    # An order counts once for every vendor and platform it touches, with that share of the amount
+    for dimension, position in (('vendor', 0), ('platform', 1)):
+        shares = {}
+        for line in lines:
+            share = shares.setdefault(line[position], [0.0, 0])
+            share[0] += line[3]
+            share[1] += line[2]
+        for value, (gross, items) in shares.items():
+            add(dimension, value, gross, items)
+
+    return contributions
+
+def _upsert_increments(model, rows):
+    table = model.__table__
+    statement = dialect_insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.bucket_start, table.c.dimension, table.c.dimension_value],
+        set_=dict(
+            {metric: table.c[metric] + statement.excluded[metric] for metric in METRICS},
+            updated_at=statement.excluded.updated_at
+        )
+    )
+    db.session.execute(statement)
+
+def apply_contributions(created_at, contributions, sign=1):
+    """Add (or with sign=-1 remove) contributions to the hourly and daily buckets and the vendor stats; the caller commits"""
+    if not contributions:
+        return
+    record_vendor_sales(contributions, sign)
+    created_at = created_at or datetime.utcnow()
+    now = datetime.utcnow()
+    for granularity, model in ROLLUP_MODELS.items():
+        bucket = bucket_start(created_at, granularity)
+        rows = []
+        for (dimension, value), metrics in contributions.items():
+            row = {
+                'bucket_start': bucket,
+                'dimension': dimension,
+                'dimension_value': value,
+                'updated_at': now
+            }
+            for metric, amount in zip(METRICS, metrics):
+                row[metric] = amount * sign
+            rows.append(row)
+        _upsert_increments(model, rows)
+
+def record_order_created(order):
+    """Count a new order; its items must already be flushed"""
+    lines = load_order_lines([order.id]).get(order.id, [])
+    apply_contributions(order.created_at, order_contributions(
+        order.total_amount, order.status, order.payment_status, lines
+    ))
+
+def record_order_changed(order, old_status, old_payment_status):
+    """Move an order between status buckets after status or payment_status changed"""
+    if old_status == order.status and old_payment_status == order.payment_status:
+        return
+    lines = load_order_lines([order.id]).get(order.id, [])
+    apply_contributions(order.created_at, order_contributions(
+        order.total_amount, old_status, old_payment_status, lines
+    ), sign=-1)
+    apply_contributions(order.created_at, order_contributions(
+        order.total_amount, order.status, order.payment_status, lines
+    ))
+
+def record_order_deleted(order):
+    """Remove an order's contribution; call before its items are deleted"""
+    lines = load_order_lines([order.id]).get(order.id, [])
+    apply_contributions(order.created_at, order_contributions(
+        order.total_amount, order.status, order.payment_status, lines
+    ), sign=-1)
+
+def rebuild_rollups(since=None, chunk_size=500, log=print):
+    """Recompute rollup rows from live and archived orders, for every day starting at since or for all time"""
+    day_start = bucket_start(since, 'day') if since else None
+
+    for model in ROLLUP_MODELS.values():
+        query = model.query
+        if day_start:
+            query = query.filter(model.bucket_start >= day_start)
+        query.delete(synchronize_session=False)
+
+    totals = {granularity: {} for granularity in ROLLUP_MODELS}
+    processed = 0
+    for order_model, item_model in ORDER_SOURCES:
+        last_id = 0
+        while True:
+            query = db.session.query(
+                order_model.id, order_model.created_at, order_model.total_amount,
+                order_model.status, order_model.payment_status
+            ).filter(order_model.id > last_id)
+            if day_start:
+                query = query.filter(order_model.created_at >= day_start)
+            orders = query.order_by(order_model.id).limit(chunk_size).all()
+            if not orders:
+                break
+
+            lines_by_order = load_order_lines([order.id for order in orders], item_model)
+            for order_id, created_at, total_amount, status, payment_status in orders:
+                contributions = order_contributions(
+                    total_amount, status, payment_status, lines_by_order.get(order_id, [])
+                )
+                created_at = created_at or datetime.utcnow()
+                for granularity, buckets in totals.items():
+                    bucket = bucket_start(created_at, granularity)
+                    for key, metrics in contributions.items():
+                        current = buckets.setdefault((bucket,) + key, [0, 0, 0.0, 0.0, 0])
+                        for index, amount in enumerate(metrics):
+                            current[index] += amount
+
+            last_id = orders[-1].id
+            processed += len(orders)
+            log(f'Processed {processed} orders')
+
+    now = datetime.utcnow()
+    for granularity, buckets in totals.items():
+        model = ROLLUP_MODELS[granularity]
+        rows = []
+        for (bucket, dimension, value), metrics in buckets.items():
+            row = {
+                'bucket_start': bucket,
+                'dimension': dimension,
+                'dimension_value': value,
+                'updated_at': now
+            }
+            row.update(zip(METRICS, metrics))
+            rows.append(row)
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(model.__table__.insert(), rows[start:start + chunk_size])
+
+    db.session.commit()
+    return processed
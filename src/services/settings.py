@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+from src.models.user import db
+from src.models.settings import SiteSetting
+from src.services.cache_versions import VersionedCache, bump_version
+from src.services.upsert import dialect_insert
+from src.services.warmup import register_warmup
+
+SETTINGS_VERSION = 'site_settings'
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_FALSE_VALUES = ('0', 'false', 'no', 'off', '')
+
+def _load_settings():
+    return dict(db.session.query(SiteSetting.key, SiteSetting.value).all())
+
+settings_cache = VersionedCache(SETTINGS_VERSION, _load_settings)
+
+@register_warmup
+def _prime_settings_cache():
+    settings_cache.get()
+
+def get_setting(key, default=None):
+    """Read a raw setting value from the process-wide cache; needs an app context"""
+    value = settings_cache.get().get(key)
+    return default if value is None else value
+
+def get_int_setting(key, default=None):
+    try:
+        return int(get_setting(key))
+    except (TypeError, ValueError):
+        return default
+
+def get_float_setting(key, default=None):
+    try:
+        return float(get_setting(key))
+    except (TypeError, ValueError):
+        return default
+
+def get_bool_setting(key, default=False):
+    value = get_setting(key)
+    if value is None:
+        return default
+    value = value.strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    return default
+
+def get_json_setting(key, default=None):
+    value = get_setting(key)
+    if value is None:
+        return default
+    try:
+        return json.loads(value)
+    except ValueError:
+        return default
+
+def serialize_setting_value(value):
+    """Store strings as-is and everything else as JSON so typed readers can parse it"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+def upsert_settings(items):
+    """Insert or update many settings in a single INSERT ... ON CONFLICT statement.
+
+    items is a list of dicts with key, value and optional description; an omitted
+    description keeps the stored one. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'key': item['key'],
+        'value': serialize_setting_value(item.get('value')),
+        'description': item.get('description'),
+        'created_at': now,
+        'updated_at': now
+    } for item in items]
+
+    table = SiteSetting.__table__
+    statement = dialect_insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={
+            'value': statement.excluded.value,
+            'description': db.func.coalesce(statement.excluded.description, table.c.description),
+            'updated_at': statement.excluded.updated_at
+        }
+    )
+    db.session.execute(statement)
+    bump_version(SETTINGS_VERSION)
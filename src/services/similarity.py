@@ -0,0 +1,219 @@
+import random
+import re
+import zlib
+from array import array
+from src.models.user import db
+from src.models.product import Product
+from src.models.category import Category
+from src.models.similarity import ProductSignature, ProductLshBucket, ProductSimilarity
+from src.services.jobs import job_handler, enqueue
+from src.services.catalog_signals import catalog_changed
+
+# MinHash over word bigrams of the product name, banded for LSH. 16 bands of 4 rows
+# make pairs with a Jaccard similarity around 0.5 or more likely to share a bucket.
+NUM_HASHES = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_HASHES // BANDS
+
+# Neighbours kept per product, and the lowest estimated similarity worth keeping
+TOP_K = 10
+MIN_SCORE = 0.3
+
+# Product columns signatures and their platform scope are computed from
+SIGNATURE_FIELDS = frozenset(('name', 'category_id'))
+
+# Large buckets come from templated names; only this many members are compared per bucket
+MAX_BUCKET_CANDIDATES = 200
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_HASHES)]
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+def shingles(name):
+    words = _WORD_PATTERN.findall((name or '').lower())
+    if len(words) < 2:
+        return set(words)
+    return {f'{first} {second}' for first, second in zip(words, words[1:])}
+
+def minhash(name):
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(name)]
+    if not hashes:
+        return array('I', [_MAX_HASH] * NUM_HASHES)
+    return array('I', [
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    ])
+
+def band_buckets(signature):
+    """Stable bucket hash for every band of a signature"""
+    return [
+        zlib.crc32(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+        for band in range(BANDS)
+    ]
+
+def estimate_similarity(first, second):
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_HASHES
+
+def _unpack(data):
+    signature = array('I')
+    signature.frombytes(data)
+    return signature
+
+def _top_neighbours(product_id, signature, candidates, signatures):
+    scored = []
+    for candidate_id in candidates:
+        if candidate_id == product_id:
+            continue
+        score = estimate_similarity(signature, signatures[candidate_id])
+        if score >= MIN_SCORE:
+            scored.append((score, candidate_id))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:TOP_K]
+
+def _product_rows(product_ids=None, platform_id=None):
+    query = db.session.query(Product.product_id, Product.name, Category.platform_id).join(
+        Category, Product.category_id == Category.category_id
+    )
+    if product_ids is not None:
+        query = query.filter(Product.product_id.in_(product_ids))
+    if platform_id is not None:
+        query = query.filter(Category.platform_id == platform_id)
+    return query
+
+def rebuild_platform(platform_id, chunk_size=1000, log=None):
+    """Recompute signatures, buckets and neighbours for every product of one platform"""
+    product_ids = db.session.query(ProductSignature.product_id).filter_by(platform_id=platform_id)
+    ProductSimilarity.query.filter(ProductSimilarity.product_id.in_(product_ids.scalar_subquery())).delete(
+        synchronize_session=False
+    )
+    ProductLshBucket.query.filter_by(platform_id=platform_id).delete(synchronize_session=False)
+    ProductSignature.query.filter_by(platform_id=platform_id).delete(synchronize_session=False)
+
+    signatures = {}
+    buckets = {}
+    signature_rows = []
+    bucket_rows = []
+    for product_id, name, _ in _product_rows(platform_id=platform_id).yield_per(chunk_size):
+        signature = minhash(name)
+        signatures[product_id] = signature
+        signature_rows.append({'product_id': product_id, 'platform_id': platform_id, 'signature': signature.tobytes()})
+        for band, bucket in enumerate(band_buckets(signature)):
+            buckets.setdefault((band, bucket), []).append(product_id)
+            bucket_rows.append({'platform_id': platform_id, 'band': band, 'bucket': bucket, 'product_id': product_id})
+
+    for start in range(0, len(signature_rows), chunk_size):
+        db.session.execute(ProductSignature.__table__.insert(), signature_rows[start:start + chunk_size])
+    for start in range(0, len(bucket_rows), chunk_size):
+        db.session.execute(ProductLshBucket.__table__.insert(), bucket_rows[start:start + chunk_size])
+
+    candidates = {}
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        limited = members[:MAX_BUCKET_CANDIDATES]
+        for product_id in members:
+            candidates.setdefault(product_id, set()).update(limited)
+
+    similarity_rows = []
+    for product_id, candidate_ids in candidates.items():
+        for score, similar_id in _top_neighbours(product_id, signatures[product_id], candidate_ids, signatures):
+            similarity_rows.append({'product_id': product_id, 'similar_product_id': similar_id, 'score': score})
+    for start in range(0, len(similarity_rows), chunk_size):
+        db.session.execute(ProductSimilarity.__table__.insert(), similarity_rows[start:start + chunk_size])
+
+    db.session.commit()
+    if log:
+        log(f'Platform {platform_id}: {len(signatures)} products, {len(similarity_rows)} neighbour rows')
+    return len(signatures)
+
+def rebuild_all(log=None, job=None):
+    platform_ids = [row[0] for row in db.session.query(Category.platform_id).distinct().order_by(Category.platform_id)]
+    if job:
+        job.set_total(len(platform_ids))
+    total = 0
+    for index, platform_id in enumerate(platform_ids):
+        total += rebuild_platform(platform_id, log=log)
+        if job:
+            job.report(index + 1)
+    return total
+
+def _remove_products(product_ids):
+    ProductSimilarity.query.filter(db.or_(
+        ProductSimilarity.product_id.in_(product_ids),
+        ProductSimilarity.similar_product_id.in_(product_ids)
+    )).delete(synchronize_session=False)
+    ProductLshBucket.query.filter(ProductLshBucket.product_id.in_(product_ids)).delete(synchronize_session=False)
+    ProductSignature.query.filter(ProductSignature.product_id.in_(product_ids)).delete(synchronize_session=False)
+
+def _offer_neighbour(product_id, similar_id, score):
+    """Add similar_id to product_id's neighbours if it beats the weakest of a full list"""
+    neighbours = ProductSimilarity.query.filter_by(product_id=product_id).order_by(
+        ProductSimilarity.score.desc(), ProductSimilarity.similar_product_id
+    ).all()
+    if len(neighbours) >= TOP_K:
+        weakest = neighbours[-1]
+        if score <= weakest.score:
+            return
+        db.session.delete(weakest)
+    db.session.add(ProductSimilarity(product_id=product_id, similar_product_id=similar_id, score=score))
+
+def update_products(product_ids):
+    """Recompute signatures and neighbours for changed products; products that no longer exist are removed"""
+    _remove_products(product_ids)
+    db.session.flush()
+
+    for product_id, name, platform_id in _product_rows(product_ids=product_ids).all():
+        if platform_id is None:
+            continue
+        signature = minhash(name)
+        buckets = band_buckets(signature)
+        db.session.add(ProductSignature(product_id=product_id, platform_id=platform_id, signature=signature.tobytes()))
+        db.session.add_all([
+            ProductLshBucket(platform_id=platform_id, band=band, bucket=bucket, product_id=product_id)
+            for band, bucket in enumerate(buckets)
+        ])
+
+        candidate_ids = set()
+        for band, bucket in enumerate(buckets):
+            candidate_ids.update(row[0] for row in db.session.query(ProductLshBucket.product_id).filter_by(
+                platform_id=platform_id, band=band, bucket=bucket
+            ).limit(MAX_BUCKET_CANDIDATES))
+        candidate_ids.discard(product_id)
+
+        signatures = {row.product_id: _unpack(row.signature) for row in ProductSignature.query.filter(
+            ProductSignature.product_id.in_(candidate_ids)
+        )} if candidate_ids else {}
+
+        for score, similar_id in _top_neighbours(product_id, signature, signatures, signatures):
+            db.session.add(ProductSimilarity(product_id=product_id, similar_product_id=similar_id, score=score))
+            _offer_neighbour(similar_id, product_id, score)
+        db.session.flush()
+
+    db.session.commit()
+
+@job_handler('rebuild_similar_products')
+def run_rebuild_similar_products(job):
+    return {'products': rebuild_all(job=job)}
+
+@job_handler('update_similar_products')
+def run_update_similar_products(job):
+    product_ids = job.params.get('product_ids', [])
+    update_products(product_ids)
+    return {'products': len(product_ids)}
+
+@catalog_changed.connect
+def _queue_similarity_update(kind, ids=(), deleted=False, fields=None):
+    """Keep the neighbour table current in the background after catalog writes"""
+    if kind == 'product':
+        if not deleted and fields is not None and not fields & SIGNATURE_FIELDS:
+            # Stock and price moves leave the signatures as they are
+            return
+        enqueue('update_similar_products', {'product_ids': list(ids)})
+    elif kind == 'category' and not deleted:
+        # A category moved to another platform changes the scope of its products
+        product_ids = [row[0] for row in db.session.query(Product.product_id).filter(Product.category_id.in_(ids))]
+        if product_ids:
+            enqueue('update_similar_products', {'product_ids': product_ids})
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from flask import current_app
+from src.models.settings import SiteSetting, WebsiteLayout
+from src.services.cache_versions import VersionedCache
+
+SITE_CONFIG_VERSION = 'site_config'
+
+class SiteConfigBundle:
+    """Serialized site config document with its content-hash ETag"""
+
+    def __init__(self, document):
+        self.document = document
+        self.body = json.dumps({
+            'success': True,
+            'data': document,
+            'message': 'Site config retrieved successfully'
+        }, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+def is_public_setting(key):
+    prefixes = current_app.config.get('PRIVATE_SETTING_PREFIXES', ())
+    return not any(key.startswith(prefix) for prefix in prefixes)
+
+def build_site_config():
+    """Compile the active layout grouped by section plus the public settings"""
+    layout_items = WebsiteLayout.query.filter_by(is_active=True).order_by(
+        WebsiteLayout.section, WebsiteLayout.sort_order, WebsiteLayout.id
+    ).all()
+
+    layout_data = {}
+    for item in layout_items:
+        layout_data.setdefault(item.section, []).append({
+            'id': item.id,
+            'component': item.component,
+            'content': item.content,
+            'sort_order': item.sort_order
+        })
+
+    settings_data = {}
+    for setting in SiteSetting.query.order_by(SiteSetting.key).all():
+        if is_public_setting(setting.key):
+            settings_data[setting.key] = setting.value
+
+    return SiteConfigBundle({
+        'layout': layout_data,
+        'settings': settings_data
+    })
+
+site_config_cache = VersionedCache(SITE_CONFIG_VERSION, build_site_config)
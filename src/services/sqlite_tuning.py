@@ -0,0 +1,50 @@
+import atexit
+from sqlalchemy import event, text
+from src.models.user import db
+
+def production_pragmas(config):
+    """Pragmas of the production profile, in the order they are applied to each connection.
+
+    WAL lets readers run alongside the single writer; synchronous=NORMAL is
+    durable in WAL mode except for the last transactions before a power loss.
+    """
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('cache_size', -config['SQLITE_CACHE_SIZE_KB']),  # negative means KiB rather than pages
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('temp_store', 'MEMORY')
+    ]
+
+def apply_pragmas(engine, pragmas):
+    """Run the pragmas on every new DBAPI connection of engine"""
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def optimize(engine):
+    """Let SQLite refresh the statistics the query planner needs; cheap when nothing changed"""
+    with engine.connect() as connection:
+        connection.execute(text('PRAGMA optimize'))
+
+def configure_sqlite(app):
+    """Apply the SQLITE_PROFILE of app to its engine when the database is SQLite.
+
+    Must run before the first connection is opened.
+    """
+    profile = app.config['SQLITE_PROFILE']
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or profile == 'default':
+        return
+    if profile != 'production':
+        raise ValueError(f'Unknown SQLITE_PROFILE: {profile}')
+
+    apply_pragmas(engine, production_pragmas(app.config))
+    atexit.register(optimize, engine)
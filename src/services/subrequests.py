@@ -0,0 +1,113 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from flask import request
+from werkzeug.test import EnvironBuilder
+
+# Parent request headers not passed on to sub-requests, which have no body
+_DROPPED_HEADERS = ('Content-Type', 'Content-Length')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class SubrequestError(ValueError):
+    pass
+
+def parse_subrequest(item):
+    """Normalize a batch item, a path string or {path, query, id}, to (id, path, query string)"""
+    if isinstance(item, str):
+        item = {'path': item}
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        raise SubrequestError('Each request needs a path')
+
+    path, _, query_string = item['path'].partition('?')
+    if not path.startswith('/api/'):
+        raise SubrequestError(f'Only /api/ paths can be batched: {path}')
+    query = item.get('query')
+    if query is not None:
+        if not isinstance(query, dict):
+            raise SubrequestError('query must be an object')
+        extra = urlencode(query, doseq=True)
+        query_string = f'{query_string}&{extra}' if query_string else extra
+    return item.get('id'), path, query_string
+
+def _preprocess_blueprint(app):
+    """app.preprocess_request for the hooks of the matched blueprints only"""
+    names = tuple(reversed(request.blueprints))
+    for name in names:
+        for function in app.url_value_preprocessors.get(name, ()):
+            function(request.endpoint, request.view_args)
+    for name in names:
+        for function in app.before_request_funcs.get(name, ()):
+            response = app.ensure_sync(function)()
+            if response is not None:
+                return response
+    return None
+
+def _run(app, environ):
+    """Route and run one GET in a request context; only user exception handlers apply.
+
+    Blueprint before_request hooks run, so their guards hold for sub-requests
+    too. The app-wide hooks (metrics, profiling, CORS) belong to the
+    enclosing batch request and are skipped.
+    """
+    with app.request_context(environ):
+        if request.routing_exception is None and request.blueprint is None:
+            # Matched the single-page app fallback rather than an API view
+            return 404, {'success': False, 'message': 'Not found'}
+        try:
+            try:
+                if request.routing_exception is not None:
+                    app.raise_routing_exception(request)
+                rv = _preprocess_blueprint(app)
+                if rv is None:
+                    rv = app.dispatch_request()
+                response = app.make_response(rv)
+            except Exception as e:
+                response = app.make_response(app.handle_user_exception(e))
+        except Exception as e:
+            return 500, {'success': False, 'message': f'Error running request: {str(e)}'}
+
+        if response.is_streamed:
+            response.close()
+            return 400, {'success': False, 'message': 'Streaming endpoints cannot be batched'}
+        if response.is_json:
+            return response.status_code, response.get_json(silent=True)
+        return response.status_code, response.get_data(as_text=True)
+
+def run_subrequests(app, parent, requests, workers=0):
+    """Run parsed (id, path, query string) GETs with the parent request's headers.
+
+    Sequentially they share the app context of the parent request and with it
+    its database session. With workers > 0 they run on a shared thread pool
+    instead, each with its own app context and session. Returns one
+    {id, path, status, body} entry per request, in order.
+    """
+    headers = [(name, value) for name, value in parent.headers.items() if name not in _DROPPED_HEADERS]
+    environs = [EnvironBuilder(
+        path=path,
+        query_string=query_string,
+        method='GET',
+        base_url=parent.host_url,
+        headers=headers,
+        environ_base={'REMOTE_ADDR': parent.remote_addr}
+    ).get_environ() for _, path, query_string in requests]
+
+    if workers > 0 and len(requests) > 1:
+        results = list(_get_executor(workers).map(lambda environ: _run(app, environ), environs))
+    else:
+        results = [_run(app, environ) for environ in environs]
+
+    return [{
+        'id': request_id,
+        'path': f'{path}?{query_string}' if query_string else path,
+        'status': status,
+        'body': body
+    } for (request_id, path, query_string), (status, body) in zip(requests, results)]
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        return _executor
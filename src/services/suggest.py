@@ -0,0 +1,266 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from src.models.user import db
+from src.models.product import Product
+from src.models.category import Category
+from src.models.vendor import Vendor
+from src.models.platform import Platform
+from src.services.catalog_mirror import CatalogMirror
+from src.services.warmup import register_warmup
+
+SUGGEST_KINDS = ('product', 'vendor', 'category', 'platform')
+
+# Longest label returned in a suggestion; product names can be paragraphs
+MAX_LABEL_LENGTH = 120
+
+# Product writes touching more rows than this rebuild the index instead of patching it
+MAX_INCREMENTAL_PRODUCTS = 200
+
+# Query tokens matching more vocabulary entries than this are not costed when picking the driver
+MAX_COSTED_TOKENS = 64
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+class PrefixIndex:
+    """Token postings sorted by stock, answering prefix queries with the best stocked matches first"""
+
+    def __init__(self):
+        self.labels = {}      # id -> label
+        self.stock = {}       # id -> stock used for ranking
+        self.postings = {}    # token -> sorted [(-stock, id), ...]
+        self.vocabulary = []  # sorted tokens
+
+    def load(self, rows):
+        """Bulk load (id, label, stock) rows into an empty index"""
+        for doc_id, label, stock in rows:
+            self.labels[doc_id] = label
+            self.stock[doc_id] = stock
+            entry = (-stock, doc_id)
+            for token in set(tokenize(label)):
+                self.postings.setdefault(token, []).append(entry)
+        for entries in self.postings.values():
+            entries.sort()
+        self.vocabulary = sorted(self.postings)
+
+    def add(self, doc_id, label, stock):
+        self.remove(doc_id)
+        self.labels[doc_id] = label
+        self.stock[doc_id] = stock
+        entry = (-stock, doc_id)
+        for token in set(tokenize(label)):
+            entries = self.postings.get(token)
+            if entries is None:
+                self.postings[token] = [entry]
+                insort(self.vocabulary, token)
+            else:
+                insort(entries, entry)
+
+    def remove(self, doc_id):
+        label = self.labels.pop(doc_id, None)
+        if label is None:
+            return
+        entry = (-self.stock.pop(doc_id), doc_id)
+        for token in set(tokenize(label)):
+            entries = self.postings[token]
+            del entries[bisect_left(entries, entry)]
+            if not entries:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def set_stock(self, doc_id, stock):
+        if doc_id in self.labels and self.stock[doc_id] != stock:
+            self.add(doc_id, self.labels[doc_id], stock)
+
+    def _token_range(self, token):
+        start = bisect_left(self.vocabulary, token)
+        return start, bisect_left(self.vocabulary, token + '\uffff', start)
+
+    def search(self, tokens, limit):
+        """Ids whose tokens start with every query token, highest stock first"""
+        # Scan the postings of the query token with the fewest matches and filter on the others
+        ranges = {}
+        costs = {}
+        for token in set(tokens):
+            start, end = ranges[token] = self._token_range(token)
+            if start == end:
+                return []
+            if end - start <= MAX_COSTED_TOKENS:
+                costs[token] = sum(len(self.postings[word]) for word in self.vocabulary[start:end])
+            else:
+                costs[token] = float('inf')
+        driver = min(costs, key=lambda token: (costs[token], -len(token)))
+        others = [re.compile(r'(?<!\w)' + re.escape(token), re.IGNORECASE)
+                  for token in set(tokens) if token != driver]
+
+        start, end = ranges[driver]
+        lists = [self.postings[token] for token in self.vocabulary[start:end]]
+
+        candidates = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        results = []
+        seen = set()
+        for _, doc_id in candidates:
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if others:
+                label = self.labels[doc_id]
+                if not all(pattern.search(label) for pattern in others):
+                    continue
+            results.append(doc_id)
+            if len(results) >= limit:
+                break
+        return results
+
+class SuggestState:
+    """One PrefixIndex per kind plus what is needed to keep aggregate stock current"""
+
+    def __init__(self):
+        self.indexes = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+        self.products = {}            # product_id -> (quantity, vendor_id, category_id)
+        self.category_platforms = {}  # category_id -> platform_id
+        self.results = OrderedDict()  # LRU of recent answers, cleared on every change
+        self.lock = threading.Lock()
+
+    def _adjust_aggregates(self, vendor_id, category_id, delta):
+        for kind, doc_id in (('vendor', vendor_id), ('category', category_id),
+                             ('platform', self.category_platforms.get(category_id))):
+            index = self.indexes[kind]
+            if doc_id in index.stock:
+                index.set_stock(doc_id, index.stock[doc_id] + delta)
+
+    def put_product(self, product_id, name, quantity, vendor_id, category_id):
+        previous = self.products.pop(product_id, None)
+        if previous:
+            self._adjust_aggregates(previous[1], previous[2], -previous[0])
+        self.products[product_id] = (quantity, vendor_id, category_id)
+        self.indexes['product'].add(product_id, name, quantity)
+        self._adjust_aggregates(vendor_id, category_id, quantity)
+
+    def remove_product(self, product_id):
+        previous = self.products.pop(product_id, None)
+        if previous:
+            self._adjust_aggregates(previous[1], previous[2], -previous[0])
+        self.indexes['product'].remove(product_id)
+
+class SuggestIndex(CatalogMirror):
+    """Catalog-wide typeahead over product, vendor, category and platform names"""
+
+    CACHE_SIZE = 2048
+
+    def build(self):
+        state = SuggestState()
+        stock_by = {'vendor': {}, 'category': {}, 'platform': {}}
+
+        state.category_platforms = dict(db.session.query(Category.category_id, Category.platform_id).all())
+
+        product_rows = []
+        for product_id, name, quantity, vendor_id, category_id in db.session.query(
+            Product.product_id, Product.name, Product.quantity, Product.vendor_id, Product.category_id
+        ).yield_per(5000):
+            quantity = quantity or 0
+            product_rows.append((product_id, name, quantity))
+            state.products[product_id] = (quantity, vendor_id, category_id)
+            for kind, doc_id in (('vendor', vendor_id), ('category', category_id),
+                                 ('platform', state.category_platforms.get(category_id))):
+                stock_by[kind][doc_id] = stock_by[kind].get(doc_id, 0) + quantity
+        state.indexes['product'].load(product_rows)
+
+        state.indexes['vendor'].load(
+            (vendor_id, name, stock_by['vendor'].get(vendor_id, 0))
+            for vendor_id, name in db.session.query(Vendor.vendor_id, Vendor.vendor_name)
+        )
+        state.indexes['category'].load(
+            (category_id, name, stock_by['category'].get(category_id, 0))
+            for category_id, name in db.session.query(Category.category_id, Category.category_name)
+        )
+        state.indexes['platform'].load(
+            (platform_id, name, stock_by['platform'].get(platform_id, 0))
+            for platform_id, name in db.session.query(Platform.platform_id, Platform.platform_name)
+        )
+        return state
+
+    def apply(self, state, kind, ids, deleted):
+        with state.lock:
+            state.results.clear()
+            if kind == 'product':
+                if len(ids) > MAX_INCREMENTAL_PRODUCTS:
+                    return False
+                if deleted:
+                    for product_id in ids:
+                        state.remove_product(product_id)
+                    return True
+                rows = db.session.query(
+                    Product.product_id, Product.name, Product.quantity, Product.vendor_id, Product.category_id
+                ).filter(Product.product_id.in_(ids)).all()
+                for product_id, name, quantity, vendor_id, category_id in rows:
+                    state.put_product(product_id, name, quantity or 0, vendor_id, category_id)
+                return True
+
+            if kind == 'category' and not deleted:
+                rows = db.session.query(Category.category_id, Category.category_name, Category.platform_id).filter(
+                    Category.category_id.in_(ids)
+                ).all()
+                for category_id, _, platform_id in rows:
+                    previous = state.category_platforms.get(category_id)
+                    if previous is not None and previous != platform_id:
+                        # Moving a category moves its stock between platforms; rebuild instead
+                        return False
+                    state.category_platforms[category_id] = platform_id
+                rows = [(category_id, name) for category_id, name, _ in rows]
+            elif kind == 'vendor' and not deleted:
+                rows = db.session.query(Vendor.vendor_id, Vendor.vendor_name).filter(Vendor.vendor_id.in_(ids)).all()
+            elif kind == 'platform' and not deleted:
+                rows = db.session.query(Platform.platform_id, Platform.platform_name).filter(
+                    Platform.platform_id.in_(ids)
+                ).all()
+            elif kind in ('vendor', 'category', 'platform'):
+                for doc_id in ids:
+                    state.indexes[kind].remove(doc_id)
+                return True
+            else:
+                return True
+
+            index = state.indexes[kind]
+            for doc_id, name in rows:
+                index.add(doc_id, name, index.stock.get(doc_id, 0))
+            return True
+
+    def suggest(self, query, limit=10, kinds=SUGGEST_KINDS):
+        """Top matches per kind for a typeahead query; needs an app context"""
+        tokens = tokenize(query)
+        if not tokens:
+            return {kind: [] for kind in kinds}
+
+        state = self.get()
+        cache_key = (tuple(tokens), limit, tuple(kinds))
+        with state.lock:
+            cached = state.results.get(cache_key)
+            if cached is not None:
+                state.results.move_to_end(cache_key)
+                return cached
+
+            results = {}
+            for kind in kinds:
+                index = state.indexes[kind]
+                results[kind] = [{
+                    'id': doc_id,
+                    'label': index.labels[doc_id][:MAX_LABEL_LENGTH],
+                    'stock': index.stock[doc_id]
+                } for doc_id in index.search(tokens, limit)]
+
+            state.results[cache_key] = results
+            if len(state.results) > self.CACHE_SIZE:
+                state.results.popitem(last=False)
+            return results
+
+suggest_index = SuggestIndex('suggest')
+
+@register_warmup
+def _prime_suggest_index():
+    suggest_index.get()
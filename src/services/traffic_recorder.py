@@ -0,0 +1,72 @@
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from src.services.warmup import WARMUP_ENVIRON_KEY
+
+class TrafficRecorder:
+    """WSGI middleware appending one JSON line per /api/ request to a file.
+
+    Each line has the wall clock start time, method, path, query string,
+    SHA-256 and size of the body, response status and the time until the
+    response started, in milliseconds. Bodies themselves are never written.
+    benchmarks/replay_load.py replays the file. A {pid} in path is replaced
+    with the worker's process id so every worker writes its own file. Warm-up
+    requests are not recorded.
+    """
+
+    def __init__(self, wsgi_app, path, sample_rate=1.0):
+        self.wsgi_app = wsgi_app
+        self.path = path.replace('{pid}', str(os.getpid()))
+        self.sample_rate = sample_rate
+        self._file = open(self.path, 'a', buffering=1, encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith('/api/') or environ.get(WARMUP_ENVIRON_KEY) or (
+            self.sample_rate < 1 and random.random() >= self.sample_rate
+        ):
+            return self.wsgi_app(environ, start_response)
+
+        body = b''
+        length = environ.get('CONTENT_LENGTH')
+        if length and length.isdigit() and int(length) > 0:
+            body = environ['wsgi.input'].read(int(length))
+            environ['wsgi.input'] = io.BytesIO(body)
+
+        status = []
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+            return start_response(status_line, headers, exc_info)
+
+        wall_clock = time.time()
+        started = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, recording_start_response)
+        finally:
+            self._write({
+                't': round(wall_clock, 6),
+                'method': environ.get('REQUEST_METHOD', 'GET'),
+                'path': path,
+                'query': environ.get('QUERY_STRING', ''),
+                'body_sha256': hashlib.sha256(body).hexdigest() if body else None,
+                'body_bytes': len(body),
+                'status': status[0] if status else 500,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3)
+            })
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+
+def install_recorder(app):
+    """Wrap app.wsgi_app in a TrafficRecorder when TRAFFIC_RECORD_PATH is set"""
+    path = app.config.get('TRAFFIC_RECORD_PATH')
+    if path:
+        app.wsgi_app = TrafficRecorder(app.wsgi_app, path, app.config.get('TRAFFIC_RECORD_SAMPLE', 1.0))
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+
+def dialect_insert(table):
+    """Return an INSERT for table that supports on_conflict_do_update on SQLite and PostgreSQL"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql_insert(table)
+    if dialect == 'sqlite':
+        return sqlite_insert(table)
+    raise RuntimeError(f'INSERT ... ON CONFLICT is not supported on {dialect}')
@@ -0,0 +1,150 @@
+from datetime import datetime
+from src.models.user import db
+from src.models.product import Product
+from src.models.order import Order, OrderItem
+from src.models.order_archive import ArchivedOrder, ArchivedOrderItem
+from src.models.vendor_stats import VendorStats
+from src.services.upsert import dialect_insert
+
+INVENTORY_COLUMNS = ('product_count', 'total_stock', 'stock_value')
+SALES_COLUMNS = ('paid_orders', 'units_sold', 'revenue')
+
+LEADERBOARD_METRICS = ('revenue', 'units_sold', 'paid_orders', 'stock_value', 'total_stock', 'product_count')
+
+def product_snapshot(products):
+    """{product_id: (vendor_id, quantity, price_per_pc)} of loaded Product objects.
+
+    Take one before and one after changing the products' attributes and hand
+    both to record_product_changes.
+    """
+    return {
+        product.product_id: (product.vendor_id, product.quantity or 0, float(product.price_per_pc or 0))
+        for product in products
+    }
+
+def _add_increments(deltas, columns):
+    """Add {vendor_id: [values in columns order]} to the stats rows, creating missing ones"""
+    rows = []
+    now = datetime.utcnow()
+    for vendor_id, values in sorted(deltas.items()):
+        if vendor_id is None or not any(values):
+            continue
+        row = dict.fromkeys(INVENTORY_COLUMNS + SALES_COLUMNS, 0)
+        row.update(zip(columns, values))
+        row.update(vendor_id=vendor_id, updated_at=now)
+        rows.append(row)
+    if not rows:
+        return
+
+    table = VendorStats.__table__
+    statement = dialect_insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.vendor_id],
+        set_=dict(
+            {column: table.c[column] + statement.excluded[column] for column in columns},
+            updated_at=statement.excluded.updated_at
+        )
+    )
+    db.session.execute(statement)
+
+def record_product_changes(before, after):
+    """Move inventory totals by the difference between two product snapshots; the caller commits"""
+    deltas = {}
+    for snapshot, sign in ((before, -1), (after, 1)):
+        for vendor_id, quantity, price in snapshot.values():
+            delta = deltas.setdefault(vendor_id, [0, 0, 0.0])
+            delta[0] += sign
+            delta[1] += sign * quantity
+            delta[2] += sign * quantity * price
+    _add_increments(deltas, INVENTORY_COLUMNS)
+
+def record_stock_changes(quantity_changes):
+    """Move stock totals by {product_id: change in quantity} made with bulk UPDATEs; the caller commits"""
+    deltas = {}
+    for product_id, vendor_id, price in db.session.query(
+        Product.product_id, Product.vendor_id, Product.price_per_pc
+    ).filter(Product.product_id.in_(list(quantity_changes))):
+        change = quantity_changes[product_id]
+        delta = deltas.setdefault(vendor_id, [0, 0, 0.0])
+        delta[1] += change
+        delta[2] += change * float(price or 0)
+    _add_increments(deltas, INVENTORY_COLUMNS)
+
+def record_vendor_sales(contributions, sign=1):
+    """Apply the vendor entries of order rollup contributions; the caller commits.
+
+    Only paid orders count, as for rollup revenue: each contributes its paid
+    order count, units and amount for every vendor it touches.
+    """
+    deltas = {}
+    for (dimension, value), metrics in contributions.items():
+        if dimension != 'vendor' or not value:
+            continue
+        _, paid_orders, _, revenue, items_sold = metrics
+        deltas[int(value)] = [paid_orders * sign, items_sold * sign, revenue * sign]
+    _add_increments(deltas, SALES_COLUMNS)
+
+def get_vendor_stats(vendor_id):
+    stats = db.session.get(VendorStats, vendor_id)
+    return stats.to_dict() if stats else VendorStats(vendor_id=vendor_id).to_dict()
+
+def ensure_vendor_stats(log=print):
+    """Build the table when it is empty while products exist, as after it was first created.
+
+    Increments only apply to rows that start from the true totals, so they
+    must not land on an empty table. Returns the number of rows built.
+    """
+    if db.session.query(VendorStats.vendor_id).first() is not None or db.session.query(Product.product_id).first() is None:
+        return 0
+    try:
+        return rebuild_vendor_stats(log)
+    except Exception as e:
+        # Another worker starting at the same time built it first
+        db.session.rollback()
+        log(f'Vendor stats not rebuilt: {str(e)}')
+        return 0
+
+def rebuild_vendor_stats(log=print):
+    """Recompute every vendor's row from products and from live and archived paid orders"""
+    totals = {}
+
+    def row(vendor_id):
+        return totals.setdefault(vendor_id, dict.fromkeys(INVENTORY_COLUMNS + SALES_COLUMNS, 0))
+
+    for vendor_id, product_count, total_stock, stock_value in db.session.query(
+        Product.vendor_id,
+        db.func.count(Product.product_id),
+        db.func.sum(Product.quantity),
+        # Prices as the app reads them; SQLite keeps digits beyond the column's scale
+        db.func.sum(Product.quantity * db.func.round(Product.price_per_pc, 2))
+    ).group_by(Product.vendor_id):
+        row(vendor_id).update(
+            product_count=product_count,
+            total_stock=int(total_stock or 0),
+            stock_value=float(stock_value or 0)
+        )
+    log(f'Counted products of {len(totals)} vendors')
+
+    # Archived orders still count, as they do for the rollups
+    for order_model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        for vendor_id, paid_orders, units_sold, revenue in db.session.query(
+            Product.vendor_id,
+            db.func.count(db.distinct(item_model.order_id)),
+            db.func.sum(item_model.quantity),
+            db.func.sum(item_model.total_price)
+        ).join(Product, item_model.product_id == Product.product_id).join(
+            order_model, item_model.order_id == order_model.id
+        ).filter(order_model.payment_status == 'paid').group_by(Product.vendor_id):
+            stats = row(vendor_id)
+            stats['paid_orders'] += paid_orders
+            stats['units_sold'] += int(units_sold or 0)
+            stats['revenue'] += float(revenue or 0)
+        log(f'Counted sales from {order_model.__tablename__}')
+
+    VendorStats.query.delete(synchronize_session=False)
+    now = datetime.utcnow()
+    rows = [dict(stats, vendor_id=vendor_id, updated_at=now) for vendor_id, stats in totals.items() if vendor_id is not None]
+    if rows:
+        db.session.execute(VendorStats.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,125 @@
+import threading
+import time
+import traceback
+from datetime import datetime
+from sqlalchemy import text
+from src.models.user import db
+
+# Read endpoints requested once at start-up so their queries are compiled and cached
+WARMUP_REQUESTS = [
+    '/api/products',
+    '/api/products?platform_id=1&category_id=1&vendor_id=1&min_price=0&max_price=1&min_quantity=0&max_quantity=1',
+    '/api/products?vendor=_&platform=_&category=_&keyword=_',
+    '/api/products?sort=popular',
+    '/api/products/batch?ids=1',
+    '/api/products/suggest?q=a',
+    '/api/categories',
+    '/api/platforms',
+    '/api/vendors',
+    '/api/orders?per_page=1',
+    '/api/orders/stats',
+    '/api/orders/rollups',
+    '/api/admin/layout',
+    '/api/admin/settings',
+    '/api/site-config',
+    '/api/navigation'
+]
+
+# WSGI environ key set on warm-up requests so metrics and traffic recording skip them;
+# unlike a header, clients cannot send it
+WARMUP_ENVIRON_KEY = 'app.warmup'
+
+# Extra callables (for example cache primers) run after the requests
+_tasks = []
+
+_ready = threading.Event()
+_status = {
+    'state': 'pending',
+    'started_at': None,
+    'finished_at': None,
+    'duration_ms': None,
+    'pool_connections': 0,
+    'requests': 0,
+    'errors': []
+}
+
+def register_warmup(func):
+    """Run func inside an app context during warm-up; usable as a decorator"""
+    _tasks.append(func)
+    return func
+
+def is_ready():
+    return _ready.is_set()
+
+def warmup_status():
+    return dict(_status, ready=is_ready())
+
+def _open_pool(connections):
+    """Check out several connections at once so the pool holds them open afterwards"""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = db.engine.connect()
+            connection.execute(text('SELECT 1'))
+            opened.append(connection)
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+def _pool_target(app):
+    configured = app.config.get('WARMUP_POOL_CONNECTIONS')
+    if configured is not None:
+        return configured
+    size = getattr(db.engine.pool, 'size', None)
+    return size() if callable(size) else 1
+
+def run_warmup(app):
+    """Open the pool, replay the warm-up requests and run registered tasks, then mark ready"""
+    _status['state'] = 'running'
+    _status['started_at'] = datetime.utcnow().isoformat()
+    started = time.perf_counter()
+
+    try:
+        with app.app_context():
+            _status['pool_connections'] = _open_pool(_pool_target(app))
+    except Exception as e:
+        traceback.print_exc()
+        _status['errors'].append(f'pool: {str(e)}')
+
+    client = app.test_client()
+    for path in WARMUP_REQUESTS:
+        try:
+            response = client.get(path, environ_base={WARMUP_ENVIRON_KEY: True})
+            _status['requests'] += 1
+            if response.status_code >= 500:
+                _status['errors'].append(f'{path}: HTTP {response.status_code}')
+        except Exception as e:
+            _status['errors'].append(f'{path}: {str(e)}')
+
+    for task in _tasks:
+        try:
+            with app.app_context():
+                task()
+                db.session.remove()
+        except Exception as e:
+            traceback.print_exc()
+            _status['errors'].append(f'{task.__name__}: {str(e)}')
+
+    _status['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    _status['finished_at'] = datetime.utcnow().isoformat()
+    _status['state'] = 'finished'
+    _ready.set()
+
+def start_warmup(app, mode):
+    """Warm up in a background thread, inline (blocking start-up), or mark ready right away when off"""
+    if mode == 'off':
+        _status['state'] = 'skipped'
+        _ready.set()
+        return None
+    if mode == 'blocking':
+        run_warmup(app)
+        return None
+    thread = threading.Thread(target=run_warmup, args=(app,), name='warmup', daemon=True)
+    thread.start()
+    return thread
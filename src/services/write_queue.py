@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, TimeoutError
+from src.models.user import db
+from src.services.metrics import WRITE_BATCH_SIZE
+
+class _Write:
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+
+class WriteQueue:
+    """One writer thread committing queued write transactions in groups.
+
+    SQLite has a single writer and every commit pays for an fsync, so request
+    threads hand their writes to this thread instead of taking turns on the
+    database lock. Writes waiting when the thread is free run back to back in
+    one transaction and share its commit. If any of them raises, the group is
+    rolled back and its writes are retried one transaction each, so a failing
+    write never takes its neighbours down with it.
+    """
+
+    def __init__(self, app, max_batch, linger_seconds):
+        self.app = app
+        self.max_batch = max_batch
+        self.linger_seconds = linger_seconds
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, args, timeout):
+        """Queue fn(*args) and return its result.
+
+        After timeout seconds a write the thread has not picked up yet is
+        cancelled and TimeoutError raised, so it never commits behind the
+        caller's back; one already running is waited for to the end.
+        """
+        write = _Write(fn, args)
+        self._queue.put(write)
+        try:
+            return write.future.result(timeout)
+        except TimeoutError:
+            if write.future.cancel():
+                raise TimeoutError(f'Write not started within {timeout}s; it was cancelled') from None
+            return write.future.result()
+
+    def _take(self, timeout=None):
+        """Next queued write that was not cancelled, marked running"""
+        while True:
+            if timeout is None:
+                write = self._queue.get()
+            elif timeout > 0:
+                write = self._queue.get(timeout=timeout)
+            else:
+                write = self._queue.get_nowait()
+            if write.future.set_running_or_notify_cancel():
+                return write
+
+    def _next_batch(self):
+        batch = [self._take()]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._take(deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit_one(self, write):
+        try:
+            result = write.fn(*write.args)
+            db.session.commit()
+        except BaseException as e:
+            db.session.rollback()
+            write.future.set_exception(e)
+            return
+        WRITE_BATCH_SIZE.observe(1)
+        write.future.set_result(result)
+
+    def _commit_group(self, batch):
+        if len(batch) == 1:
+            self._commit_one(batch[0])
+            return
+        try:
+            results = [write.fn(*write.args) for write in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for write in batch:
+                self._commit_one(write)
+            return
+        WRITE_BATCH_SIZE.observe(len(batch))
+        for write, result in zip(batch, results):
+            write.future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    try:
+                        self._commit_group(batch)
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                traceback.print_exc()
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(e)
+
+_writer = None
+_timeout = None
+
+def start_write_queue(app, max_batch, linger_seconds, timeout):
+    global _writer, _timeout
+    _timeout = timeout
+    _writer = WriteQueue(app, max_batch, linger_seconds)
+    return _writer
+
+def run_write(fn, *args):
+    """Run fn(*args) in a write transaction, commit it and return what fn returned.
+
+    fn does its writes through db.session and must return plain data (such as a
+    to_dict() result) rather than ORM objects. With the write queue started it
+    runs on the writer thread, possibly sharing a commit with other writes, and
+    its exceptions are raised here; otherwise it runs in the caller's session.
+    Either way the write is committed when this returns, so post-commit work
+    like notify_catalog_changed goes after the call.
+
+    Queued writes end the caller's transaction first, so the reads it did to
+    validate the request don't keep a pooled connection checked out while the
+    writer thread waits for one.
+    """
+    if _writer is None:
+        try:
+            result = fn(*args)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return result
+    db.session.rollback()
+    return _writer.submit(fn, args, _timeout)
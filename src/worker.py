@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import argparse
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# The standalone worker owns job processing, so the imported app must not start its own threads
+os.environ['JOB_WORKERS'] = '0'
+os.environ['WARMUP_MODE'] = 'off'
+
+from src.main import app
+from src.services.jobs import start_workers, stop_workers, run_pending
+
+def main():
+    parser = argparse.ArgumentParser(description='Process background jobs')
+    parser.add_argument('--threads', type=int, default=2, help='number of worker threads')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='seconds between queue polls')
+    parser.add_argument('--once', action='store_true', help='run queued jobs and exit')
+    args = parser.parse_args()
+
+    if args.once:
+        print(f'Ran {run_pending(app)} jobs')
+        return
+
+    start_workers(app, args.threads, args.poll_interval)
+    print(f'Job worker started with {args.threads} threads')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_workers()
+
+if __name__ == '__main__':
+    main()